@@ -0,0 +1,123 @@
+from typing import Callable, Iterator, Optional
+
+from qgis.core import QgsApplication, QgsTask
+from qgis.PyQt.QtCore import QObject, QTimer, pyqtSignal
+
+from .constants import compare_setup_batch_size
+
+
+class CompareSetupTask(QgsTask):
+    """
+    Prepare a compare setup off GUI thread.
+    prepare works on plain data only (layer ids, node orders...):
+    layers and layer tree nodes are not touched outside GUI thread.
+    """
+
+    def __init__(self, prepare: Callable, args: tuple):
+        super().__init__("QMapCompare setup")
+        self.prepare = prepare
+        self.args = args
+        self.result = None
+
+    def run(self) -> bool:
+        self.result = self.prepare(*self.args)
+        return not self.isCanceled()
+
+
+def run_compare_setup(prepare: Callable, args: tuple, commit: Callable) -> None:
+    """Run preparation and commit of a compare setup at once, on GUI thread"""
+    for _ in commit(prepare(*args)):
+        pass
+
+
+class CompareSetup(QObject):
+    """
+    Compare setup in two steps, so that QGIS stays responsive whatever
+    the number of compare layers:
+    - preparation in a background task
+    - commit of the prepared result on GUI thread, a generator yielding
+      its progress (0 to 1) after each step. Steps are run by batches,
+      one batch per event loop turn.
+    Starting a setup cancels the running one, at its next batch at most.
+    """
+
+    # percentage of the setup done
+    progressChanged = pyqtSignal(float)
+    # True when the setup is committed, False when it is cancelled
+    setupFinished = pyqtSignal(bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.batch_size = compare_setup_batch_size
+        self._task: Optional[CompareSetupTask] = None
+        self._commit: Optional[Callable] = None
+        self._steps: Optional[Iterator] = None
+
+        self._batch_timer = QTimer(self)
+        self._batch_timer.setSingleShot(True)
+        self._batch_timer.setInterval(0)
+        self._batch_timer.timeout.connect(self._run_batch)
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None or self._steps is not None
+
+    def start(self, prepare: Callable, args: tuple, commit: Callable) -> None:
+        """
+        Run prepare(*args) in a task, then commit(result) by batches.
+        Objects used by commit must be kept by the caller until it ends.
+        """
+        self.cancel()
+        task = CompareSetupTask(prepare, args)
+        task.taskCompleted.connect(lambda: self._on_task_completed(task))
+        task.taskTerminated.connect(lambda: self._on_task_terminated(task))
+        self._task = task
+        self._commit = commit
+        self.progressChanged.emit(0)
+        QgsApplication.taskManager().addTask(task)
+
+    def cancel(self) -> None:
+        """Stop running setup, steps already committed are kept"""
+        if not self.is_running:
+            return
+        if self._task is not None:
+            self._task.cancel()
+        self._task = None
+        self._commit = None
+        self._steps = None
+        self._batch_timer.stop()
+        self.setupFinished.emit(False)
+
+    def _on_task_completed(self, task: CompareSetupTask) -> None:
+        if task is not self._task:
+            # superseded
+            return
+        self._task = None
+        self._steps = self._commit(task.result)
+        self._commit = None
+        self._run_batch()
+
+    def _on_task_terminated(self, task: CompareSetupTask) -> None:
+        if task is not self._task:
+            return
+        self._task = None
+        self._commit = None
+        self.setupFinished.emit(False)
+
+    def _run_batch(self) -> None:
+        if self._steps is None:
+            return
+        steps = self._steps
+        progress = 0
+        for _ in range(self.batch_size):
+            progress = next(steps, None)
+            if progress is None:
+                self._steps = None
+                self.progressChanged.emit(100)
+                self.setupFinished.emit(True)
+                return
+            if steps is not self._steps:
+                # cancelled or superseded by a step
+                return
+        self.progressChanged.emit(100 * progress)
+        self._batch_timer.start()
@@ -0,0 +1,944 @@
+import math
+from collections import OrderedDict
+from typing import Optional
+
+from qgis.core import (
+    Qgis,
+    QgsMapLayer,
+    QgsMapRendererParallelJob,
+    QgsMapSettings,
+    QgsPointXY,
+    QgsRectangle,
+)
+from qgis.gui import QgsMapCanvas, QgsMapCanvasItem
+from qgis.PyQt.QtCore import (
+    QT_VERSION_STR,
+    QEvent,
+    QLineF,
+    QObject,
+    QPointF,
+    QRectF,
+    QSize,
+    Qt,
+    QTimer,
+    pyqtSignal,
+)
+from qgis.PyQt.QtGui import QColor, QCursor, QImage, QPainterPath, QPen
+from qgis.PyQt.QtWidgets import QApplication
+
+from .constants import (
+    compositor_z_value,
+    difference_default_threshold,
+    fade_default_opacity,
+    lens_default_size_rate,
+    lens_max_size_rate,
+    lens_min_size_rate,
+    lens_render_region_padding,
+    magnifier_tile_cache_size,
+    split_default_position,
+    split_divider_color,
+    split_divider_grab_distance,
+    split_divider_width,
+)
+from .difference import DifferenceComputer
+
+QT_VERSION_INT = int(QT_VERSION_STR.split(".")[0])
+
+if QT_VERSION_INT <= 5:
+    mouse_button_press = QEvent.MouseButtonPress
+    mouse_button_release = QEvent.MouseButtonRelease
+    mouse_move = QEvent.MouseMove
+    left_button = Qt.LeftButton
+    split_h_cursor = Qt.SplitHCursor
+    split_v_cursor = Qt.SplitVCursor
+else:
+    mouse_button_press = QEvent.Type.MouseButtonPress
+    mouse_button_release = QEvent.Type.MouseButtonRelease
+    mouse_move = QEvent.Type.MouseMove
+    left_button = Qt.MouseButton.LeftButton
+    split_h_cursor = Qt.CursorShape.SplitHCursor
+    split_v_cursor = Qt.CursorShape.SplitVCursor
+
+
+class LayerSetRenderer(QObject):
+    """
+    Render a set of layers into a cached image.
+    The image is rendered again only when the needed extent is not
+    covered by the image at the same scale, or when the layer set
+    or the style of one of the layers changes.
+    """
+
+    imageReady = pyqtSignal()
+    renderStarting = pyqtSignal()
+
+    def __init__(self, background_color: Optional[QColor] = None, parent=None):
+        super().__init__(parent)
+        self.layers = []
+        self.background_color = background_color
+
+        # last rendered image and the map extent it covers
+        self.image: Optional[QImage] = None
+        self.image_extent: Optional[QgsRectangle] = None
+        # rendering time of the last image in milliseconds
+        self.last_render_time = 0
+        # record layer rendering times in the QGIS runtime profiler
+        self.record_profile = False
+
+        self._settings: Optional[QgsMapSettings] = None
+        self._cache_key = None
+        self._job = None
+        self._job_key = None
+        self._job_extent: Optional[QgsRectangle] = None
+        # cancelled jobs are kept alive until they are finished
+        self._cancelled_jobs = []
+        # incremented each time a layer style or data changes
+        self._revision = 0
+
+        # coalesce several layer changes into one render
+        self._invalidate_timer = QTimer(self)
+        self._invalidate_timer.setSingleShot(True)
+        self._invalidate_timer.setInterval(0)
+        self._invalidate_timer.timeout.connect(self._render_again)
+
+    @property
+    def is_rendering(self) -> bool:
+        return self._job is not None
+
+    def set_layers(self, layers: list) -> None:
+        if [layer.id() for layer in layers] == [layer.id() for layer in self.layers]:
+            return
+        for layer in self.layers:
+            self._disconnect_layer(layer)
+        self.layers = list(layers)
+        for layer in self.layers:
+            layer.repaintRequested.connect(self.invalidate)
+            layer.styleChanged.connect(self.invalidate)
+            layer.willBeDeleted.connect(self._on_layer_deleted)
+        self.invalidate()
+
+    def render(
+        self, settings: QgsMapSettings, extent: Optional[QgsRectangle] = None
+    ) -> None:
+        """
+        Render layers for map settings unless the cached image is up to date,
+        only for a part of the map at the same scale when extent is given
+        """
+        settings = QgsMapSettings(settings)
+        if extent is not None:
+            settings = _region_settings(settings, extent)
+        settings.setLayers(self.layers)
+        if self.background_color is not None:
+            settings.setBackgroundColor(self.background_color)
+        settings.setFlag(Qgis.MapSettingsFlag.RecordProfile, self.record_profile)
+        self._settings = settings
+
+        key = self._render_key(settings)
+        if self._covers(key, settings.visibleExtent()):
+            return
+
+        self.cancel()
+
+        if not self.layers:
+            self.image = None
+            self.image_extent = None
+            self._cache_key = key
+            self.imageReady.emit()
+            return
+
+        job = QgsMapRendererParallelJob(settings)
+        job.finished.connect(lambda: self._on_job_finished(job, key))
+        self._job = job
+        self._job_key = key
+        self._job_extent = QgsRectangle(settings.visibleExtent())
+        self.renderStarting.emit()
+        job.start()
+
+    def invalidate(self) -> None:
+        """Drop cached image and render again with the last map settings"""
+        self._revision += 1
+        self._cache_key = None
+        self._invalidate_timer.start()
+
+    def cancel(self) -> None:
+        if self._job is None:
+            return
+        job = self._job
+        self._job = None
+        self._job_key = None
+        self._cancelled_jobs.append(job)
+        job.cancelWithoutBlocking()
+
+    def clear(self) -> None:
+        self.cancel()
+        self._invalidate_timer.stop()
+        self.set_layers([])
+        self.image = None
+        self.image_extent = None
+        self._settings = None
+        self._cache_key = None
+
+    def _covers(self, key: tuple, extent: QgsRectangle) -> bool:
+        """The cached or rendering image has the same key and contains extent"""
+        if key == self._cache_key and (
+            self.image_extent is None or self.image_extent.contains(extent)
+        ):
+            # image_extent is None for an empty layer set
+            return True
+        return key == self._job_key and self._job_extent.contains(extent)
+
+    def _render_key(self, settings: QgsMapSettings) -> tuple:
+        """Images with the same key differ only by the part of the map they show"""
+        return (
+            f"{settings.mapUnitsPerPixel():.10g}",
+            settings.devicePixelRatio(),
+            settings.destinationCrs().authid(),
+            settings.rotation(),
+            tuple(layer.id() for layer in self.layers),
+            self._revision,
+        )
+
+    def _render_again(self) -> None:
+        if self._settings is not None:
+            self.render(self._settings)
+
+    def _on_job_finished(self, job: QgsMapRendererParallelJob, key: tuple) -> None:
+        if job in self._cancelled_jobs:
+            self._cancelled_jobs.remove(job)
+            return
+        if job is not self._job:
+            return
+        self.image = job.renderedImage()
+        self.image_extent = QgsRectangle(job.mapSettings().visibleExtent())
+        self.last_render_time = job.renderingTime()
+        self._cache_key = key
+        self._job = None
+        self._job_key = None
+        self.imageReady.emit()
+
+    def _on_layer_deleted(self) -> None:
+        layer = self.sender()
+        self.set_layers([lyr for lyr in self.layers if lyr is not layer])
+
+    def _disconnect_layer(self, layer: QgsMapLayer) -> None:
+        try:
+            layer.repaintRequested.disconnect(self.invalidate)
+            layer.styleChanged.disconnect(self.invalidate)
+            layer.willBeDeleted.disconnect(self._on_layer_deleted)
+        except (TypeError, RuntimeError):
+            # layer already deleted or signal not connected
+            pass
+
+
+class MagnifierRenderer(LayerSetRenderer):
+    """
+    Render layers magnified around the lens, one small job per lens tile.
+    A job is cancelled as soon as the cursor moves to another tile,
+    and recently rendered tiles are kept in memory.
+    """
+
+    def __init__(self, background_color: Optional[QColor] = None, parent=None):
+        super().__init__(background_color, parent)
+        # render key -> (image, extent)
+        self.tiles = OrderedDict()
+        self.tile_cache_size = magnifier_tile_cache_size
+        # last map settings, lens center, size rate and zoom rendered
+        self._lens = None
+
+    def render_lens(
+        self,
+        settings: QgsMapSettings,
+        point: QgsPointXY,
+        lens_size_rate: float,
+        zoom: float,
+    ) -> None:
+        """Show the tile of the lens around point, rendering it if needed"""
+        self._lens = (QgsMapSettings(settings), QgsPointXY(point), lens_size_rate, zoom)
+        region = magnifier_render_region(
+            settings.visibleExtent(), point, lens_size_rate, zoom
+        )
+        if region is None:
+            return
+        settings = _region_settings(
+            QgsMapSettings(settings), region, settings.mapUnitsPerPixel() / zoom
+        )
+        settings.setLayers(self.layers)
+        if self.background_color is not None:
+            settings.setBackgroundColor(self.background_color)
+        settings.setFlag(Qgis.MapSettingsFlag.RecordProfile, self.record_profile)
+        self._settings = settings
+
+        key = self._tile_key(settings)
+        if key == self._job_key:
+            return
+        tile = self.tiles.get(key)
+        if tile is not None:
+            # superseded job is not needed anymore
+            self.cancel()
+            self.tiles.move_to_end(key)
+            self._show_tile(key, *tile)
+            return
+
+        self.cancel()
+        if not self.layers:
+            self._show_tile(key, None, None)
+            return
+
+        job = QgsMapRendererParallelJob(settings)
+        job.finished.connect(lambda: self._on_job_finished(job, key))
+        self._job = job
+        self._job_key = key
+        self._job_extent = QgsRectangle(settings.visibleExtent())
+        self.renderStarting.emit()
+        job.start()
+
+    def invalidate(self) -> None:
+        self.tiles.clear()
+        super().invalidate()
+
+    def clear(self) -> None:
+        super().clear()
+        self.tiles.clear()
+        self._lens = None
+
+    def _tile_key(self, settings: QgsMapSettings) -> tuple:
+        extent = settings.visibleExtent()
+        return (
+            *self._render_key(settings),
+            f"{extent.xMinimum():.10g}",
+            f"{extent.yMaximum():.10g}",
+        )
+
+    def _show_tile(
+        self, key: tuple, image: Optional[QImage], extent: Optional[QgsRectangle]
+    ) -> None:
+        self.image = image
+        self.image_extent = extent
+        self._cache_key = key
+        self.imageReady.emit()
+
+    def _render_again(self) -> None:
+        if self._lens is not None:
+            self.render_lens(*self._lens)
+
+    def _on_job_finished(self, job: QgsMapRendererParallelJob, key: tuple) -> None:
+        if job in self._cancelled_jobs:
+            self._cancelled_jobs.remove(job)
+            return
+        if job is not self._job:
+            return
+        image = job.renderedImage()
+        extent = QgsRectangle(job.mapSettings().visibleExtent())
+        self.last_render_time = job.renderingTime()
+        self._job = None
+        self._job_key = None
+        self.tiles[key] = (image, extent)
+        while len(self.tiles) > self.tile_cache_size:
+            self.tiles.popitem(last=False)
+        self._show_tile(key, image, extent)
+
+
+class CompareCompositorItem(QgsMapCanvasItem):
+    """
+    Canvas overlay drawing, over the map of base layers rendered by the canvas,
+    the cached compare image clipped to split or lens shape, blended over
+    the whole map with fade opacity, or the difference image
+    """
+
+    def __init__(
+        self,
+        canvas: QgsMapCanvas,
+        base_renderer: LayerSetRenderer,
+        compare_renderer: LayerSetRenderer,
+        magnifier_renderer: Optional[MagnifierRenderer] = None,
+        difference: Optional[DifferenceComputer] = None,
+    ):
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.base_renderer = base_renderer
+        self.compare_renderer = compare_renderer
+        self.magnifier_renderer = magnifier_renderer
+        self.difference = difference
+
+        self.compare_method = "vertical"
+        self.lens_shape = "circle"
+        self.lens_size_rate = lens_default_size_rate
+        self.lens_zoom = 1
+        self.fade_opacity = fade_default_opacity
+        self.cursor_point: Optional[QgsPointXY] = None
+        self.split_position = split_default_position
+
+        self.setZValue(compositor_z_value)
+        self.setRect(canvas.extent())
+
+    def paint(self, painter, option=None, widget=None) -> None:
+        # base layers are the canvas map below the overlay
+        if self.is_magnifying():
+            self._paint_magnifier(painter)
+            return
+
+        if self.compare_method == "difference":
+            # difference of base and compare images, over base layers
+            if self.difference is not None and self.difference.image is not None:
+                painter.drawImage(
+                    self._image_target_rect(self.difference.image_extent),
+                    self.difference.image,
+                )
+            return
+
+        if self.compare_renderer.image is None:
+            return
+        if self.compare_method == "fade":
+            # compare image blended over base layers
+            painter.save()
+            painter.setOpacity(self.fade_opacity)
+            painter.drawImage(
+                self._image_target_rect(self.compare_renderer.image_extent),
+                self.compare_renderer.image,
+            )
+            painter.restore()
+            return
+        clip_path = self.compare_clip_path()
+        if clip_path is None:
+            return
+        painter.save()
+        painter.setClipPath(clip_path)
+        painter.drawImage(
+            self._image_target_rect(self.compare_renderer.image_extent),
+            self.compare_renderer.image,
+        )
+        painter.restore()
+
+        divider = self.divider_line()
+        if divider is not None:
+            painter.save()
+            painter.setPen(QPen(QColor(split_divider_color), split_divider_width))
+            painter.drawLine(divider)
+            painter.restore()
+
+    def is_magnifying(self) -> bool:
+        return (
+            self.compare_method == "lens"
+            and self.lens_zoom > 1
+            and self.magnifier_renderer is not None
+            and not self.canvas.mapSettings().rotation()
+        )
+
+    def _paint_magnifier(self, painter) -> None:
+        """Magnified compare layers in the lens, centered on the cursor"""
+        clip_path = self.compare_clip_path()
+        if clip_path is None:
+            return
+        painter.save()
+        painter.setClipPath(clip_path)
+        # compare layers background, where the tile is still rendering
+        painter.fillRect(clip_path.boundingRect(), QColor("white"))
+        image = self.magnifier_renderer.image
+        if image is not None:
+            painter.drawImage(
+                self._magnified_target_rect(self.magnifier_renderer.image_extent),
+                image,
+            )
+        painter.restore()
+
+    def _magnified_target_rect(self, extent: QgsRectangle) -> QRectF:
+        center = self.toCanvasCoordinates(self.cursor_point) - self.pos()
+        pixels_per_unit = self.lens_zoom / self.canvas.mapUnitsPerPixel()
+        return QRectF(
+            center.x() + (extent.xMinimum() - self.cursor_point.x()) * pixels_per_unit,
+            center.y() - (extent.yMaximum() - self.cursor_point.y()) * pixels_per_unit,
+            extent.width() * pixels_per_unit,
+            extent.height() * pixels_per_unit,
+        )
+
+    def divider_line(self) -> Optional[QLineF]:
+        """Split divider, in item coordinates"""
+        rect = self.boundingRect()
+        if self.compare_method == "horizontal":
+            y = rect.top() + rect.height() * self.split_position
+            return QLineF(rect.left(), y, rect.right(), y)
+        if self.compare_method == "vertical":
+            x = rect.left() + rect.width() * self.split_position
+            return QLineF(x, rect.top(), x, rect.bottom())
+        return None
+
+    def split_position_at(self, canvas_point: QPointF) -> float:
+        """Split position of a point in canvas pixels"""
+        rect = self.boundingRect()
+        point = canvas_point - self.pos()
+        if self.compare_method == "horizontal":
+            position = (point.y() - rect.top()) / rect.height()
+        else:
+            position = (point.x() - rect.left()) / rect.width()
+        return max(0.0, min(1.0, position))
+
+    def is_near_divider(self, canvas_point: QPointF) -> bool:
+        divider = self.divider_line()
+        if divider is None:
+            return False
+        point = canvas_point - self.pos()
+        if self.compare_method == "horizontal":
+            distance = abs(point.y() - divider.y1())
+        else:
+            distance = abs(point.x() - divider.x1())
+        return distance <= split_divider_grab_distance
+
+    def compare_clip_path(self) -> Optional[QPainterPath]:
+        """Area where compare layers are displayed, in item coordinates"""
+        rect = self.boundingRect()
+        path = QPainterPath()
+
+        if self.compare_method == "lens":
+            if self.cursor_point is None:
+                return None
+            center = self.toCanvasCoordinates(self.cursor_point) - self.pos()
+            rate = max(lens_min_size_rate, min(lens_max_size_rate, self.lens_size_rate))
+            radius = rect.width() * rate
+            if self.lens_shape == "square":
+                path.addRect(
+                    QRectF(
+                        center.x() - radius, center.y() - radius, radius * 2, radius * 2
+                    )
+                )
+            else:
+                path.addEllipse(center, radius, radius)
+            return path
+
+        if self.compare_method == "horizontal":
+            # below the divider, like split_mask_geometry
+            top = rect.top() + rect.height() * self.split_position
+            path.addRect(QRectF(rect.left(), top, rect.width(), rect.bottom() - top))
+            return path
+
+        # Fallback is vertical: right of the divider, like split_mask_geometry
+        left = rect.left() + rect.width() * self.split_position
+        path.addRect(QRectF(left, rect.top(), rect.right() - left, rect.height()))
+        return path
+
+    def _image_target_rect(self, extent: QgsRectangle) -> QRectF:
+        top_left = self.toCanvasCoordinates(
+            QgsPointXY(extent.xMinimum(), extent.yMaximum())
+        )
+        bottom_right = self.toCanvasCoordinates(
+            QgsPointXY(extent.xMaximum(), extent.yMinimum())
+        )
+        return QRectF(top_left - self.pos(), bottom_right - self.pos())
+
+
+class CompareCompositor(QObject):
+    """
+    Compare mode compositing a cached render of compare layers, or the pixel
+    difference of base and compare layers, on a canvas overlay. The canvas
+    keeps rendering the other layers below it. Moving the cursor, dragging
+    the split divider, changing the lens, the fade opacity or the difference
+    threshold only repaints the overlay, renders happen when the extent,
+    the layer sets or a layer style change.
+    """
+
+    splitPositionChanged = pyqtSignal(float)
+
+    def __init__(self, canvas: QgsMapCanvas):
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.base_renderer = LayerSetRenderer(parent=self)
+        # white background below compare layers, like QMapCompareBackground
+        self.compare_renderer = LayerSetRenderer(QColor("white"), self)
+        self.magnifier_renderer = MagnifierRenderer(QColor("white"), self)
+        # pixel difference of base and compare images, in difference mode
+        self.difference = DifferenceComputer(self)
+        self.compare_layers = []
+        self.item: Optional[CompareCompositorItem] = None
+        self.split_position = split_default_position
+        self._dragging_divider = False
+        # canvas layers as set by QGIS, compare layers are removed
+        # from the canvas while the overlay shows them
+        self._canvas_layers = []
+        self._setting_canvas_layers = False
+
+    @property
+    def is_running(self) -> bool:
+        return self.item is not None
+
+    def start(
+        self,
+        compare_layers: list,
+        compare_method: str,
+        lens_shape: str = "circle",
+        lens_size_rate: float = lens_default_size_rate,
+        lens_zoom: float = 1,
+        difference_threshold: int = difference_default_threshold,
+        fade_opacity: float = fade_default_opacity,
+    ) -> None:
+        if self.item is None:
+            self._canvas_layers = self.canvas.layers()
+            self.item = CompareCompositorItem(
+                self.canvas,
+                self.base_renderer,
+                self.compare_renderer,
+                self.magnifier_renderer,
+                self.difference,
+            )
+            self.base_renderer.imageReady.connect(self.item.update)
+            self.compare_renderer.imageReady.connect(self.item.update)
+            self.magnifier_renderer.imageReady.connect(self.item.update)
+            self.difference.imageReady.connect(self.item.update)
+            self.base_renderer.imageReady.connect(self._compute_difference)
+            self.compare_renderer.imageReady.connect(self._compute_difference)
+            self.canvas.extentsChanged.connect(self._render)
+            self.canvas.destinationCrsChanged.connect(self._render)
+            self.canvas.layersChanged.connect(self._on_canvas_layers_changed)
+            self.canvas.xyCoordinates.connect(self._on_cursor_moved)
+            # Split divider dragging, before the map tool gets mouse events
+            self.canvas.viewport().installEventFilter(self)
+
+        self.item.compare_method = compare_method
+        self.item.lens_shape = lens_shape
+        self.item.lens_size_rate = lens_size_rate
+        self.item.lens_zoom = lens_zoom
+        self.item.fade_opacity = fade_opacity
+        self.item.split_position = self.split_position
+        self.difference.set_threshold(difference_threshold)
+
+        if compare_method != "difference":
+            # base layers are rendered by the canvas only
+            self.base_renderer.clear()
+        self.compare_layers = list(compare_layers)
+        self.compare_renderer.set_layers(self.compare_layers)
+        self.magnifier_renderer.set_layers(self.compare_layers)
+        self._set_base_layers()
+        self._render()
+        # cached images may be up to date already
+        self._compute_difference()
+        self.item.update()
+
+    def stop(self) -> None:
+        if self.item is None:
+            return
+        self.canvas.extentsChanged.disconnect(self._render)
+        self.canvas.destinationCrsChanged.disconnect(self._render)
+        self.canvas.layersChanged.disconnect(self._on_canvas_layers_changed)
+        self.canvas.xyCoordinates.disconnect(self._on_cursor_moved)
+        self.canvas.viewport().removeEventFilter(self)
+        self._stop_dragging_divider()
+
+        self.base_renderer.clear()
+        self.compare_renderer.clear()
+        self.magnifier_renderer.clear()
+        self.difference.clear()
+        self.base_renderer.imageReady.disconnect(self.item.update)
+        self.compare_renderer.imageReady.disconnect(self.item.update)
+        self.magnifier_renderer.imageReady.disconnect(self.item.update)
+        self.difference.imageReady.disconnect(self.item.update)
+        self.base_renderer.imageReady.disconnect(self._compute_difference)
+        self.compare_renderer.imageReady.disconnect(self._compute_difference)
+
+        self.canvas.scene().removeItem(self.item)
+        self.item = None
+        self.compare_layers = []
+
+        # compare layers are shown by the canvas again
+        self._set_canvas_layers(self._canvas_layers)
+        self._canvas_layers = []
+        self.canvas.refresh()
+
+    def set_split_position(self, split_position: float) -> None:
+        """Move split divider, only the overlay is repainted"""
+        split_position = max(0.0, min(1.0, split_position))
+        if split_position == self.split_position:
+            return
+        self.split_position = split_position
+        if self.item is not None:
+            self.item.split_position = split_position
+            self.item.update()
+            if not self._dragging_divider:
+                self._render()
+        self.splitPositionChanged.emit(split_position)
+
+    def set_fade_opacity(self, opacity: float) -> None:
+        """Blend cached images with another opacity, only the overlay is repainted"""
+        opacity = max(0.0, min(1.0, opacity))
+        if self.item is None or opacity == self.item.fade_opacity:
+            return
+        self.item.fade_opacity = opacity
+        self.item.update()
+
+    def set_difference_threshold(self, threshold: int) -> None:
+        """Compute difference of the cached images again, without any render"""
+        self.difference.set_threshold(threshold)
+
+    def eventFilter(self, watched, event) -> bool:
+        if self.item is None or self.item.compare_method not in [
+            "vertical",
+            "horizontal",
+        ]:
+            return False
+        event_type = event.type()
+        if event_type not in (mouse_button_press, mouse_move, mouse_button_release):
+            return False
+
+        point = _event_point(event)
+        if event_type == mouse_button_press:
+            if event.button() != left_button or not self.item.is_near_divider(point):
+                return False
+            self._dragging_divider = True
+            # render whole map images once, then the drag is only compositing
+            self._render()
+            if self.item.compare_method == "horizontal":
+                QApplication.setOverrideCursor(QCursor(split_v_cursor))
+            else:
+                QApplication.setOverrideCursor(QCursor(split_h_cursor))
+            return True
+
+        if not self._dragging_divider:
+            return False
+        if event_type == mouse_move:
+            self.set_split_position(self.item.split_position_at(point))
+        else:
+            self._stop_dragging_divider()
+        # the map tool must not pan while the divider is dragged
+        return True
+
+    def _stop_dragging_divider(self) -> None:
+        if not self._dragging_divider:
+            return
+        self._dragging_divider = False
+        QApplication.restoreOverrideCursor()
+
+    def _base_layers(self) -> list:
+        compare_layer_ids = [layer.id() for layer in self.compare_layers]
+        return [
+            layer
+            for layer in self._canvas_layers
+            if layer.id() not in compare_layer_ids
+        ]
+
+    def _set_canvas_layers(self, layers: list) -> None:
+        self._setting_canvas_layers = True
+        try:
+            self.canvas.setLayers(layers)
+        finally:
+            self._setting_canvas_layers = False
+
+    def _set_base_layers(self) -> None:
+        """Let the canvas render base layers only, below the overlay"""
+        base_layers = self._base_layers()
+        base_layer_ids = [layer.id() for layer in base_layers]
+        if [layer.id() for layer in self.canvas.layers()] != base_layer_ids:
+            self._set_canvas_layers(base_layers)
+        if self.item.compare_method == "difference":
+            self.base_renderer.set_layers(base_layers)
+
+    def _on_canvas_layers_changed(self) -> None:
+        if self._setting_canvas_layers:
+            return
+        # layers set by the layer tree, e.g. a new layer
+        self._canvas_layers = self.canvas.layers()
+        self._set_base_layers()
+
+    def _render(self) -> None:
+        if self.item is None:
+            return
+        self.item.setRect(self.canvas.extent())
+        settings = self.canvas.mapSettings()
+        if self.item.compare_method == "lens":
+            self._render_lens_region()
+        elif self.item.compare_method == "difference":
+            # pixels of both layer sets are compared over the whole map
+            self.base_renderer.render(settings)
+            self.compare_renderer.render(settings)
+        elif (
+            self.item.compare_method == "fade"
+            or self._dragging_divider
+            or settings.rotation()
+        ):
+            # compare layers are shown over the whole map, or the divider
+            # may go anywhere: render (or reuse) a whole map image
+            self.compare_renderer.render(settings)
+        else:
+            # compare layers are rendered only on their side of the divider
+            _, compare_region = split_render_regions(
+                settings.visibleExtent(),
+                self.item.compare_method,
+                self.split_position,
+                settings.mapUnitsPerPixel(),
+            )
+            if compare_region is not None:
+                self.compare_renderer.render(settings, compare_region)
+
+    def _compute_difference(self) -> None:
+        """Start difference computation once both images show the same extent"""
+        if self.item is None or self.item.compare_method != "difference":
+            return
+        base_image = self.base_renderer.image
+        compare_image = self.compare_renderer.image
+        if base_image is None or compare_image is None:
+            return
+        if self.base_renderer.image_extent != self.compare_renderer.image_extent:
+            # the other image is still rendering
+            return
+        self.difference.compute(
+            base_image, compare_image, self.base_renderer.image_extent
+        )
+
+    def _render_lens_region(self) -> None:
+        """Render compare layers around the lens only"""
+        point = self.item.cursor_point
+        if point is None:
+            return
+        settings = self.canvas.mapSettings()
+        if self.item.is_magnifying():
+            self.magnifier_renderer.render_lens(
+                settings, point, self.item.lens_size_rate, self.item.lens_zoom
+            )
+            return
+        if settings.rotation():
+            # regions are not rotated: render the whole map
+            self.compare_renderer.render(settings)
+            return
+        region = lens_render_region(
+            settings.visibleExtent(), point, self.item.lens_size_rate
+        )
+        if region is not None:
+            self.compare_renderer.render(settings, region)
+
+    def _on_cursor_moved(self, point: QgsPointXY) -> None:
+        if self.item.compare_method != "lens":
+            return
+        self.item.cursor_point = QgsPointXY(point)
+        # a blit of the cached images, and a render only when the lens
+        # leaves the rendered region
+        self.item.update()
+        self._render_lens_region()
+
+
+def split_render_regions(
+    visible_extent: QgsRectangle,
+    compare_method: str,
+    split_position: float,
+    map_units_per_pixel: float,
+) -> tuple:
+    """
+    Parts of the map showing base layers and compare layers in split mode,
+    overlapping by one pixel at the divider. A part is None when empty.
+    """
+    overlap = map_units_per_pixel
+    if compare_method == "horizontal":
+        # compare layers below the divider
+        divider = visible_extent.yMaximum() - visible_extent.height() * split_position
+        base_region = QgsRectangle(
+            visible_extent.xMinimum(),
+            divider - overlap,
+            visible_extent.xMaximum(),
+            visible_extent.yMaximum(),
+        )
+        compare_region = QgsRectangle(
+            visible_extent.xMinimum(),
+            visible_extent.yMinimum(),
+            visible_extent.xMaximum(),
+            divider + overlap,
+        )
+    else:
+        # compare layers right of the divider
+        divider = visible_extent.xMinimum() + visible_extent.width() * split_position
+        base_region = QgsRectangle(
+            visible_extent.xMinimum(),
+            visible_extent.yMinimum(),
+            divider + overlap,
+            visible_extent.yMaximum(),
+        )
+        compare_region = QgsRectangle(
+            divider - overlap,
+            visible_extent.yMinimum(),
+            visible_extent.xMaximum(),
+            visible_extent.yMaximum(),
+        )
+    return (
+        _non_empty(base_region.intersect(visible_extent)),
+        _non_empty(compare_region.intersect(visible_extent)),
+    )
+
+
+def _non_empty(extent: QgsRectangle) -> Optional[QgsRectangle]:
+    if extent.isEmpty():
+        return None
+    return extent
+
+
+def lens_render_region(
+    visible_extent: QgsRectangle, point: QgsPointXY, lens_size_rate: float
+) -> Optional[QgsRectangle]:
+    """
+    Part of the map to render so that the lens around point is covered.
+    The region is the same for all points of a grid cell of lens radius size.
+    """
+    rate = max(lens_min_size_rate, min(lens_max_size_rate, lens_size_rate))
+    radius = visible_extent.width() * rate
+    if radius <= 0:
+        return None
+    center_x = round(point.x() / radius) * radius
+    center_y = round(point.y() / radius) * radius
+    half_size = radius * lens_render_region_padding
+    region = QgsRectangle(
+        center_x - half_size,
+        center_y - half_size,
+        center_x + half_size,
+        center_y + half_size,
+    ).intersect(visible_extent)
+    if region.isEmpty():
+        return None
+    return region
+
+
+def magnifier_render_region(
+    visible_extent: QgsRectangle,
+    point: QgsPointXY,
+    lens_size_rate: float,
+    zoom: float,
+) -> Optional[QgsRectangle]:
+    """
+    Tile to render so that the lens around point is covered once magnified,
+    like lens_render_region with lens radius divided by zoom.
+    The tile may go beyond the visible extent, magnified near map edges.
+    """
+    rate = max(lens_min_size_rate, min(lens_max_size_rate, lens_size_rate))
+    radius = visible_extent.width() * rate / zoom
+    if radius <= 0:
+        return None
+    center_x = round(point.x() / radius) * radius
+    center_y = round(point.y() / radius) * radius
+    half_size = radius * lens_render_region_padding
+    return QgsRectangle(
+        center_x - half_size,
+        center_y - half_size,
+        center_x + half_size,
+        center_y + half_size,
+    )
+
+
+def _region_settings(
+    settings: QgsMapSettings,
+    extent: QgsRectangle,
+    map_units_per_pixel: Optional[float] = None,
+) -> QgsMapSettings:
+    """Map settings rendering extent at the scale of settings, or the given one"""
+    if map_units_per_pixel is None:
+        map_units_per_pixel = settings.mapUnitsPerPixel()
+    width = max(1, math.ceil(extent.width() / map_units_per_pixel))
+    height = max(1, math.ceil(extent.height() / map_units_per_pixel))
+    settings.setOutputSize(QSize(width, height))
+    # whole pixels: extent and output size have the same aspect ratio
+    settings.setExtent(
+        QgsRectangle(
+            extent.xMinimum(),
+            extent.yMaximum() - height * map_units_per_pixel,
+            extent.xMinimum() + width * map_units_per_pixel,
+            extent.yMaximum(),
+        )
+    )
+    return settings
+
+
+def _event_point(event) -> QPointF:
+    """Mouse event position in widget pixels"""
+    if QT_VERSION_INT <= 5:
+        return QPointF(event.pos())
+    return event.position()
@@ -1,47 +1,106 @@
 # Compare layers and group names
 compare_group_name = "QMapCompare_Group"
 compare_mask_layer_name = "QMapCompareMask"
+# former duplicate mask for non metric CRS, removed when found
+compare_geographic_mask_layer_name = "QMapCompareMask_geographic"
 compare_background_layer_name = "QMapCompareBackground"
 
 # Lens compare parameters
 lens_default_size_rate = 0.15
 lens_min_size_rate = 0.05
 lens_max_size_rate = 0.40
-# - lens dynamic refresh interval: 200 milliseconds = 0.2s
-lens_auto_refresh_interval_time = 200
-
-# Geometry generator formula for compare masks
-vertical_split_geometry = """make_rectangle_3points(
-        make_point(x(@map_extent_center), y(@map_extent_center) - (@map_extent_height / 2)),
-        make_point(x(@map_extent_center), y(@map_extent_center) + (@map_extent_height / 2)),
-        make_point(x(@map_extent_center) + (@map_extent_width / 2), y(@map_extent_center) + (@map_extent_height / 2)),
-        0)"""
-
-horizontal_split_geometry = """make_rectangle_3points(
-        make_point(x(@map_extent_center) - (@map_extent_width / 2), y(@map_extent_center)),
-        make_point(x(@map_extent_center) + (@map_extent_width / 2), y(@map_extent_center) ),
-        make_point(x(@map_extent_center) - (@map_extent_width / 2), y(@map_extent_center) - (@map_extent_height / 2)),
-        0)"""
-
-
-def get_lens_geometry(
-    shape: str = "circle", rate: float = lens_default_size_rate
-) -> str:
-    """Generate lens geometry expression for the given shape and size rate."""
-    rate = max(lens_min_size_rate, min(lens_max_size_rate, rate))
-    if shape == "square":
-        cx = "x(@canvas_cursor_point)"
-        cy = "y(@canvas_cursor_point)"
-        offset = f"@map_extent_width * {rate}"
-        bottom_left = f"make_point({cx} - {offset}, {cy} - {offset})"
-        top_left = f"make_point({cx} - {offset}, {cy} + {offset})"
-        top_right = f"make_point({cx} + {offset}, {cy} + {offset})"
-        return f"make_rectangle_3points({bottom_left}, {top_left}, {top_right}, 0)"
-    return f"buffer(@canvas_cursor_point, @map_extent_width * {rate})"
-
-
-compare_background_geometry = """@map_extent"""
+# - lens repaint coalescing interval: 16 milliseconds (about one frame at 60 fps)
+#   cursor moves received within this interval are rendered as a single frame
+lens_frame_interval_time = 16
+
+# Split mask geometries kept in memory, by extent
+# (lens mask geometries change with every cursor move and are not kept)
+mask_geometry_cache_size = 16
+# - circle lens segments per quarter, like the buffer expression function
+lens_circle_segments = 8
 
 # Mirror compare related constants
 mirror_widget_name = "QMapCompare Mirror"
 mirror_maptheme_name = "QMapCompare Mirror"
+
+# Grid compare related constants
+grid_widget_name = "QMapCompare Grid"
+
+# Cached compositing parameters
+# - z value of the compositing overlay: above the canvas map image (-10),
+#   below rubber bands, markers and annotations (0 and above)
+compositor_z_value = -5
+# - split divider position as a ratio of the map width (vertical split)
+#   or height (horizontal split), the divider can be dragged from
+#   this distance in pixels
+split_default_position = 0.5
+split_divider_grab_distance = 8
+split_divider_color = "white"
+split_divider_width = 2
+# - lens compositing renders compare layers only around the lens:
+#   a square of half side lens radius * this padding, whose center is
+#   snapped to a grid of lens radius step so that small cursor moves
+#   reuse the same render (padding must be at least 1.5 to cover the lens)
+lens_render_region_padding = 2.0
+# - magnifier lens zoom factors, 1 is the same scale as the map
+#   magnified lens tiles are rendered like lens regions, at map scale / zoom,
+#   and the most recent ones are kept in memory
+lens_zoom_factors = [1, 2, 4, 8]
+magnifier_tile_cache_size = 32
+
+# - difference mode: pixels whose largest color channel difference
+#   reaches the threshold are drawn in change color (RGBA) over base layers,
+#   threshold 0 shows the absolute difference of each channel
+difference_default_threshold = 0
+difference_max_threshold = 255
+difference_change_color = (255, 0, 0, 255)
+
+# - fade mode: opacity of compare layers blended over base layers (0 to 1)
+fade_default_opacity = 0.5
+
+# Change statistics parameters
+# - pixels compared at once: memory stays bounded whatever the raster size
+# - histogram bins of each band, between the band minimum and maximum
+#   estimated from a sample of pixels
+# - rasters are read at their resolution, at most this size (pixels)
+statistics_chunk_pixels = 1024 * 1024
+statistics_histogram_bins = 256
+statistics_range_sample_size = 250000
+statistics_max_raster_size = 20000
+
+# Compare setup parameters
+# - layer tree changes committed per event loop turn when split, lens
+#   or mirror compare is set up in background
+compare_setup_batch_size = 50
+
+# Map canvases synchronization parameters
+# - pan and zoom events received within this interval (ms) are applied
+#   to synchronized canvases as a single extent change
+map_sync_frame_interval_time = 16
+
+# Mirror shared render cache parameters
+# - layers shared with main map drawn below the mirror map image (-10)
+#   and above it, below rubber bands, markers and annotations
+mirror_shared_underlay_z_value = -20
+mirror_shared_overlay_z_value = -5
+
+# Prefetch of tiled compare layers around the map
+# - prefetch starts when the map stays still for this time (ms)
+# - number of extents rendered per idle period: 8 around the map
+#   and 1 zoomed in
+# - memory of images rendered at the same time (bytes), at least one
+# - number of prefetched extents remembered, not prefetched again
+prefetch_idle_time = 500
+prefetch_max_extents = 9
+prefetch_memory_budget = 64 * 1024 * 1024
+prefetch_warmed_extent_count = 256
+
+# Render telemetry parameters
+# - number of render samples kept in memory
+# - renders per second are counted over this window (s)
+# - number of slowest layers shown in the panel
+# - telemetry panel refresh interval (ms)
+telemetry_sample_count = 1000
+telemetry_rate_window = 1.0
+telemetry_slowest_layer_count = 5
+telemetry_panel_refresh_interval_time = 250
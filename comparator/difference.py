@@ -0,0 +1,198 @@
+from typing import Optional
+
+import numpy as np
+from qgis.core import QgsApplication, QgsRectangle, QgsTask
+from qgis.PyQt.QtCore import QT_VERSION_STR, QObject, pyqtSignal
+from qgis.PyQt.QtGui import QImage
+
+from .constants import difference_change_color
+
+QT_VERSION_INT = int(QT_VERSION_STR.split(".")[0])
+
+if QT_VERSION_INT <= 5:
+    image_format_rgba8888 = QImage.Format_RGBA8888
+else:
+    image_format_rgba8888 = QImage.Format.Format_RGBA8888
+
+
+def image_to_array(image: QImage) -> np.ndarray:
+    """(height, width, 4) RGBA copy of an image"""
+    image = image.convertToFormat(image_format_rgba8888)
+    width = image.width()
+    height = image.height()
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    # rows may be padded to bytesPerLine
+    array = np.frombuffer(bits, np.uint8).reshape(height, image.bytesPerLine())
+    return array[:, : width * 4].reshape(height, width, 4).copy()
+
+
+def array_to_image(array: np.ndarray) -> QImage:
+    """Image of a (height, width, 4) RGBA array"""
+    array = np.ascontiguousarray(array)
+    height, width, _ = array.shape
+    image = QImage(array.data, width, height, width * 4, image_format_rgba8888)
+    # detach from the array memory
+    return image.copy()
+
+
+def pixel_difference(
+    base: np.ndarray, compare: np.ndarray, threshold: int = 0
+) -> np.ndarray:
+    """
+    RGBA image of the difference of two RGBA arrays of the same size:
+    - threshold 0: absolute difference of each color channel, opaque
+    - threshold above 0: change mask, pixels whose largest channel difference
+      reaches threshold in change color, other pixels transparent
+    """
+    # |a - b| without widening uint8
+    difference = np.maximum(base[..., :3], compare[..., :3])
+    difference -= np.minimum(base[..., :3], compare[..., :3])
+
+    result = np.empty(base.shape, np.uint8)
+    if threshold <= 0:
+        result[..., :3] = difference
+        result[..., 3] = 255
+        return result
+
+    changed = difference.max(axis=2) >= threshold
+    result[...] = 0
+    result[changed] = difference_change_color
+    return result
+
+
+class DifferenceTask(QgsTask):
+    """Compute the difference image of base and compare images off GUI thread"""
+
+    def __init__(
+        self,
+        base_image: QImage,
+        compare_image: QImage,
+        threshold: int,
+        arrays: Optional[tuple] = None,
+    ):
+        super().__init__("QMapCompare difference")
+        self.base_image = base_image
+        self.compare_image = compare_image
+        self.threshold = threshold
+        # (base, compare) RGBA arrays, read from images when not given
+        self.arrays = arrays
+        self.result_image: Optional[QImage] = None
+
+    def run(self) -> bool:
+        if self.arrays is None:
+            base = image_to_array(self.base_image)
+            if self.isCanceled():
+                return False
+            compare = image_to_array(self.compare_image)
+            self.arrays = (base, compare)
+        if self.isCanceled():
+            return False
+        base, compare = self.arrays
+        if base.shape != compare.shape:
+            return False
+        difference = pixel_difference(base, compare, self.threshold)
+        if self.isCanceled():
+            return False
+        self.result_image = array_to_image(difference)
+        return True
+
+
+class DifferenceComputer(QObject):
+    """
+    Compute difference images of base and compare images in background tasks.
+    Images converted to arrays are kept, so that a new threshold only
+    computes the difference again. A computation superseded by a newer one
+    is cancelled.
+    """
+
+    # difference image of the last images and threshold is ready
+    imageReady = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.threshold = 0
+        # last difference image and the map extent it covers
+        self.image: Optional[QImage] = None
+        self.image_extent: Optional[QgsRectangle] = None
+        # computing time of the last difference image in milliseconds
+        self.last_compute_time = 0
+
+        self._images = None
+        self._images_key = None
+        self._images_extent: Optional[QgsRectangle] = None
+        self._arrays = None
+        self._task: Optional[DifferenceTask] = None
+        self._task_key = None
+        # images and threshold of the current difference image
+        self._image_key = None
+
+    def compute(
+        self, base_image: QImage, compare_image: QImage, extent: QgsRectangle
+    ) -> None:
+        """Difference of new images of extent, with the current threshold"""
+        images_key = (base_image.cacheKey(), compare_image.cacheKey())
+        if images_key != self._images_key:
+            self._images = (base_image, compare_image)
+            self._images_key = images_key
+            self._images_extent = QgsRectangle(extent)
+            self._arrays = None
+        self._start()
+
+    def set_threshold(self, threshold: int) -> None:
+        """Compute difference of the same images again, without any render"""
+        if threshold == self.threshold:
+            return
+        self.threshold = threshold
+        if self._images is not None:
+            self._start()
+
+    def cancel(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self._task_key = None
+
+    def clear(self) -> None:
+        self.cancel()
+        self.image = None
+        self.image_extent = None
+        self._image_key = None
+        self._images = None
+        self._images_key = None
+        self._arrays = None
+
+    def _start(self) -> None:
+        key = (self._images_key, self.threshold)
+        if key in (self._task_key, self._image_key):
+            return
+        self.cancel()
+        base_image, compare_image = self._images
+        task = DifferenceTask(base_image, compare_image, self.threshold, self._arrays)
+        task.taskCompleted.connect(lambda: self._on_task_completed(task))
+        task.taskTerminated.connect(lambda: self._on_task_terminated(task))
+        self._task = task
+        self._task_key = key
+        QgsApplication.taskManager().addTask(task)
+
+    def _on_task_completed(self, task: DifferenceTask) -> None:
+        if task is not self._task:
+            return
+        # images don't change while their task runs:
+        # keep their arrays for next threshold changes
+        self._arrays = task.arrays
+        self.image = task.result_image
+        self.image_extent = self._images_extent
+        self._image_key = self._task_key
+        self.last_compute_time = task.elapsedTime()
+        self._task = None
+        self._task_key = None
+        self.imageReady.emit()
+
+    def _on_task_terminated(self, task: DifferenceTask) -> None:
+        """Failed task (e.g. images of different sizes): allow computing again"""
+        if task is not self._task:
+            return
+        self._task = None
+        self._task_key = None
@@ -0,0 +1,105 @@
+import math
+from typing import Optional, Union
+
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtWidgets import QDockWidget, QGridLayout, QLabel, QVBoxLayout, QWidget
+
+from .constants import grid_widget_name
+from .telemetry import InteractionRenderTimer
+
+
+class CompareGrid(QDockWidget):
+    """
+    Dock widget showing a grid of map canvases, each one bound to
+    its own layer set or map theme. Canvases are created and removed
+    to match the given cells, existing ones are reused.
+    """
+
+    def __init__(self, main_canvas: QgsMapCanvas, parent: Optional[QWidget] = None):
+        super().__init__(grid_widget_name, parent)
+        self.setObjectName(grid_widget_name)
+        self.main_canvas = main_canvas
+        self.canvases = []
+        self._cell_widgets = []
+
+        container = QWidget(self)
+        layout = QVBoxLayout(container)
+        self._grid_layout = QGridLayout()
+        self._grid_layout.setSpacing(2)
+        layout.addLayout(self._grid_layout, 1)
+        self.label_render_time = QLabel(container)
+        layout.addWidget(self.label_render_time)
+        self.setWidget(container)
+
+        # total render time of all canvases for each pan or zoom
+        self.render_timer = InteractionRenderTimer()
+        self.render_timer.interactionRendered.connect(self._on_interaction_rendered)
+
+    def set_cells(self, cells: list) -> None:
+        """
+        Show one canvas per cell: a cell is a (title, layers) tuple
+        or a (title, map theme name) tuple
+        """
+        while len(self.canvases) > len(cells):
+            self._remove_last_cell()
+        while len(self.canvases) < len(cells):
+            self._add_cell()
+
+        for (title, content), canvas, cell_widget in zip(
+            cells, self.canvases, self._cell_widgets
+        ):
+            cell_widget.findChild(QLabel).setText(title)
+            self._bind_canvas(canvas, content)
+
+        self._layout_cells()
+
+    def clear(self) -> None:
+        while self.canvases:
+            self._remove_last_cell()
+        self.render_timer.detach_all()
+
+    def _bind_canvas(self, canvas: QgsMapCanvas, content: Union[list, str]) -> None:
+        canvas.setDestinationCrs(self.main_canvas.mapSettings().destinationCrs())
+        canvas.setCanvasColor(self.main_canvas.canvasColor())
+        if isinstance(content, str):
+            canvas.setTheme(content)
+        else:
+            canvas.setTheme("")
+            canvas.setLayers(content)
+        canvas.refresh()
+
+    def _add_cell(self) -> None:
+        cell_widget = QWidget(self.widget())
+        cell_layout = QVBoxLayout(cell_widget)
+        cell_layout.setContentsMargins(0, 0, 0, 0)
+        cell_layout.addWidget(QLabel(cell_widget))
+        canvas = QgsMapCanvas(cell_widget)
+        canvas.setCachingEnabled(True)
+        canvas.setParallelRenderingEnabled(True)
+        cell_layout.addWidget(canvas, 1)
+
+        self.render_timer.attach(canvas)
+        self.canvases.append(canvas)
+        self._cell_widgets.append(cell_widget)
+
+    def _remove_last_cell(self) -> None:
+        canvas = self.canvases.pop()
+        cell_widget = self._cell_widgets.pop()
+        self.render_timer.detach(canvas)
+        canvas.stopRendering()
+        self._grid_layout.removeWidget(cell_widget)
+        cell_widget.deleteLater()
+
+    def _layout_cells(self) -> None:
+        """Arrange cells in a grid as square as possible"""
+        column_count = max(1, math.ceil(math.sqrt(len(self._cell_widgets))))
+        for i, cell_widget in enumerate(self._cell_widgets):
+            self._grid_layout.removeWidget(cell_widget)
+            self._grid_layout.addWidget(
+                cell_widget, i // column_count, i % column_count
+            )
+
+    def _on_interaction_rendered(self, render_time: float) -> None:
+        self.label_render_time.setText(
+            f"{len(self.canvases)} maps rendered in {render_time:.0f} ms"
+        )
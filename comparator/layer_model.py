@@ -0,0 +1,713 @@
+import re
+from bisect import bisect_left
+from typing import Optional
+
+from qgis.core import (
+    QgsApplication,
+    QgsGroupLayer,
+    QgsLayerTree,
+    QgsLayerTreeGroup,
+    QgsLayerTreeLayer,
+    QgsLayerTreeNode,
+    QgsMapLayer,
+    QgsMapLayerModel,
+    QgsProject,
+)
+from qgis.PyQt import sip
+from qgis.PyQt.QtCore import QAbstractItemModel, QModelIndex, Qt, pyqtSignal
+from qgis.PyQt.QtGui import QIcon
+
+from .constants import (
+    compare_background_layer_name,
+    compare_geographic_mask_layer_name,
+    compare_group_name,
+    compare_mask_layer_name,
+)
+from .layer_tree import LayerTreeConnectionRegistry, node_key
+
+# id of the layer of a row, empty for groups
+LAYER_ID_ROLE = Qt.ItemDataRole.UserRole
+
+# greater than any character: word + _MAX_CHAR sorts after words starting with word
+_MAX_CHAR = chr(0x10FFFF)
+
+HELPER_LAYER_NAMES = [
+    compare_mask_layer_name,
+    compare_geographic_mask_layer_name,
+    compare_background_layer_name,
+]
+
+
+def name_words(name: str) -> list:
+    """Lower case words of a name, split on spaces, punctuation and '_'"""
+    return re.findall(r"[^\W_]+", name.lower())
+
+
+class LayerNameIndex:
+    """
+    Layer names searchable by word prefixes: 'roa 20' finds 'OSM roads 2020'.
+    Words of all names are kept sorted with the rank of their name in name
+    order: the matches of a query word are one range found by two binary
+    searches, and results are ordered by sorting ranks.
+    The index is built again at the first search after names changed.
+    """
+
+    def __init__(self):
+        # layer id -> (lower case name, words)
+        self._names = {}
+        self._is_stale = False
+        # layer ids by name order
+        self._order = []
+        # words of the name of each rank, each word after a space
+        self._rank_words = []
+        # words of all names sorted, and the rank of their name
+        self._words = []
+        self._word_ranks = []
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def build(self, names: dict) -> None:
+        """Index {layer id: name} at once"""
+        self._names = {
+            layer_id: (name.lower(), name_words(name))
+            for layer_id, name in names.items()
+        }
+        self._rebuild()
+
+    def add(self, layer_id: str, name: str) -> None:
+        self._names[layer_id] = (name.lower(), name_words(name))
+        self._is_stale = True
+
+    def remove(self, layer_id: str) -> None:
+        if self._names.pop(layer_id, None) is not None:
+            self._is_stale = True
+
+    def search(self, text: str) -> list:
+        """Ids of layers with a word starting with each query word, by name"""
+        query_words = set(name_words(text))
+        if not query_words:
+            return []
+        if self._is_stale:
+            self._rebuild()
+
+        ranges = []
+        for query_word in query_words:
+            start = bisect_left(self._words, query_word)
+            end = bisect_left(self._words, query_word + _MAX_CHAR, start)
+            if start == end:
+                return []
+            ranges.append((end - start, query_word, start, end))
+        # smallest range first: fewest candidates
+        ranges.sort()
+        _, _, start, end = ranges[0]
+        ranks = set(self._word_ranks[start:end])
+        for size, query_word, start, end in ranges[1:]:
+            if len(ranks) * 8 < size:
+                # few candidates: look for the word in their names
+                word_start = " " + query_word
+                ranks = {rank for rank in ranks if word_start in self._rank_words[rank]}
+            else:
+                ranks.intersection_update(self._word_ranks[start:end])
+            if not ranks:
+                return []
+        return [self._order[rank] for rank in sorted(ranks)]
+
+    def _rebuild(self) -> None:
+        self._order = sorted(
+            self._names, key=lambda layer_id: (self._names[layer_id][0], layer_id)
+        )
+        self._rank_words = [
+            " " + " ".join(self._names[layer_id][1]) for layer_id in self._order
+        ]
+        entries = sorted(
+            (word, rank)
+            for rank, layer_id in enumerate(self._order)
+            for word in set(self._names[layer_id][1])
+        )
+        self._words = [word for word, _ in entries]
+        self._word_ranks = [rank for _, rank in entries]
+        self._is_stale = False
+
+
+class LayerTreeItem:
+    """Row of a layer tree node, its child rows are made when first fetched"""
+
+    __slots__ = ("node", "parent", "row", "children", "is_fetched")
+
+    def __init__(self, node: QgsLayerTreeNode, parent, row: int):
+        self.node = node
+        self.parent = parent
+        self.row = row
+        self.children = []
+        self.is_fetched = False
+
+
+def _cast_node(node: QgsLayerTreeNode) -> QgsLayerTreeNode:
+    if QgsLayerTree.isGroup(node) and not isinstance(node, QgsLayerTreeGroup):
+        return sip.cast(node, QgsLayerTreeGroup)
+    if QgsLayerTree.isLayer(node) and not isinstance(node, QgsLayerTreeLayer):
+        return sip.cast(node, QgsLayerTreeLayer)
+    return node
+
+
+def is_listed_node(node: QgsLayerTreeNode) -> bool:
+    """Groups except compare group, and layers with geometry"""
+    if QgsLayerTree.isGroup(node):
+        return node.name() != compare_group_name
+    if QgsLayerTree.isLayer(node):
+        layer = node.layer()
+        # exclude no geometry layers such as CSV files
+        return layer is not None and layer.isSpatial()
+    return False
+
+
+def _is_in_compare_group(node: QgsLayerTreeNode) -> bool:
+    while node is not None:
+        if QgsLayerTree.isGroup(node) and node.name() == compare_group_name:
+            return True
+        node = node.parent()
+    return False
+
+
+def is_listed_layer(layer: QgsMapLayer) -> bool:
+    """Layers which can be compared, without compare helper layers"""
+    return (
+        layer.isSpatial()
+        and not isinstance(layer, QgsGroupLayer)
+        and layer.name() not in HELPER_LAYER_NAMES
+    )
+
+
+def layer_tree_positions(root: QgsLayerTreeGroup) -> dict:
+    """Position of layers from top of the layer tree, without compare group"""
+    layer_ids = []
+    for node in map(_cast_node, root.children()):
+        if QgsLayerTree.isGroup(node):
+            if node.name() != compare_group_name:
+                layer_ids.extend(node.findLayerIds())
+        elif QgsLayerTree.isLayer(node):
+            layer_ids.append(node.layerId())
+    positions = {}
+    for position, layer_id in enumerate(layer_ids):
+        # a layer shown twice is at its top position
+        positions.setdefault(layer_id, position)
+    return positions
+
+
+class CheckedLayerSet:
+    """
+    Ids of checked layers, ordered from top to bottom of the layer tree.
+    Layer tree positions are read once after a layer tree change, then
+    checking or unchecking a layer is a binary insertion or deletion in
+    the ordered layers, so reading them does not walk the layer tree.
+    """
+
+    def __init__(self, root: QgsLayerTreeGroup):
+        self.root = root
+        self._ids = set()
+        # layer id -> position in layer tree, None after a layer tree change
+        self._positions: Optional[dict] = None
+        # (position, layer id) of checked layers in layer tree, sorted,
+        # and their layers at the same index
+        self._keys = []
+        self._layers = []
+
+    def __contains__(self, layer_id: str) -> bool:
+        return layer_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, layer_ids: list) -> list:
+        """Check layers, return the ids which were not checked"""
+        added = [i for i in dict.fromkeys(layer_ids) if i not in self._ids]
+        self._ids.update(added)
+        if self._positions is not None:
+            project = QgsProject.instance()
+            for layer_id in added:
+                position = self._positions.get(layer_id)
+                layer = project.mapLayer(layer_id)
+                if position is None or layer is None:
+                    continue
+                index = bisect_left(self._keys, (position, layer_id))
+                self._keys.insert(index, (position, layer_id))
+                self._layers.insert(index, layer)
+        return added
+
+    def discard(self, layer_ids: list) -> list:
+        """Uncheck layers, return the ids which were checked"""
+        removed = [i for i in dict.fromkeys(layer_ids) if i in self._ids]
+        self._ids.difference_update(removed)
+        if self._positions is not None:
+            for layer_id in removed:
+                key = (self._positions.get(layer_id), layer_id)
+                if key[0] is None:
+                    continue
+                index = bisect_left(self._keys, key)
+                if index < len(self._keys) and self._keys[index] == key:
+                    del self._keys[index]
+                    del self._layers[index]
+        return removed
+
+    def replace(self, layer_ids) -> None:
+        """Check only input layers"""
+        self._ids = set(layer_ids)
+        self.invalidate_order()
+
+    def invalidate_order(self) -> None:
+        """Layer tree changed: read positions again at next read"""
+        self._positions = None
+        self._keys = []
+        self._layers = []
+
+    def layer_ids(self) -> list:
+        """Ids of checked layers in the layer tree, from top to bottom"""
+        self._update_order()
+        return [layer_id for _, layer_id in self._keys]
+
+    def layers(self) -> list:
+        """Checked layers in the layer tree, from top to bottom"""
+        self._update_order()
+        return list(self._layers)
+
+    def _update_order(self) -> None:
+        if self._positions is not None:
+            return
+        positions = layer_tree_positions(self.root)
+        self._positions = positions
+        project = QgsProject.instance()
+        self._keys = []
+        self._layers = []
+        for key in sorted(
+            (positions[layer_id], layer_id)
+            for layer_id in self._ids
+            if layer_id in positions
+        ):
+            layer = project.mapLayer(key[1])
+            if layer is not None:
+                self._keys.append(key)
+                self._layers.append(layer)
+
+
+class CompareLayerModel(QAbstractItemModel):
+    """
+    Checkable layers and groups of a QGIS layer tree, without compare group.
+    Rows are made lazily: top level rows first, then the children of a group
+    when it is expanded (fetchMore). Layer tree changes only add, remove
+    or rename the rows of fetched nodes.
+    Check states are kept by layer id in a CheckedLayerSet, so that they
+    don't depend on rows: a group is checked when all its layers are checked.
+    Layers of a painted group and its checked count are kept until the layer
+    tree changes, the count follows check changes.
+    With a filter text, rows are the project layers matching it by name,
+    as a flat list, searched again when layers are added or renamed.
+    """
+
+    # check state of layers changed, by the user or by layer tree changes
+    checkedLayersChanged = pyqtSignal()
+
+    def __init__(self, root: QgsLayerTreeGroup, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self._root_item = LayerTreeItem(root, None, 0)
+        # fetched rows, key is the node address
+        self._items = {}
+        self._checked = CheckedLayerSet(root)
+        # group node key -> ids of listed layers and count of checked ones,
+        # for groups painted since the last layer tree change
+        self._group_layer_ids = {}
+        self._group_checked_counts = {}
+        self._group_icon = QIcon(QgsApplication.iconPath("mActionFolder.svg"))
+
+        # filter rows: ids of matching layers, None without filter
+        self.filter_text = ""
+        self._results: Optional[list] = None
+        self.name_index = LayerNameIndex()
+
+        # rename signal of fetched nodes, connected once per node
+        self._node_connections = LayerTreeConnectionRegistry(self._on_name_changed)
+        root.addedChildren.connect(self._on_added_children)
+        root.willRemoveChildren.connect(self._on_will_remove_children)
+
+        project = QgsProject.instance()
+        project.layersAdded.connect(self._on_layers_added)
+        project.layersWillBeRemoved.connect(self._on_layers_will_be_removed)
+        self._index_layers()
+
+    def index(self, row: int, column: int, parent=None) -> QModelIndex:
+        if parent is None:
+            parent = QModelIndex()
+        if column != 0 or row < 0:
+            return QModelIndex()
+        if self._results is not None:
+            if parent.isValid() or row >= len(self._results):
+                return QModelIndex()
+            return self.createIndex(row, column)
+        parent_item = self._item(parent)
+        if row >= len(parent_item.children):
+            return QModelIndex()
+        return self.createIndex(row, column, parent_item.children[row])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        if not index.isValid() or self._results is not None:
+            return QModelIndex()
+        parent_item = index.internalPointer().parent
+        if parent_item is self._root_item:
+            return QModelIndex()
+        return self.createIndex(parent_item.row, 0, parent_item)
+
+    def rowCount(self, parent=None) -> int:
+        if parent is None:
+            parent = QModelIndex()
+        if self._results is not None:
+            return 0 if parent.isValid() else len(self._results)
+        if parent.column() > 0:
+            return 0
+        return len(self._item(parent).children)
+
+    def columnCount(self, parent=None) -> int:
+        return 1
+
+    def hasChildren(self, parent=None) -> bool:
+        if parent is None:
+            parent = QModelIndex()
+        if self._results is not None:
+            return not parent.isValid() and bool(self._results)
+        item = self._item(parent)
+        if item.is_fetched:
+            return bool(item.children)
+        return QgsLayerTree.isGroup(item.node) and bool(item.node.children())
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        if self._results is not None:
+            return False
+        item = self._item(parent)
+        return not item.is_fetched and QgsLayerTree.isGroup(item.node)
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        item = self._item(parent)
+        if item.is_fetched:
+            return
+        item.is_fetched = True
+        nodes = [
+            node
+            for node in map(_cast_node, item.node.children())
+            if is_listed_node(node)
+        ]
+        if not nodes:
+            return
+        self.beginInsertRows(parent, 0, len(nodes) - 1)
+        for row, node in enumerate(nodes):
+            self._add_item(node, item, row)
+        self.endInsertRows()
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return (
+            Qt.ItemFlag.ItemIsEnabled
+            | Qt.ItemFlag.ItemIsSelectable
+            | Qt.ItemFlag.ItemIsUserCheckable
+        )
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if self._results is not None:
+            layer = QgsProject.instance().mapLayer(self._results[index.row()])
+            node = None
+        else:
+            node = index.internalPointer().node
+            layer = node.layer() if QgsLayerTree.isLayer(node) else None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if node is not None:
+                return node.name()
+            return layer.name() if layer is not None else ""
+        if role == Qt.ItemDataRole.DecorationRole:
+            if layer is None:
+                return self._group_icon if node is not None else None
+            return QgsMapLayerModel.iconForLayer(layer)
+        if role == Qt.ItemDataRole.CheckStateRole:
+            if layer is not None:
+                return self._layer_check_state(layer.id())
+            if node is not None:
+                return self._group_check_state(node)
+            return Qt.CheckState.Unchecked
+        if role == LAYER_ID_ROLE:
+            return layer.id() if layer is not None else ""
+        return None
+
+    def setData(self, index: QModelIndex, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.CheckStateRole:
+            return False
+        checked = Qt.CheckState(value) == Qt.CheckState.Checked
+        if self._results is not None:
+            layer_ids = [self._results[index.row()]]
+        else:
+            layer_ids = self._listed_layer_ids(index.internalPointer().node)
+        self.set_layers_checked(layer_ids, checked)
+        return True
+
+    def set_layers_checked(self, layer_ids: list, checked: bool) -> None:
+        if checked:
+            changed = self._checked.add(layer_ids)
+        else:
+            changed = self._checked.discard(layer_ids)
+        if not changed:
+            return
+        changed = set(changed)
+        for key, group_layer_ids in self._group_layer_ids.items():
+            count = len(changed & group_layer_ids)
+            self._group_checked_counts[key] += count if checked else -count
+        self._emit_check_states_changed()
+        self.checkedLayersChanged.emit()
+
+    def checked_layers(self) -> list:
+        """Checked layers, from top to bottom of the layer tree"""
+        return self._checked.layers()
+
+    def checked_layer_ids(self) -> list:
+        """Ids of checked layers, from top to bottom of the layer tree"""
+        return self._checked.layer_ids()
+
+    def _layer_check_state(self, layer_id: str):
+        if layer_id in self._checked:
+            return Qt.CheckState.Checked
+        return Qt.CheckState.Unchecked
+
+    def _group_check_state(self, group: QgsLayerTreeGroup):
+        key = node_key(group)
+        layer_ids = self._group_layer_ids.get(key)
+        if layer_ids is None:
+            layer_ids = set(self._listed_layer_ids(group))
+            self._group_layer_ids[key] = layer_ids
+            self._group_checked_counts[key] = sum(
+                1 for i in layer_ids if i in self._checked
+            )
+        checked_count = self._group_checked_counts[key]
+        if checked_count == 0:
+            return Qt.CheckState.Unchecked
+        if checked_count == len(layer_ids):
+            return Qt.CheckState.Checked
+        return Qt.CheckState.PartiallyChecked
+
+    def _forget_group_layers(self) -> None:
+        """Layers of groups changed: count them again at next paint"""
+        self._group_layer_ids = {}
+        self._group_checked_counts = {}
+
+    def _listed_layer_ids(self, node: QgsLayerTreeNode) -> list:
+        """Ids of the listed layers of a node and of its descendants"""
+        if QgsLayerTree.isLayer(node):
+            return [node.layerId()]
+        project = QgsProject.instance()
+        layer_ids = []
+        for layer_id in node.findLayerIds():
+            layer = project.mapLayer(layer_id)
+            if layer is not None and layer.isSpatial():
+                layer_ids.append(layer_id)
+        return layer_ids
+
+    def _emit_check_states_changed(self) -> None:
+        """Check state of any row may change: repaint all rows"""
+        if self._results is not None:
+            rows = [(QModelIndex(), len(self._results))]
+        else:
+            rows = [
+                (self._index_of(item), len(item.children))
+                for item in [self._root_item, *self._items.values()]
+                if item.children
+            ]
+        for parent, row_count in rows:
+            self.dataChanged.emit(
+                self.index(0, 0, parent),
+                self.index(row_count - 1, 0, parent),
+                [Qt.ItemDataRole.CheckStateRole],
+            )
+
+    def set_filter(self, text: str) -> None:
+        """Show layers matching text as a flat list, the layer tree without text"""
+        self.filter_text = text.strip()
+        self.beginResetModel()
+        if self.filter_text:
+            self._results = self.name_index.search(self.filter_text)
+        else:
+            self._results = None
+        self.endResetModel()
+
+    def _refresh_filter(self) -> None:
+        """Search the filter text again, reset rows only if results changed"""
+        if self._results is None:
+            return
+        if self.name_index.search(self.filter_text) != self._results:
+            self.set_filter(self.filter_text)
+
+    def _index_layers(self) -> None:
+        layers = QgsProject.instance().mapLayers().values()
+        self.name_index.build(
+            {layer.id(): layer.name() for layer in layers if is_listed_layer(layer)}
+        )
+        for layer in layers:
+            layer.nameChanged.connect(self._on_layer_renamed)
+
+    def _on_layers_added(self, layers: list) -> None:
+        for layer in layers:
+            layer.nameChanged.connect(self._on_layer_renamed)
+            if is_listed_layer(layer):
+                self.name_index.add(layer.id(), layer.name())
+        self._refresh_filter()
+
+    def _on_layers_will_be_removed(self, layer_ids: list) -> None:
+        for layer_id in layer_ids:
+            self.name_index.remove(layer_id)
+        self._forget_group_layers()
+        self._refresh_filter()
+
+    def _on_layer_renamed(self) -> None:
+        layer = self.sender()
+        if is_listed_layer(layer):
+            self.name_index.add(layer.id(), layer.name())
+        else:
+            self.name_index.remove(layer.id())
+        self._refresh_filter()
+
+    def reset(self, checked_layer_ids: Optional[list] = None) -> None:
+        """Make rows again from the layer tree, top level rows only"""
+        self.beginResetModel()
+        self._node_connections.disconnect_all()
+        self._root_item = LayerTreeItem(self.root, None, 0)
+        self._items = {}
+        self._forget_group_layers()
+        if checked_layer_ids is not None:
+            self._checked.replace(checked_layer_ids)
+        else:
+            self._checked.invalidate_order()
+        self.endResetModel()
+        if self._results is None:
+            self.fetchMore(QModelIndex())
+
+    def _item(self, index: QModelIndex) -> LayerTreeItem:
+        if not index.isValid():
+            return self._root_item
+        return index.internalPointer()
+
+    def _index_of(self, item: LayerTreeItem) -> QModelIndex:
+        if item is self._root_item:
+            return QModelIndex()
+        return self.createIndex(item.row, 0, item)
+
+    def _add_item(self, node: QgsLayerTreeNode, parent_item, row: int) -> None:
+        item = LayerTreeItem(node, parent_item, row)
+        parent_item.children.insert(row, item)
+        self._items[node_key(node)] = item
+        self._node_connections.connect(node)
+
+    def _renumber(self, parent_item: LayerTreeItem, from_row: int) -> None:
+        for row in range(from_row, len(parent_item.children)):
+            parent_item.children[row].row = row
+
+    def _fetched_parent_item(self, parent_node) -> Optional[LayerTreeItem]:
+        if node_key(parent_node) == node_key(self.root):
+            item = self._root_item
+        else:
+            item = self._items.get(node_key(parent_node))
+        if item is None or not item.is_fetched:
+            return None
+        return item
+
+    def _on_added_children(self, parent_node, index_from: int, index_to: int) -> None:
+        """Add rows of layer tree nodes added under a fetched node"""
+        if _is_in_compare_group(parent_node):
+            return
+        nodes = [
+            node
+            for node in map(
+                _cast_node, parent_node.children()[index_from : index_to + 1]
+            )
+            if is_listed_node(node)
+        ]
+        if not nodes:
+            return
+        # layers may have moved in the layer tree
+        self._checked.invalidate_order()
+        self._forget_group_layers()
+        # added layers may match the filter text
+        self._refresh_filter()
+        parent_item = self._fetched_parent_item(parent_node)
+        if parent_item is None:
+            return
+        # row: count listed siblings before first added node
+        row = sum(
+            1
+            for sibling in parent_node.children()[:index_from]
+            if node_key(sibling) in self._items
+        )
+        # rows of the layer tree are kept up to date while filtered
+        is_shown = self._results is None
+        if is_shown:
+            self.beginInsertRows(self._index_of(parent_item), row, row + len(nodes) - 1)
+        for offset, node in enumerate(nodes):
+            self._add_item(node, parent_item, row + offset)
+        self._renumber(parent_item, row + len(nodes))
+        if is_shown:
+            self.endInsertRows()
+
+    def _on_will_remove_children(
+        self, parent_node, index_from: int, index_to: int
+    ) -> None:
+        """Remove rows of layer tree nodes removed from the project"""
+        if _is_in_compare_group(parent_node):
+            return
+        removed_nodes = [
+            node
+            for node in map(
+                _cast_node, parent_node.children()[index_from : index_to + 1]
+            )
+            if is_listed_node(node)
+        ]
+        if not removed_nodes:
+            return
+        # positions are read again once the nodes are removed
+        self._checked.invalidate_order()
+        self._forget_group_layers()
+        removed_checked_layer = any(
+            layer_id in self._checked
+            for node in removed_nodes
+            for layer_id in self._listed_layer_ids(node)
+        )
+
+        is_shown = self._results is None
+        for node in removed_nodes:
+            item = self._items.get(node_key(node))
+            if item is None:
+                continue
+            parent_item = item.parent
+            if is_shown:
+                self.beginRemoveRows(self._index_of(parent_item), item.row, item.row)
+            del parent_item.children[item.row]
+            self._forget_item(item)
+            self._renumber(parent_item, item.row)
+            if is_shown:
+                self.endRemoveRows()
+
+        if removed_checked_layer:
+            # compare layers may have changed, check state is kept
+            # if the layer is added back (e.g. moved in QGIS layer tree)
+            self.checkedLayersChanged.emit()
+
+    def _forget_item(self, item: LayerTreeItem) -> None:
+        self._items.pop(node_key(item.node), None)
+        self._node_connections.disconnect(item.node)
+        for child in item.children:
+            self._forget_item(child)
+
+    def _on_name_changed(self, node, name: str) -> None:
+        """Repaint row of a renamed layer tree node"""
+        item = self._items.get(node_key(node))
+        if item is None or self._results is not None:
+            # filter rows are repainted by the view
+            return
+        index = self._index_of(item)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
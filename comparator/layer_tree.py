@@ -0,0 +1,60 @@
+from functools import partial
+
+from qgis.core import QgsLayerTreeNode
+from qgis.PyQt import sip
+
+
+def node_key(node: QgsLayerTreeNode) -> int:
+    """Identify a layer tree node whatever its python wrapper"""
+    return sip.unwrapinstance(node)
+
+
+class LayerTreeConnectionRegistry:
+    """
+    Connect nameChanged signal of layer tree nodes to a slot once per node.
+    Nodes already connected are skipped and deleted nodes are dropped,
+    so that connecting a whole tree again costs only dictionary lookups.
+    """
+
+    def __init__(self, slot):
+        self.slot = slot
+        # node key -> node, for connected nodes
+        self._nodes = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: QgsLayerTreeNode) -> bool:
+        return node_key(node) in self._nodes
+
+    def connect(self, node: QgsLayerTreeNode) -> bool:
+        """Connect node if not connected yet, return True if newly connected"""
+        key = node_key(node)
+        if key in self._nodes:
+            return False
+        node.nameChanged.connect(self.slot)
+        # node address may be reused after deletion: forget it on deletion
+        node.destroyed.connect(partial(self._drop, key))
+        self._nodes[key] = node
+        return True
+
+    def disconnect(self, node: QgsLayerTreeNode) -> None:
+        """Disconnect a node if connected, e.g. before it is removed"""
+        node = self._nodes.pop(node_key(node), None)
+        if node is not None:
+            self._disconnect_node(node)
+
+    def disconnect_all(self) -> None:
+        for node in self._nodes.values():
+            self._disconnect_node(node)
+        self._nodes = {}
+
+    def _disconnect_node(self, node: QgsLayerTreeNode) -> None:
+        try:
+            node.nameChanged.disconnect(self.slot)
+        except (TypeError, RuntimeError):
+            # node already deleted
+            pass
+
+    def _drop(self, key: int, *args) -> None:
+        self._nodes.pop(key, None)
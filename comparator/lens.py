@@ -0,0 +1,73 @@
+from typing import Optional
+
+from qgis.core import QgsMapLayer, QgsPointXY
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QObject, QTimer
+
+from .constants import lens_frame_interval_time
+
+
+class LensRepaintEngine(QObject):
+    """
+    Repaint the lens mask layer only when the canvas cursor point changes.
+    Bursts of mouse moves are coalesced into a single repaint per frame,
+    and nothing is rendered while the cursor is idle.
+    """
+
+    def __init__(self, canvas: QgsMapCanvas, mask_layer: QgsMapLayer):
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.mask_layer = mask_layer
+        # moves the precomputed mask geometry, if any
+        self.mask_geometry_engine = None
+
+        # last cursor point rendered and latest cursor point received
+        self._rendered_point: Optional[QgsPointXY] = None
+        self._pending_point: Optional[QgsPointXY] = None
+
+        # single shot timer to coalesce cursor moves into one frame
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.setInterval(lens_frame_interval_time)
+        self._frame_timer.timeout.connect(self._repaint)
+
+        self.is_running = False
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self.canvas.xyCoordinates.connect(self._on_cursor_moved)
+        self.is_running = True
+
+    def stop(self) -> None:
+        if not self.is_running:
+            return
+        self.canvas.xyCoordinates.disconnect(self._on_cursor_moved)
+        self._frame_timer.stop()
+        self._rendered_point = None
+        self._pending_point = None
+        self.is_running = False
+
+    def set_mask_layer(self, mask_layer: QgsMapLayer) -> None:
+        self.mask_layer = mask_layer
+
+    def set_mask_geometry_engine(self, mask_geometry_engine) -> None:
+        self.mask_geometry_engine = mask_geometry_engine
+
+    def _on_cursor_moved(self, point: QgsPointXY) -> None:
+        self._pending_point = QgsPointXY(point)
+        # a frame is already scheduled: it will pick up the latest point
+        if not self._frame_timer.isActive():
+            self._frame_timer.start()
+
+    def _repaint(self) -> None:
+        if self._pending_point is None or self._pending_point == self._rendered_point:
+            return
+        self._rendered_point = self._pending_point
+        if self.mask_geometry_engine is not None:
+            # mask geometry is moved to the cursor, then repainted
+            self.mask_geometry_engine.set_cursor_point(self._rendered_point)
+            return
+        # @canvas_cursor_point is evaluated at render time,
+        # so a repaint of the mask is enough to move the lens
+        self.mask_layer.triggerRepaint()
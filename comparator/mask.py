@@ -0,0 +1,210 @@
+from collections import OrderedDict
+from typing import Optional
+
+from qgis.core import (
+    QgsFeature,
+    QgsGeometry,
+    QgsMapLayer,
+    QgsPointXY,
+    QgsRectangle,
+)
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QObject
+
+from .constants import (
+    lens_circle_segments,
+    lens_default_size_rate,
+    lens_max_size_rate,
+    lens_min_size_rate,
+    mask_geometry_cache_size,
+)
+
+
+def split_mask_geometry(compare_method: str, extent: QgsRectangle) -> QgsGeometry:
+    """Area showing compare layers in split mode: right or bottom half of extent"""
+    center = extent.center()
+    if compare_method == "horizontal":
+        rectangle = QgsRectangle(
+            extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), center.y()
+        )
+    else:
+        rectangle = QgsRectangle(
+            center.x(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()
+        )
+    return QgsGeometry.fromRect(rectangle)
+
+
+def lens_mask_geometry(
+    lens_shape: str,
+    lens_size_rate: float,
+    extent: QgsRectangle,
+    point: Optional[QgsPointXY],
+) -> QgsGeometry:
+    """Area showing compare layers in lens mode: circle or square around point"""
+    if point is None:
+        # no cursor yet: compare layers are hidden
+        return QgsGeometry()
+    rate = max(lens_min_size_rate, min(lens_max_size_rate, lens_size_rate))
+    radius = extent.width() * rate
+    if lens_shape == "square":
+        return QgsGeometry.fromRect(
+            QgsRectangle(
+                point.x() - radius,
+                point.y() - radius,
+                point.x() + radius,
+                point.y() + radius,
+            )
+        )
+    return QgsGeometry.fromPointXY(point).buffer(radius, lens_circle_segments)
+
+
+class MaskGeometryCache:
+    """Least recently used mask geometries, keyed by their parameters"""
+
+    def __init__(self, size: int = mask_geometry_cache_size):
+        self.size = size
+        self._geometries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._geometries)
+
+    def get(self, key: tuple, factory) -> QgsGeometry:
+        geometry = self._geometries.get(key)
+        if geometry is not None:
+            self._geometries.move_to_end(key)
+            return geometry
+        geometry = factory()
+        self._geometries[key] = geometry
+        if len(self._geometries) > self.size:
+            self._geometries.popitem(last=False)
+        return geometry
+
+    def clear(self) -> None:
+        self._geometries.clear()
+
+
+class MaskGeometryEngine(QObject):
+    """
+    Keep the single feature of mask layers matching the area where compare
+    layers are shown. The geometry is computed natively when the extent
+    or the lens cursor changes, instead of a geometry generator expression
+    evaluated on every render.
+    """
+
+    def __init__(self, canvas: QgsMapCanvas):
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.mask_layers = []
+
+        self.compare_method = "vertical"
+        self.lens_shape = "circle"
+        self.lens_size_rate = lens_default_size_rate
+        self.cursor_point: Optional[QgsPointXY] = None
+
+        self.cache = MaskGeometryCache()
+        # geometry parameters written in mask layers
+        self._applied_key = None
+        self.is_running = False
+
+    def set_mask_layers(self, mask_layers: list) -> None:
+        if [layer.id() for layer in mask_layers] != [
+            layer.id() for layer in self.mask_layers
+        ]:
+            self._applied_key = None
+        self.mask_layers = list(mask_layers)
+
+    def configure(
+        self,
+        compare_method: str,
+        lens_shape: str = "circle",
+        lens_size_rate: float = lens_default_size_rate,
+    ) -> None:
+        self.compare_method = compare_method
+        self.lens_shape = lens_shape
+        self.lens_size_rate = lens_size_rate
+        self.update()
+
+    def start(self) -> None:
+        if not self.is_running:
+            self.canvas.extentsChanged.connect(self.update)
+            self.canvas.destinationCrsChanged.connect(self.update)
+            self.is_running = True
+        self.update()
+
+    def stop(self) -> None:
+        if not self.is_running:
+            return
+        self.canvas.extentsChanged.disconnect(self.update)
+        self.canvas.destinationCrsChanged.disconnect(self.update)
+        self.mask_layers = []
+        self._applied_key = None
+        self.cache.clear()
+        self.is_running = False
+
+    def set_cursor_point(self, point: QgsPointXY) -> None:
+        self.cursor_point = QgsPointXY(point)
+        if self.compare_method == "lens":
+            self.update()
+
+    def geometry(self) -> QgsGeometry:
+        """Mask geometry in canvas CRS for the current parameters"""
+        extent = self.canvas.mapSettings().visibleExtent()
+        if self.compare_method == "lens":
+            # built for each cursor point, a cached one would hardly be reused
+            return lens_mask_geometry(
+                self.lens_shape, self.lens_size_rate, extent, self.cursor_point
+            )
+        return self.cache.get(
+            self._split_key(),
+            lambda: split_mask_geometry(self.compare_method, extent),
+        )
+
+    def update(self) -> None:
+        """Write mask geometry in mask layers if its parameters changed"""
+        if not self.is_running or not self.mask_layers:
+            return
+        key = self._geometry_key()
+        if key == self._applied_key:
+            return
+        geometry = self.geometry()
+        for mask_layer in self.mask_layers:
+            self._write_geometry(mask_layer, geometry)
+            mask_layer.triggerRepaint()
+        self._applied_key = key
+
+    def _split_key(self) -> tuple:
+        settings = self.canvas.mapSettings()
+        return (
+            self.compare_method,
+            settings.visibleExtent().toString(12),
+            settings.destinationCrs().authid(),
+        )
+
+    def _geometry_key(self) -> tuple:
+        key = self._split_key()
+        if self.compare_method != "lens":
+            return key
+        point = self.cursor_point
+        return (
+            *key,
+            self.lens_shape,
+            self.lens_size_rate,
+            None if point is None else (point.x(), point.y()),
+        )
+
+    def _write_geometry(self, mask_layer: QgsMapLayer, geometry: QgsGeometry) -> None:
+        # mask layer follows map CRS: the geometry is rendered without
+        # reprojection, straight split edges and round lens in any CRS
+        # (geographic ones included)
+        destination_crs = self.canvas.mapSettings().destinationCrs()
+        if mask_layer.crs() != destination_crs:
+            mask_layer.setCrs(destination_crs)
+
+        provider = mask_layer.dataProvider()
+        feature = next(mask_layer.getFeatures(), None)
+        if feature is None:
+            feature = QgsFeature(mask_layer.fields())
+            feature.setGeometry(geometry)
+            provider.addFeatures([feature])
+        else:
+            provider.changeGeometryValues({feature.id(): geometry})
@@ -0,0 +1,213 @@
+from collections import OrderedDict
+from functools import partial
+
+from qgis.core import (
+    QgsApplication,
+    QgsMapLayer,
+    QgsMapRendererTask,
+    QgsMapSettings,
+    QgsRectangle,
+)
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QObject, QTimer, pyqtSignal
+from qgis.PyQt.QtGui import QImage, QPainter
+
+from .constants import (
+    prefetch_idle_time,
+    prefetch_max_extents,
+    prefetch_memory_budget,
+    prefetch_warmed_extent_count,
+)
+
+# providers fetching data by tiles or blocks, usually over the network
+TILED_PROVIDERS = [
+    "wms",
+    "wcs",
+    "arcgismapserver",
+    "xyzvectortiles",
+    "arcgisvectortileservice",
+    "vectortile",
+]
+
+
+def is_tiled_layer(layer: QgsMapLayer) -> bool:
+    """XYZ, WMS, vector tiles or remote raster (e.g. COG) layer"""
+    provider = layer.providerType()
+    if provider in TILED_PROVIDERS:
+        return True
+    source = layer.source()
+    return provider == "gdal" and (
+        "/vsicurl/" in source or source.startswith(("http://", "https://"))
+    )
+
+
+def neighbour_extents(extent: QgsRectangle) -> list:
+    """
+    Extents the user is likely to see next: the ring of extents around
+    extent, closest to the side ones first, and extent zoomed in once
+    """
+    width = extent.width()
+    height = extent.height()
+    extents = []
+    for dx, dy in [
+        (-1, 0),
+        (1, 0),
+        (0, 1),
+        (0, -1),
+        (-1, 1),
+        (1, 1),
+        (-1, -1),
+        (1, -1),
+    ]:
+        extents.append(
+            QgsRectangle(
+                extent.xMinimum() + dx * width,
+                extent.yMinimum() + dy * height,
+                extent.xMaximum() + dx * width,
+                extent.yMaximum() + dy * height,
+            )
+        )
+    extents.append(extent.scaled(0.5))
+    return extents
+
+
+class ComparePrefetcher(QObject):
+    """
+    Warm provider caches of tiled compare layers (XYZ, WMS, COG...)
+    for the extents around the map while the user is idle.
+    Extents are rendered by background QgsMapRendererTask, under a budget
+    of rendered extents per idle period and of image memory.
+    Prefetch tasks are cancelled as soon as the map moves.
+    """
+
+    # all extents of an idle period are prefetched or cancelled
+    prefetchFinished = pyqtSignal()
+
+    def __init__(self, canvas: QgsMapCanvas):
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.layers = []
+        self.max_extents = prefetch_max_extents
+        self.memory_budget = prefetch_memory_budget
+        # number of extents rendered since start
+        self.prefetch_count = 0
+
+        # task -> (image, painter, key), kept alive until the task ends
+        self._tasks = {}
+        # map settings of extents waiting for the budget
+        self._pending = []
+        # keys of extents already prefetched, least recent first
+        self._warmed = OrderedDict()
+        self.is_running = False
+
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(prefetch_idle_time)
+        self._idle_timer.timeout.connect(self.prefetch)
+
+    def start(self, compare_layers: list) -> None:
+        layers = [layer for layer in compare_layers if is_tiled_layer(layer)]
+        if [layer.id() for layer in layers] != [layer.id() for layer in self.layers]:
+            self.cancel()
+            self._warmed.clear()
+        self.layers = layers
+        if not self.is_running:
+            self.canvas.extentsChanged.connect(self._on_extents_changed)
+            self.is_running = True
+        self._idle_timer.start()
+
+    def stop(self) -> None:
+        if not self.is_running:
+            return
+        self.canvas.extentsChanged.disconnect(self._on_extents_changed)
+        self._idle_timer.stop()
+        self.cancel()
+        self.layers = []
+        self._warmed.clear()
+        self.is_running = False
+
+    def cancel(self) -> None:
+        """Drop waiting extents and cancel running prefetch tasks"""
+        self._pending = []
+        for task in self._tasks:
+            task.cancel()
+
+    def is_idle(self) -> bool:
+        return not self._tasks and not self._pending
+
+    def prefetch(self) -> None:
+        """Render extents around the map which are not prefetched yet"""
+        self._idle_timer.stop()
+        if not self.is_running or not self.layers:
+            return
+        settings = self.canvas.mapSettings()
+        settings.setLayers(self.layers)
+        queued_keys = [key for _, key in self._pending]
+        queued_keys.extend(key for _, _, key in self._tasks.values())
+        for extent in neighbour_extents(settings.extent())[: self.max_extents]:
+            extent_settings = QgsMapSettings(settings)
+            extent_settings.setExtent(extent)
+            key = self._extent_key(extent_settings)
+            if key in self._warmed:
+                self._warmed.move_to_end(key)
+                continue
+            if key in queued_keys:
+                continue
+            self._pending.append((extent_settings, key))
+        self._start_tasks()
+        if self.is_idle():
+            self.prefetchFinished.emit()
+
+    def _extent_key(self, settings: QgsMapSettings) -> tuple:
+        return (
+            settings.extent().toString(12),
+            settings.outputSize().width(),
+            settings.outputSize().height(),
+            settings.destinationCrs().authid(),
+            tuple(layer.id() for layer in self.layers),
+        )
+
+    def _image_bytes(self, settings: QgsMapSettings) -> int:
+        size = settings.deviceOutputSize()
+        return size.width() * size.height() * 4
+
+    def _start_tasks(self) -> None:
+        used_bytes = sum(image.sizeInBytes() for image, _, _ in self._tasks.values())
+        while self._pending:
+            settings, key = self._pending[0]
+            # at least one task runs, whatever its image size
+            if self._tasks and used_bytes + self._image_bytes(settings) > (
+                self.memory_budget
+            ):
+                return
+            self._pending.pop(0)
+
+            image = QImage(settings.deviceOutputSize(), settings.outputImageFormat())
+            image.setDevicePixelRatio(settings.devicePixelRatio())
+            painter = QPainter(image)
+            task = QgsMapRendererTask(settings, painter)
+            task.taskCompleted.connect(partial(self._on_task_finished, task, True))
+            task.taskTerminated.connect(partial(self._on_task_finished, task, False))
+            self._tasks[task] = (image, painter, key)
+            used_bytes += image.sizeInBytes()
+            self.prefetch_count += 1
+            QgsApplication.taskManager().addTask(task)
+
+    def _on_task_finished(self, task: QgsMapRendererTask, completed: bool) -> None:
+        _, painter, key = self._tasks.pop(task)
+        painter.end()
+        if completed:
+            # the image is not used: provider caches are warm now
+            self._warmed[key] = True
+            while len(self._warmed) > prefetch_warmed_extent_count:
+                self._warmed.popitem(last=False)
+        if not self.is_running:
+            return
+        self._start_tasks()
+        if self.is_idle():
+            self.prefetchFinished.emit()
+
+    def _on_extents_changed(self) -> None:
+        # prefetch again once the map stays still
+        self.cancel()
+        self._idle_timer.start()
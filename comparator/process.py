@@ -2,43 +2,49 @@ from qgis.core import (
     Qgis,
     QgsCoordinateTransformContext,
     QgsFillSymbol,
-    QgsGeometryGeneratorSymbolLayer,
     QgsGroupLayer,
     QgsInvertedPolygonRenderer,
     QgsLayerTreeGroup,
     QgsMapLayer,
-    QgsMapThemeCollection,
     QgsProject,
     QgsSingleSymbolRenderer,
-    QgsUnitTypes,
     QgsVectorLayer,
 )
 from qgis.gui import QgsMapCanvas
-from qgis.PyQt.QtCore import QT_VERSION_STR
+from qgis.PyQt.QtCore import QT_VERSION_STR, Qt
 from qgis.PyQt.QtGui import QAction, QPainter
 from qgis.PyQt.QtWidgets import QDockWidget
 from qgis.utils import iface
 
+from .compare_setup import CompareSetup, run_compare_setup
+from .compositor import CompareCompositor
 from .constants import (
-    compare_background_geometry,
     compare_background_layer_name,
+    compare_geographic_mask_layer_name,
     compare_group_name,
     compare_mask_layer_name,
-    get_lens_geometry,
-    horizontal_split_geometry,
+    difference_default_threshold,
+    fade_default_opacity,
     lens_default_size_rate,
     mirror_maptheme_name,
     mirror_widget_name,
-    vertical_split_geometry,
 )
+from .grid import CompareGrid
+from .lens import LensRepaintEngine
+from .mask import MaskGeometryEngine
+from .prefetch import ComparePrefetcher
+from .shared_cache import MirrorSharedRenderCache
+from .statistics import ChangeStatistics
+from .sync import MapSyncEngine
+from .telemetry import RenderCounter, RenderTelemetry
 from .utils import (
     get_map_dockwidgets,
     get_right_dockwidgets,
-    get_visible_layers,
-    is_in_group,
-    make_dynamic,
+    group_layer_ids,
+    map_theme_record,
+    plan_group_layers,
+    reconcile_group_layers_steps,
     set_panel_width,
-    toggle_layers,
 )
 
 QT_VERSION_INT = int(QT_VERSION_STR.split(".")[0])
@@ -46,16 +52,49 @@ QT_VERSION_INT = int(QT_VERSION_STR.split(".")[0])
 if QT_VERSION_INT <= 5:
     dock_widget_floatable = QDockWidget.DockWidgetFloatable
     dock_widget_movable = QDockWidget.DockWidgetMovable
+    right_dock_widget_area = Qt.RightDockWidgetArea
     composition_mode_destination_in = QPainter.CompositionMode_DestinationIn
 else:
     dock_widget_floatable = QDockWidget.DockWidgetFeature.DockWidgetFloatable
     dock_widget_movable = QDockWidget.DockWidgetFeature.DockWidgetMovable
+    right_dock_widget_area = Qt.DockWidgetArea.RightDockWidgetArea
     composition_mode_destination_in = (
         QPainter.CompositionMode.CompositionMode_DestinationIn
     )
 
-# Syncronize flag to avoid recursive map sync and crash
-map_synchronizing = False
+# Extent synchronization of main map and mirror map, created on first mirror compare
+map_sync_engine = None
+
+# Main map layer images reused by mirror map, created on each mirror compare
+mirror_shared_cache = None
+
+# Grid of synchronized maps, created on each grid compare
+compare_grid = None
+
+# Mask layers geometry, created on first split or lens compare
+mask_geometry_engine = None
+
+# Lens repaint engine, created on first lens compare
+lens_engine = None
+
+# Cached compositing engine, created on first compositing compare
+compositor = None
+
+# Prefetch of tiled compare layers around the map, opt-in
+prefetch_enabled = False
+prefetcher = None
+
+# Split, lens and mirror setup run in background and by batches
+compare_setup = CompareSetup()
+
+# Count renders triggered by each compare mode
+render_counter = RenderCounter()
+
+# Change statistics of compare layers in current extent, shown in the panel
+change_statistics = ChangeStatistics()
+
+# Render samples of main map, mirror and grid maps and compositing renderers
+render_telemetry = RenderTelemetry()
 
 
 def compare_with_mask(
@@ -63,6 +102,7 @@ def compare_with_mask(
     compare_method: str,
     lens_shape: str = "circle",
     lens_size_rate: float = lens_default_size_rate,
+    asynchronous: bool = False,
 ) -> None:
     """
     Make QGIS Map to be in compare mode with mask layer group method
@@ -70,74 +110,28 @@ def compare_with_mask(
     input:
     - compare layers (a list of QgsMapLayer)
     - compare_method: 'vertical' 'horizontal' or 'lens'
+    - asynchronous: compare layer group is updated by compare_setup,
+      without blocking QGIS, instead of at once
     """
     project = QgsProject.instance()
 
-    compare_layer_group, compare_mask_layer = _create_compare_layer_group_and_mask(
-        compare_method
-    )
-
-    # reinitialize compare_layer_group
-    # remove layers except mask one
-    for child in list(compare_layer_group.children()):
-        if child.name() == compare_mask_layer_name:
-            continue
-        compare_layer_group.removeChildNode(child)
-
-    # Add target compare layers to layer group
-    for layer in compare_layers:
-        # Add layer to compare group if not existing
-        if not is_in_group(layer, compare_layer_group):
-            compare_layer_group.addLayer(layer)
+    # Masking layer group replaces cached compositing if running
+    stop_compare_with_compositor()
 
-    # Add white polygon layer for background
-    background_layer = QgsVectorLayer(
-        "Polygon?crs=EPSG:3857", compare_background_layer_name, "memory"
-    )
-    project.addMapLayer(background_layer, False)
-    compare_layer_group.addLayer(background_layer)
-    # symbolize with rectangle of map extent (geometry generator)
-    background_geometry_generator = QgsGeometryGeneratorSymbolLayer.create(
-        {
-            "geometryModifier": compare_background_geometry,
-            "geometry_type": 2,  # Polygon
-            "extent": "",
-            "color": "white",
-            "outline_style": "no",
-        }
-    )
-    background_layer_symbol = QgsFillSymbol.createSimple({})
-    background_layer_symbol.changeSymbolLayer(0, background_geometry_generator)
-    background_renderer = QgsInvertedPolygonRenderer(
-        QgsSingleSymbolRenderer(background_layer_symbol)
-    )
-    background_layer.setRenderer(background_renderer)
-    background_layer.triggerRepaint()
+    render_counter.attach(iface.mapCanvas())
+    render_telemetry.attach(iface.mapCanvas(), "main map")
+    render_counter.set_mode(compare_method)
+    render_telemetry.set_mode(compare_method)
 
-    # Symbolize mask layer with geometry generator
-    # Orientation Fallback is vertical
-    geometry_formula = vertical_split_geometry
-    if compare_method == "horizontal":
-        geometry_formula = horizontal_split_geometry
-    if compare_method == "lens":
-        geometry_formula = get_lens_geometry(lens_shape, lens_size_rate)
-
-    geometry_generator = QgsGeometryGeneratorSymbolLayer.create(
-        {
-            "geometryModifier": geometry_formula,
-            "geometry_type": 2,  # Polygon
-            "extent": "",
-            "color": "white",
-            "outline_style": "no",
-        }
-    )
+    compare_layer_group, compare_mask_layer = _create_compare_layer_group_and_mask()
 
-    symbol = QgsFillSymbol.createSimple({})
-    symbol.changeSymbolLayer(0, geometry_generator)
+    # White polygon layer for background, created once and reused
+    background_layer = _get_or_create_background_layer()
 
-    #  Create the inverted polygon renderer
-    inverted_renderer = QgsInvertedPolygonRenderer(QgsSingleSymbolRenderer(symbol))
-    compare_mask_layer.setRenderer(inverted_renderer)
+    # Symbolize mask layer: white fill of its single feature,
+    # whose geometry is the area showing compare layers
+    symbol = QgsFillSymbol.createSimple({"color": "white", "outline_style": "no"})
+    compare_mask_layer.setRenderer(QgsSingleSymbolRenderer(symbol))
 
     # Change mask layer blend mode to fit with 'Invert Mask Below'
     compare_mask_layer.setBlendMode(composition_mode_destination_in)
@@ -145,23 +139,239 @@ def compare_with_mask(
     # update compare mask layer rendering
     compare_mask_layer.triggerRepaint()
 
-    # Duplicate Mask layer in case of project CRS NOT in meter units to avoid square rendering
-    if project.crs().mapUnits() != QgsUnitTypes.DistanceMeters:
-        duplicate_mask_layer = compare_mask_layer.clone()
-        duplicate_mask_layer.setName(compare_mask_layer.name() + "_geographic")
-        project.addMapLayer(duplicate_mask_layer, False)
-        compare_layer_group.insertLayer(0, duplicate_mask_layer)
+    # Compare group content from top to bottom: mask, compare layers, background
+    group_layers = [compare_mask_layer, *compare_layers, background_layer]
+
+    # Mask geometry is computed in map CRS, whatever its units:
+    # remove geographic duplicate mask left by former versions
+    duplicate_mask_layers = project.mapLayersByName(compare_geographic_mask_layer_name)
+    if duplicate_mask_layers:
+        project.removeMapLayers([layer.id() for layer in duplicate_mask_layers])
+
+    # Only add, remove or move layers which changed since last compare
+    # so that kept layers stay in place with their render cache
+    target_ids = [layer.id() for layer in group_layers]
+    compare_layer_ids = [layer.id() for layer in compare_layers]
+
+    def commit(plan: tuple):
+        yield from reconcile_group_layers_steps(compare_layer_group, target_ids, plan)
+        _start_mask_engines(
+            compare_mask_layer, compare_method, lens_shape, lens_size_rate
+        )
+        _start_prefetch(_project_layers(compare_layer_ids))
+
+    _run_setup(
+        plan_group_layers,
+        (group_layer_ids(compare_layer_group), target_ids),
+        commit,
+        asynchronous,
+    )
 
     return
 
 
-def _create_compare_layer_group_and_mask(
+def _start_mask_engines(
+    mask_layer: QgsMapLayer,
     compare_method: str,
-) -> tuple[QgsLayerTreeGroup, QgsMapLayer]:
+    lens_shape: str,
+    lens_size_rate: float,
+) -> None:
+    global mask_geometry_engine
+
+    # Mask geometry follows extent (and lens cursor)
+    if mask_geometry_engine is None:
+        mask_geometry_engine = MaskGeometryEngine(iface.mapCanvas())
+    mask_geometry_engine.set_mask_layers([mask_layer])
+    mask_geometry_engine.configure(compare_method, lens_shape, lens_size_rate)
+    mask_geometry_engine.start()
+
+    # Repaint lens only when cursor moves
+    if compare_method == "lens":
+        _start_lens_engine(mask_layer)
+    else:
+        _stop_lens_engine()
+
+
+def _run_setup(prepare, args: tuple, commit, asynchronous: bool) -> None:
+    """Run compare setup at once, or in background replacing the running one"""
+    if asynchronous:
+        compare_setup.start(prepare, args, commit)
+    else:
+        compare_setup.cancel()
+        run_compare_setup(prepare, args, commit)
+
+
+def _project_layers(layer_ids: list) -> list:
+    """Layers of ids, except the ones removed from the project meanwhile"""
+    project = QgsProject.instance()
+    layers = [project.mapLayer(layer_id) for layer_id in layer_ids]
+    return [layer for layer in layers if layer is not None]
+
+
+def _start_lens_engine(mask_layer: QgsMapLayer) -> None:
+    global lens_engine
+    if lens_engine is None:
+        lens_engine = LensRepaintEngine(iface.mapCanvas(), mask_layer)
+    lens_engine.set_mask_layer(mask_layer)
+    lens_engine.set_mask_geometry_engine(mask_geometry_engine)
+    lens_engine.start()
+
+
+def _stop_lens_engine() -> None:
+    if lens_engine is not None:
+        lens_engine.stop()
+
+
+def compare_with_compositor(
+    compare_layers: list,
+    compare_method: str,
+    lens_shape: str = "circle",
+    lens_size_rate: float = lens_default_size_rate,
+    lens_zoom: float = 1,
+    difference_threshold: int = difference_default_threshold,
+    fade_opacity: float = fade_default_opacity,
+) -> None:
+    """
+    Make QGIS Map to be in compare mode by compositing cached renders
+    of base layers and input compare layers on a canvas overlay
+    input:
+    - compare layers (a list of QgsMapLayer)
+    - compare_method: 'vertical' 'horizontal' 'lens' 'difference' or 'fade'
+    - lens_zoom: compare layers are magnified in the lens when above 1
+    - difference_threshold: 0 shows pixel difference, above 0 changed pixels
+    - fade_opacity: opacity of compare layers over base layers in fade mode
+    """
+    global compositor
+
+    # Cached compositing replaces masking layer group if existing
+    stop_compare_with_mask()
+
+    if compositor is None:
+        compositor = CompareCompositor(iface.mapCanvas())
+        render_counter.attach(compositor.base_renderer)
+        render_counter.attach(compositor.compare_renderer)
+        render_telemetry.attach(compositor.base_renderer, "compositing base layers")
+        render_telemetry.attach(
+            compositor.compare_renderer, "compositing compare layers"
+        )
+        render_counter.attach(compositor.magnifier_renderer)
+        render_telemetry.attach(compositor.magnifier_renderer, "magnifier lens")
+    render_counter.set_mode(f"{compare_method}-compositing")
+    render_telemetry.set_mode(f"{compare_method}-compositing")
+
+    compositor.start(
+        compare_layers,
+        compare_method,
+        lens_shape,
+        lens_size_rate,
+        lens_zoom,
+        difference_threshold,
+        fade_opacity,
+    )
+    _start_prefetch(compare_layers)
+
+
+def set_difference_threshold(threshold: int) -> None:
+    """Change difference mode threshold, without rendering layers again"""
+    if compositor is None or not compositor.is_running:
+        return
+    compositor.set_difference_threshold(threshold)
+
+
+def set_fade_opacity(opacity: float) -> None:
+    """Change fade mode opacity, without rendering layers again"""
+    if compositor is None or not compositor.is_running:
+        return
+    compositor.set_fade_opacity(opacity)
+
+
+def stop_compare_with_compositor() -> None:
+    """Stop comparing by removing compositing overlay"""
+    compare_setup.cancel()
+    if compositor is None or not compositor.is_running:
+        return
+    compositor.stop()
+    _stop_prefetch()
+    render_counter.set_mode("inactive")
+    render_telemetry.set_mode("inactive")
+
+
+def set_prefetch_enabled(enabled: bool) -> None:
+    """
+    Prefetch tiled compare layers around the map while the user is idle,
+    from the next split, lens or mirror compare
+    """
+    global prefetch_enabled
+    prefetch_enabled = enabled
+    if not enabled:
+        _stop_prefetch()
+
+
+def _start_prefetch(compare_layers: list) -> None:
+    global prefetcher
+    if not prefetch_enabled:
+        return
+    if prefetcher is None:
+        prefetcher = ComparePrefetcher(iface.mapCanvas())
+    prefetcher.start(compare_layers)
+
+
+def _stop_prefetch() -> None:
+    if prefetcher is not None:
+        prefetcher.stop()
+
+
+def compute_change_statistics(compare_layers: list) -> None:
+    """
+    Start computing change statistics of input compare layers
+    over the other visible layers, in current map extent.
+    Results are sent by change_statistics signals.
+    """
+    compare_layer_ids = [layer.id() for layer in compare_layers]
+    helper_layer_names = [
+        compare_mask_layer_name,
+        compare_geographic_mask_layer_name,
+        compare_background_layer_name,
+    ]
+    base_layers = [
+        layer
+        for layer in iface.mapCanvas().layers()
+        if layer.id() not in compare_layer_ids
+        # compare group of split and lens mode
+        and not isinstance(layer, QgsGroupLayer)
+        and layer.name() not in helper_layer_names
+    ]
+    change_statistics.start(
+        iface.mapCanvas().mapSettings(), base_layers, compare_layers
+    )
+
+
+def _get_or_create_background_layer() -> QgsMapLayer:
+    """Return white background layer of compare group, create it if missing"""
+    project = QgsProject.instance()
+    background_layers = project.mapLayersByName(compare_background_layer_name)
+    if background_layers:
+        return background_layers[0]
+
+    background_layer = QgsVectorLayer(
+        "Polygon?crs=EPSG:3857", compare_background_layer_name, "memory"
+    )
+    # symbolize whole map extent: inverted polygons of a layer without feature
+    background_layer_symbol = QgsFillSymbol.createSimple(
+        {"color": "white", "outline_style": "no"}
+    )
+    background_renderer = QgsInvertedPolygonRenderer(
+        QgsSingleSymbolRenderer(background_layer_symbol)
+    )
+    background_layer.setRenderer(background_renderer)
+    project.addMapLayer(background_layer, False)
+
+    return background_layer
+
+
+def _create_compare_layer_group_and_mask() -> tuple[QgsLayerTreeGroup, QgsMapLayer]:
     """Create layer group with mask layer inside at the top
     of layer tree return layer_group and compare_mask_layer
-    Input:
-    - compare_method: 'vertical' 'horizontal' or 'lens'
     Output:
     - layer_group_node: Compare Layer Group,
     - mask_layer: Compare mask layer
@@ -174,11 +384,8 @@ def _create_compare_layer_group_and_mask(
     mask_layers = project.mapLayersByName(compare_mask_layer_name)
     if mask_layers:
         mask_layer = mask_layers[0]
-        # Make mask dynamic for lens
-        if compare_method == "lens":
-            make_dynamic(mask_layer)
-        else:
-            mask_layer.setAutoRefreshMode(Qgis.AutoRefreshMode.Disabled)
+        # Lens is repainted by the lens engine, not by auto refresh
+        mask_layer.setAutoRefreshMode(Qgis.AutoRefreshMode.Disabled)
     else:
         mask_layer = QgsVectorLayer(
             f"Polygon?crs={project.crs().authid()}", compare_mask_layer_name, "memory"
@@ -186,11 +393,8 @@ def _create_compare_layer_group_and_mask(
         if not mask_layer.isValid():
             print("Failed to create the scratch layer")
         else:
-            # Make mask dynamic for lens
-            if compare_method == "lens":
-                make_dynamic(mask_layer)
-            else:
-                mask_layer.setAutoRefreshMode(Qgis.AutoRefreshMode.Disabled)
+            # Lens is repainted by the lens engine, not by auto refresh
+            mask_layer.setAutoRefreshMode(Qgis.AutoRefreshMode.Disabled)
             # Add polygon layer to compare layer group
             project.addMapLayer(mask_layer, False)
 
@@ -213,15 +417,21 @@ def _create_compare_layer_group_and_mask(
     return layer_group_node, mask_layer
 
 
-def compare_with_mapview(compare_layers: list) -> None:
+def compare_with_mapview(compare_layers: list, asynchronous: bool = False) -> None:
     """
     Add an additional mapview to be compare with map main canvas
     with input compare layers
     input:
     - compare layers (a list of QgsMapLayer)
+    - asynchronous: mirror map theme is made by compare_setup,
+      without blocking QGIS, instead of at once
     """
     main_window = iface.mainWindow()
-    origin_visible_layers = get_visible_layers()
+
+    render_counter.attach(iface.mapCanvas())
+    render_telemetry.attach(iface.mapCanvas(), "main map")
+    render_counter.set_mode("mirror")
+    render_telemetry.set_mode("mirror")
 
     map_widgets = get_map_dockwidgets()
 
@@ -231,9 +441,6 @@ def compare_with_mapview(compare_layers: list) -> None:
         if dock.findChild(QgsMapCanvas) and dock.windowTitle() == mirror_widget_name:
             mirror_exists = True
 
-    # Set visible layers to compare one to create theme
-    toggle_layers(compare_layers)
-
     # Add map widget
     if not mirror_exists:
         main_window.findChild(QAction, "mActionNewMapCanvas").trigger()
@@ -277,95 +484,209 @@ def compare_with_mapview(compare_layers: list) -> None:
         set_panel_width(right_dock_widgets[0], int(compare_map_size))
         mirror_widget.refresh()
 
-    # Add Map themes
-    mapThemesCollection = QgsProject.instance().mapThemeCollection()
-    mapThemeRecord = QgsMapThemeCollection.createThemeFromCurrentState(
-        QgsProject.instance().layerTreeRoot(), iface.layerTreeView().layerTreeModel()
+    # Map theme of compare layers, in layer tree order
+    layer_order_ids = [
+        layer.id() for layer in QgsProject.instance().layerTreeRoot().layerOrder()
+    ]
+
+    def commit(theme_layer_ids: list):
+        theme_layers = []
+        for i, layer_id in enumerate(theme_layer_ids):
+            theme_layers.extend(_project_layers([layer_id]))
+            yield (i + 1) / (len(theme_layer_ids) + 1)
+        _show_mirror_theme(mirror_widget, theme_layers)
+
+    _run_setup(
+        _order_theme_layers,
+        ([layer.id() for layer in compare_layers], layer_order_ids),
+        commit,
+        asynchronous,
     )
-    mapThemesCollection.insert(mirror_maptheme_name, mapThemeRecord)
-    mirror_widget.setTheme(mirror_maptheme_name)
-
-    # Initialize map extent
-    mirror_widget.setCenter(iface.mapCanvas().center())
-    mirror_widget.zoomScale(iface.mapCanvas().scale())
-
-    # Retrieve origin layer display
-    toggle_layers(origin_visible_layers)
-
-    # synchronize main map extent and scale TO mirror
-    iface.mapCanvas().extentsChanged.connect(_sync_mirror_extent_from_main_map)
-    iface.mapCanvas().scaleChanged.connect(_sync_mirror_extent_from_main_map)
-    # synchronize main map extent and scale FROM mirror
-    mirror_widget.extentsChanged.connect(_sync_main_map_extent_from_mirror)
-    mirror_widget.scaleChanged.connect(_sync_main_map_extent_from_mirror)
 
     return
 
 
-def _sync_mirror_extent_from_main_map() -> None:
-    # Don't process if map synchronizing is already running
-    global map_synchronizing
-    if map_synchronizing:
-        return
+def _order_theme_layers(compare_layer_ids: list, layer_order_ids: list) -> list:
+    """Compare layer ids in layer tree order, usable off GUI thread"""
+    compare_layer_id_set = set(compare_layer_ids)
+    return [
+        layer_id for layer_id in layer_order_ids if layer_id in compare_layer_id_set
+    ]
 
-    # Flag map synchronizing running to avoid invert signal and crash
-    map_synchronizing = True
-    for dock in iface.mainWindow().findChildren(QDockWidget):
-        if dock.findChild(QgsMapCanvas) and dock.windowTitle() == mirror_widget_name:
-            mirror_mapview = dock.findChild(QgsMapCanvas)
 
-            if mirror_mapview:
-                mirror_mapview.zoomScale(iface.mapCanvas().scale())
-                mirror_mapview.setCenter(iface.mapCanvas().center())
-                mirror_mapview.refresh()
-    map_synchronizing = False
+def _show_mirror_theme(mirror_widget: QgsMapCanvas, theme_layers: list) -> None:
+    """Show map theme of compare layers in mirror map, synchronized with main map"""
+    global map_sync_engine, mirror_shared_cache
 
+    # Theme record is built from compare layers, layer tree visibility
+    # is not toggled back and forth
+    QgsProject.instance().mapThemeCollection().insert(
+        mirror_maptheme_name, map_theme_record(theme_layers)
+    )
+    mirror_widget.setTheme(mirror_maptheme_name)
+    render_counter.attach(mirror_widget)
+    render_telemetry.attach(mirror_widget, "mirror map")
 
-def _sync_main_map_extent_from_mirror() -> None:
-    # Don't process if map synchronizing is already running
-    global map_synchronizing
-    if map_synchronizing:
-        return
+    # synchronize main map extent and scale TO and FROM mirror
+    if map_sync_engine is None:
+        map_sync_engine = MapSyncEngine(iface.mapCanvas())
+    map_sync_engine.add_canvas(mirror_widget)
+    # Initialize map extent
+    map_sync_engine.sync_from(iface.mapCanvas())
 
-    # Flag map synchronizing running to avoid invert signal and crash
-    map_synchronizing = True
-    for dock in iface.mainWindow().findChildren(QDockWidget):
-        if dock.findChild(QgsMapCanvas) and dock.windowTitle() == mirror_widget_name:
-            mirror_mapview = dock.findChild(QgsMapCanvas)
+    # Render only layers differing from main map in mirror map
+    if (
+        mirror_shared_cache is not None
+        and mirror_shared_cache.mirror_canvas is not mirror_widget
+    ):
+        mirror_shared_cache.stop()
+        mirror_shared_cache = None
+    if mirror_shared_cache is None:
+        mirror_shared_cache = MirrorSharedRenderCache(iface.mapCanvas(), mirror_widget)
+    mirror_shared_cache.start(mirror_maptheme_name)
 
-            if mirror_mapview:
-                iface.mapCanvas().zoomScale(mirror_mapview.scale())
-                iface.mapCanvas().setCenter(mirror_mapview.center())
-                iface.mapCanvas().refresh()
-    map_synchronizing = False
+    _start_prefetch(theme_layers)
 
 
 def stop_compare_with_mask() -> None:
     """Stop comparing by removing Comparing layer group"""
+    compare_setup.cancel()
+    _stop_lens_engine()
+    _stop_prefetch()
+    if mask_geometry_engine is not None:
+        mask_geometry_engine.stop()
+    render_counter.set_mode("inactive")
+    render_telemetry.set_mode("inactive")
+
     project = QgsProject.instance()
     root = project.layerTreeRoot()
     layer_group_node = root.findGroup(compare_group_name)
     if layer_group_node:
+        group_layer = layer_group_node.groupLayer()
         root.removeChildNode(layer_group_node)
+        if group_layer:
+            project.removeMapLayer(group_layer.id())
+
+    # Remove helper layers owned by compare group
+    helper_layer_ids = []
+    for layer_name in [
+        compare_mask_layer_name,
+        compare_geographic_mask_layer_name,
+        compare_background_layer_name,
+    ]:
+        helper_layer_ids.extend(
+            layer.id() for layer in project.mapLayersByName(layer_name)
+        )
+    if helper_layer_ids:
+        project.removeMapLayers(helper_layer_ids)
 
     return
 
 
 def stop_mirror_compare() -> None:
     """Stop comparing mirror mode by removing Mirror compare panel"""
+    global mirror_shared_cache
+
+    compare_setup.cancel()
+    if mirror_shared_cache is not None:
+        mirror_shared_cache.stop()
+        mirror_shared_cache = None
+    _stop_prefetch()
 
     for dock in iface.mainWindow().findChildren(QDockWidget):
         if dock.findChild(QgsMapCanvas) and dock.windowTitle() == mirror_widget_name:
+            mirror_mapview = dock.findChild(QgsMapCanvas)
+
             # disconnect map sync
-            iface.mapCanvas().extentsChanged.disconnect(
-                _sync_mirror_extent_from_main_map
-            )
-            iface.mapCanvas().scaleChanged.disconnect(_sync_mirror_extent_from_main_map)
+            if map_sync_engine is not None:
+                map_sync_engine.remove_canvas(mirror_mapview)
 
-            mirror_mapview = dock.findChild(QgsMapCanvas)
-            mirror_mapview.extentsChanged.disconnect(_sync_main_map_extent_from_mirror)
-            mirror_mapview.scaleChanged.disconnect(_sync_main_map_extent_from_mirror)
+            render_counter.detach(mirror_mapview)
+            render_telemetry.detach(mirror_mapview)
 
             dock.close()
 
+    render_counter.set_mode("inactive")
+    render_telemetry.set_mode("inactive")
+
     return
+
+
+def compare_with_grid(compare_layers: list) -> None:
+    """
+    Compare layers side by side in a grid of synchronized maps:
+    one map per compare layer, drawn with the other visible layers
+    """
+    compare_setup.cancel()
+    render_counter.attach(iface.mapCanvas())
+    render_telemetry.attach(iface.mapCanvas(), "main map")
+    render_counter.set_mode("grid")
+    render_telemetry.set_mode("grid")
+
+    compare_layer_ids = [layer.id() for layer in compare_layers]
+    visible_layer_ids = [layer.id() for layer in iface.mapCanvas().layers()]
+    ordered_layers = QgsProject.instance().layerTreeRoot().layerOrder()
+    cells = []
+    for compare_layer in compare_layers:
+        cell_layers = [
+            layer
+            for layer in ordered_layers
+            if layer.id() == compare_layer.id()
+            or (layer.id() in visible_layer_ids and layer.id() not in compare_layer_ids)
+        ]
+        cells.append((compare_layer.name(), cell_layers))
+    compare_grid_cells(cells)
+
+
+def compare_grid_cells(cells: list) -> None:
+    """
+    Show a grid of synchronized maps, one per (title, layers) or
+    (title, map theme name) cell
+    """
+    global map_sync_engine, compare_grid
+
+    if compare_grid is None:
+        compare_grid = CompareGrid(iface.mapCanvas(), iface.mainWindow())
+        # Don't show close button, grid is closed by stopping compare
+        compare_grid.setFeatures(dock_widget_floatable | dock_widget_movable)
+        iface.addDockWidget(right_dock_widget_area, compare_grid)
+        compare_grid.show()
+
+    compare_grid.set_cells(cells)
+
+    # forget maps of removed cells
+    if map_sync_engine is None:
+        map_sync_engine = MapSyncEngine(iface.mapCanvas())
+    for canvas in list(map_sync_engine.canvases):
+        if canvas is not iface.mapCanvas() and canvas not in compare_grid.canvases:
+            map_sync_engine.remove_canvas(canvas)
+
+    # every pan or zoom is applied to all grid maps in one pass,
+    # each map rendering in parallel with the others
+    for canvas in compare_grid.canvases:
+        render_counter.attach(canvas)
+        render_telemetry.attach(canvas, "grid map")
+        map_sync_engine.add_canvas(canvas)
+    map_sync_engine.sync_from(iface.mapCanvas())
+
+
+def stop_grid_compare() -> None:
+    """Stop comparing grid mode by removing grid panel"""
+    global compare_grid
+
+    compare_setup.cancel()
+    if compare_grid is not None:
+        for canvas in compare_grid.canvases:
+            if map_sync_engine is not None:
+                map_sync_engine.remove_canvas(canvas)
+            render_counter.detach(canvas)
+            render_telemetry.detach(canvas)
+        compare_grid.clear()
+        iface.removeDockWidget(compare_grid)
+        # detach from main window so that map dock widgets lookups miss it
+        compare_grid.setParent(None)
+        compare_grid.deleteLater()
+        compare_grid = None
+
+    render_counter.set_mode("inactive")
+    render_telemetry.set_mode("inactive")
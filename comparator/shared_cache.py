@@ -0,0 +1,275 @@
+from typing import Optional
+
+from qgis.core import (
+    QgsMapLayer,
+    QgsPointXY,
+    QgsProject,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+from qgis.gui import QgsMapCanvas, QgsMapCanvasItem
+from qgis.PyQt.QtCore import QObject, QRectF
+from qgis.PyQt.QtGui import QColor
+
+from .constants import mirror_shared_overlay_z_value, mirror_shared_underlay_z_value
+
+
+class SharedLayerImagesItem(QgsMapCanvasItem):
+    """
+    Mirror canvas item drawing layer images cached by the main canvas,
+    composited like QGIS does (layer opacity and blend mode)
+    """
+
+    def __init__(self, canvas: QgsMapCanvas, shared_cache, z_value: float):
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.shared_cache = shared_cache
+        # layers drawn by this item, from top to bottom
+        self.layers = []
+        # fill with canvas color below the images
+        self.background_color: Optional[QColor] = None
+        self.setZValue(z_value)
+        self.setRect(canvas.extent())
+
+    def paint(self, painter, option=None, widget=None) -> None:
+        if self.background_color is not None:
+            painter.fillRect(self.boundingRect(), self.background_color)
+
+        images = self.shared_cache.images
+        extent = self.shared_cache.images_extent
+        if extent is None:
+            return
+        target_rect = self._image_target_rect(extent)
+        for layer in reversed(self.layers):
+            image = images.get(layer.id())
+            if image is None:
+                continue
+            painter.save()
+            painter.setOpacity(_composition_opacity(layer))
+            painter.setCompositionMode(layer.blendMode())
+            painter.drawImage(target_rect, image)
+            painter.restore()
+
+    def _image_target_rect(self, extent: QgsRectangle) -> QRectF:
+        top_left = self.toCanvasCoordinates(
+            QgsPointXY(extent.xMinimum(), extent.yMaximum())
+        )
+        bottom_right = self.toCanvasCoordinates(
+            QgsPointXY(extent.xMaximum(), extent.yMinimum())
+        )
+        return QRectF(top_left - self.pos(), bottom_right - self.pos())
+
+
+class MirrorSharedRenderCache(QObject):
+    """
+    Let the mirror canvas reuse layer images rendered by the main canvas.
+
+    Layers of the mirror map theme also rendered by the main canvas,
+    at the bottom or at the top of the mirror layer stack, are drawn from
+    the main canvas render cache. The mirror canvas renders only the layers
+    in between, i.e. the layers differing between both maps.
+    Sharing applies while both canvases have the same CRS, scale and
+    device pixel ratio, and the main extent contains the mirror extent
+    (same center, see MapSyncEngine).
+    """
+
+    def __init__(self, main_canvas: QgsMapCanvas, mirror_canvas: QgsMapCanvas):
+        super().__init__(mirror_canvas)
+        self.main_canvas = main_canvas
+        self.mirror_canvas = mirror_canvas
+        self.theme_name = ""
+
+        # main canvas layer images of the last completed main render
+        self.images = {}
+        self.images_extent: Optional[QgsRectangle] = None
+
+        self.underlay_item: Optional[SharedLayerImagesItem] = None
+        self.overlay_item: Optional[SharedLayerImagesItem] = None
+        self._mirror_canvas_color: Optional[QColor] = None
+        self.is_running = False
+
+    def start(self, theme_name: str) -> None:
+        """Share main canvas renders with mirror canvas showing map theme"""
+        self.theme_name = theme_name
+        if not self.is_running:
+            self.main_canvas.mapCanvasRefreshed.connect(self._on_main_rendered)
+            self.main_canvas.layersChanged.connect(self.update)
+            self.mirror_canvas.extentsChanged.connect(self._on_mirror_moved)
+            self.is_running = True
+        self.update()
+
+    def stop(self) -> None:
+        if not self.is_running:
+            return
+        self.main_canvas.mapCanvasRefreshed.disconnect(self._on_main_rendered)
+        self.main_canvas.layersChanged.disconnect(self.update)
+        self.mirror_canvas.extentsChanged.disconnect(self._on_mirror_moved)
+        self.is_running = False
+        self._stop_sharing()
+
+    @property
+    def is_sharing(self) -> bool:
+        return self.underlay_item is not None
+
+    def update(self) -> None:
+        """Split mirror layers between shared images and mirror render"""
+        if not self.is_running:
+            return
+        top_layers, middle_layers, bottom_layers = self._split_mirror_layers()
+        if not self._can_share() or not (top_layers or bottom_layers):
+            self._stop_sharing()
+            return
+
+        if not self.is_sharing:
+            self.underlay_item = SharedLayerImagesItem(
+                self.mirror_canvas, self, mirror_shared_underlay_z_value
+            )
+            self.overlay_item = SharedLayerImagesItem(
+                self.mirror_canvas, self, mirror_shared_overlay_z_value
+            )
+            # the mirror map image must let the underlay show through
+            self._mirror_canvas_color = self.mirror_canvas.canvasColor()
+            self.underlay_item.background_color = self._mirror_canvas_color
+            self.mirror_canvas.setCanvasColor(QColor(0, 0, 0, 0))
+            self._snapshot_main_images()
+
+        self.underlay_item.layers = bottom_layers
+        self.overlay_item.layers = top_layers
+
+        # mirror canvas renders only the layers differing from the main map
+        self.mirror_canvas.setTheme("")
+        if [layer.id() for layer in self.mirror_canvas.layers()] != [
+            layer.id() for layer in middle_layers
+        ]:
+            self.mirror_canvas.setLayers(middle_layers)
+            self.mirror_canvas.refresh()
+        self._update_items()
+
+    def _stop_sharing(self) -> None:
+        if not self.is_sharing:
+            return
+        scene = self.mirror_canvas.scene()
+        scene.removeItem(self.underlay_item)
+        scene.removeItem(self.overlay_item)
+        self.underlay_item = None
+        self.overlay_item = None
+        self.images = {}
+        self.images_extent = None
+
+        self.mirror_canvas.setCanvasColor(self._mirror_canvas_color)
+        self.mirror_canvas.setTheme(self.theme_name)
+        self.mirror_canvas.refresh()
+
+    def _mirror_layers(self) -> list:
+        """Layers of mirror map theme, from top to bottom"""
+        return (
+            QgsProject.instance()
+            .mapThemeCollection()
+            .mapThemeVisibleLayers(self.theme_name)
+        )
+
+    def _split_mirror_layers(self) -> tuple:
+        """
+        Split mirror layers (top to bottom) into
+        (shared top layers, layers rendered by mirror, shared bottom layers)
+        """
+        mirror_layers = self._mirror_layers()
+        main_layer_ids = [layer.id() for layer in self.main_canvas.layers()]
+        shareable = [
+            layer.id() in main_layer_ids and _is_shareable(layer)
+            for layer in mirror_layers
+        ]
+
+        top_count = 0
+        while top_count < len(mirror_layers) and shareable[top_count]:
+            top_count += 1
+        if top_count == len(mirror_layers):
+            # all layers are shared: draw all of them below
+            return [], [], mirror_layers
+
+        bottom_count = 0
+        while shareable[len(mirror_layers) - 1 - bottom_count]:
+            bottom_count += 1
+
+        return (
+            mirror_layers[:top_count],
+            mirror_layers[top_count : len(mirror_layers) - bottom_count],
+            mirror_layers[len(mirror_layers) - bottom_count :],
+        )
+
+    def _can_share(self) -> bool:
+        if not self.main_canvas.isCachingEnabled():
+            return False
+        main_settings = self.main_canvas.mapSettings()
+        mirror_settings = self.mirror_canvas.mapSettings()
+        if main_settings.destinationCrs() != mirror_settings.destinationCrs():
+            return False
+        if main_settings.devicePixelRatio() != mirror_settings.devicePixelRatio():
+            return False
+        if main_settings.rotation() or mirror_settings.rotation():
+            return False
+        if not self._same_scale():
+            return False
+        # main extent contains mirror extent when both have the same center
+        main_size = main_settings.outputSize()
+        mirror_size = mirror_settings.outputSize()
+        return (
+            mirror_size.width() <= main_size.width()
+            and mirror_size.height() <= main_size.height()
+        )
+
+    def _snapshot_main_images(self) -> None:
+        """Keep main canvas cached images of shared layers"""
+        cache = self.main_canvas.cache()
+        if cache is None:
+            return
+        shared_layers = self.underlay_item.layers + self.overlay_item.layers
+        images = {}
+        for layer in shared_layers or self._mirror_layers():
+            if cache.hasCacheImage(layer.id()):
+                images[layer.id()] = cache.cacheImage(layer.id())
+        self.images = images
+        self.images_extent = QgsRectangle(
+            self.main_canvas.mapSettings().visibleExtent()
+        )
+
+    def _same_scale(self) -> bool:
+        main_map_units_per_pixel = self.main_canvas.mapUnitsPerPixel()
+        return (
+            abs(self.mirror_canvas.mapUnitsPerPixel() - main_map_units_per_pixel)
+            <= main_map_units_per_pixel * 1e-6
+        )
+
+    def _update_items(self) -> None:
+        for item in [self.underlay_item, self.overlay_item]:
+            item.setRect(self.mirror_canvas.extent())
+            item.update()
+
+    def _on_main_rendered(self) -> None:
+        if not self.is_sharing:
+            return
+        self._snapshot_main_images()
+        self._update_items()
+
+    def _on_mirror_moved(self) -> None:
+        # mirror resized or moved out of sync: check sharing is still possible
+        if self.is_sharing != self._can_share():
+            self.update()
+        elif self.is_sharing:
+            self._update_items()
+
+
+def _composition_opacity(layer: QgsMapLayer) -> float:
+    """
+    Opacity of a cached layer image when composited, like QGIS does:
+    other layer renderers (e.g. raster) already draw the image with it
+    """
+    return layer.opacity() if isinstance(layer, QgsVectorLayer) else 1.0
+
+
+def _is_shareable(layer: QgsMapLayer) -> bool:
+    """
+    Labels are not part of cached layer images:
+    labeled layers are rendered by the mirror canvas
+    """
+    return not (isinstance(layer, QgsVectorLayer) and layer.labelsEnabled())
@@ -0,0 +1,376 @@
+from typing import Optional
+
+import numpy as np
+from qgis.core import (
+    Qgis,
+    QgsApplication,
+    QgsCoordinateTransform,
+    QgsMapSettings,
+    QgsProject,
+    QgsRasterBandStats,
+    QgsRasterLayer,
+    QgsRectangle,
+    QgsTask,
+)
+from qgis.PyQt.QtCore import QObject, pyqtSignal
+from qgis.PyQt.QtGui import QImage
+
+from .compositor import LayerSetRenderer
+from .constants import (
+    statistics_chunk_pixels,
+    statistics_histogram_bins,
+    statistics_max_raster_size,
+    statistics_range_sample_size,
+)
+from .difference import image_to_array
+
+# numpy type of raster block data
+RASTER_DTYPES = {
+    Qgis.DataType.Byte: np.uint8,
+    Qgis.DataType.Int8: np.int8,
+    Qgis.DataType.UInt16: np.uint16,
+    Qgis.DataType.Int16: np.int16,
+    Qgis.DataType.UInt32: np.uint32,
+    Qgis.DataType.Int32: np.int32,
+    Qgis.DataType.Float32: np.float32,
+    Qgis.DataType.Float64: np.float64,
+}
+
+
+class RasterBlockSource:
+    """
+    Raster layer bands read block by block on a pixel grid of extent.
+    Data is read through a copy of the layer data provider,
+    usable from a task thread.
+    """
+
+    def __init__(self, layer: QgsRasterLayer, extent: QgsRectangle, width, height):
+        self.provider = layer.dataProvider().clone()
+        self.band_count = layer.bandCount()
+        self.extent = QgsRectangle(extent)
+        self.width = width
+        self.height = height
+
+    def read(self, row: int, rows: int) -> tuple:
+        """(bands, rows, width) values and (rows, width) valid pixels"""
+        pixel_height = self.extent.height() / self.height
+        y_maximum = self.extent.yMaximum() - row * pixel_height
+        block_extent = QgsRectangle(
+            self.extent.xMinimum(),
+            y_maximum - rows * pixel_height,
+            self.extent.xMaximum(),
+            y_maximum,
+        )
+        values = np.empty((self.band_count, rows, self.width))
+        valid = np.ones((rows, self.width), bool)
+        for band in range(self.band_count):
+            block = self.provider.block(band + 1, block_extent, self.width, rows)
+            dtype = RASTER_DTYPES.get(block.dataType())
+            if dtype is None or not block.isValid():
+                raise ValueError(f"Unsupported data type of band {band + 1}")
+            data = np.frombuffer(bytes(block.data()), dtype).reshape(rows, self.width)
+            values[band] = data
+            if block.hasNoDataValue():
+                valid &= data != block.noDataValue()
+            valid &= ~np.isnan(values[band])
+        return values, valid
+
+    def value_range(self, band: int) -> tuple:
+        """(minimum, maximum) of a band in extent, from a sample of pixels"""
+        stats = self.provider.bandStatistics(
+            band + 1,
+            QgsRasterBandStats.Min | QgsRasterBandStats.Max,
+            self.extent,
+            statistics_range_sample_size,
+        )
+        return stats.minimumValue, stats.maximumValue
+
+
+class ImageBlockSource:
+    """Red, green and blue bands of a rendered image, transparent pixels invalid"""
+
+    band_count = 3
+
+    def __init__(self, image: QImage):
+        self.array = image_to_array(image)
+        self.height, self.width, _ = self.array.shape
+
+    def read(self, row: int, rows: int) -> tuple:
+        block = self.array[row : row + rows]
+        values = np.moveaxis(block[..., :3], 2, 0).astype(np.float64)
+        return values, block[..., 3] > 0
+
+    def value_range(self, band: int) -> tuple:
+        return 0, 255
+
+
+class ChangeStatisticsTask(QgsTask):
+    """
+    Compare base and compare sources of the same size block by block,
+    so that memory stays bounded whatever the raster size:
+    - changed pixels: percentage of valid pixels with a band difference
+      above tolerance
+    - for each band: mean difference (compare - base), mean absolute
+      difference and overlap of the value histograms (0 to 1)
+    """
+
+    def __init__(
+        self,
+        base_source,
+        compare_source,
+        tolerance: float = 0,
+        chunk_pixels: int = statistics_chunk_pixels,
+    ):
+        super().__init__("QMapCompare change statistics")
+        self.base_source = base_source
+        self.compare_source = compare_source
+        self.tolerance = tolerance
+        self.chunk_pixels = chunk_pixels
+        self.statistics: Optional[dict] = None
+        self.error: Optional[str] = None
+
+    def run(self) -> bool:
+        try:
+            return self._compute()
+        except ValueError as e:
+            self.error = str(e)
+            return False
+
+    def _compute(self) -> bool:
+        base = self.base_source
+        compare = self.compare_source
+        band_count = min(base.band_count, compare.band_count)
+        width = compare.width
+        height = compare.height
+
+        ranges = []
+        for band in range(band_count):
+            base_min, base_max = base.value_range(band)
+            compare_min, compare_max = compare.value_range(band)
+            ranges.append((min(base_min, compare_min), max(base_max, compare_max)))
+
+        difference_sums = np.zeros(band_count)
+        absolute_sums = np.zeros(band_count)
+        base_histograms = np.zeros((band_count, statistics_histogram_bins), np.int64)
+        compare_histograms = np.zeros_like(base_histograms)
+        valid_count = 0
+        changed_count = 0
+
+        rows_per_chunk = max(1, self.chunk_pixels // width)
+        for row in range(0, height, rows_per_chunk):
+            if self.isCanceled():
+                return False
+            rows = min(rows_per_chunk, height - row)
+            base_values, base_valid = base.read(row, rows)
+            compare_values, compare_valid = compare.read(row, rows)
+            valid = base_valid & compare_valid
+
+            # (bands, valid pixels)
+            base_values = base_values[:band_count, valid]
+            compare_values = compare_values[:band_count, valid]
+            difference = compare_values - base_values
+            absolute_difference = np.abs(difference)
+
+            difference_sums += difference.sum(axis=1)
+            absolute_sums += absolute_difference.sum(axis=1)
+            valid_count += base_values.shape[1]
+            changed_count += int(
+                np.count_nonzero((absolute_difference > self.tolerance).any(axis=0))
+            )
+            for band in range(band_count):
+                # ranges are read from a sample of pixels: values out of them
+                # are counted in the first or last bin instead of being dropped
+                base_histograms[band] += np.histogram(
+                    np.clip(base_values[band], *ranges[band]),
+                    statistics_histogram_bins,
+                    ranges[band],
+                )[0]
+                compare_histograms[band] += np.histogram(
+                    np.clip(compare_values[band], *ranges[band]),
+                    statistics_histogram_bins,
+                    ranges[band],
+                )[0]
+
+            self.setProgress(100 * (row + rows) / height)
+
+        if valid_count == 0:
+            self.error = "No pixel to compare in current extent"
+            return False
+
+        bands = []
+        for band in range(band_count):
+            bands.append(
+                {
+                    "band": band + 1,
+                    "mean_difference": float(difference_sums[band] / valid_count),
+                    "mean_absolute_difference": float(
+                        absolute_sums[band] / valid_count
+                    ),
+                    "histogram_overlap": _histogram_overlap(
+                        base_histograms[band], compare_histograms[band]
+                    ),
+                }
+            )
+        self.statistics = {
+            "width": width,
+            "height": height,
+            "pixel_count": valid_count,
+            "changed_percentage": 100 * changed_count / valid_count,
+            "bands": bands,
+        }
+        return True
+
+
+def _histogram_overlap(histogram_a: np.ndarray, histogram_b: np.ndarray) -> float:
+    """Intersection of normalized histograms, 1 when they are the same"""
+    total_a = histogram_a.sum()
+    total_b = histogram_b.sum()
+    if total_a == 0 or total_b == 0:
+        return 0.0
+    return float(np.minimum(histogram_a / total_a, histogram_b / total_b).sum())
+
+
+def raster_grid(layer: QgsRasterLayer, extent: QgsRectangle, max_size: int) -> tuple:
+    """(width, height) of extent at the layer resolution, at most max_size"""
+    width = extent.width() / layer.rasterUnitsPerPixelX()
+    height = extent.height() / layer.rasterUnitsPerPixelY()
+    scale = min(1.0, max_size / max(width, height, 1))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class ChangeStatistics(QObject):
+    """
+    Change statistics of compare layers over base layers in a map extent,
+    computed by a background task:
+    - read from the rasters when the top base layer and the top compare layer
+      are raster layers in the same CRS, at the compare raster resolution
+    - from rendered images of both layer sets otherwise
+    """
+
+    # percentage of the task done
+    progressChanged = pyqtSignal(float)
+    statisticsReady = pyqtSignal(dict)
+    # reason why no statistics is computed
+    statisticsFailed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.max_raster_size = statistics_max_raster_size
+        self._task: Optional[ChangeStatisticsTask] = None
+        self._settings: Optional[QgsMapSettings] = None
+
+        self.base_renderer = LayerSetRenderer(parent=self)
+        self.compare_renderer = LayerSetRenderer(parent=self)
+        self.base_renderer.imageReady.connect(self._on_image_ready)
+        self.compare_renderer.imageReady.connect(self._on_image_ready)
+        self._waiting_images = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None or self._waiting_images
+
+    def start(
+        self, settings: QgsMapSettings, base_layers: list, compare_layers: list
+    ) -> None:
+        self.cancel()
+        if not base_layers or not compare_layers:
+            self.statisticsFailed.emit("Base and compare layers are needed")
+            return
+
+        base_layer = base_layers[0]
+        compare_layer = compare_layers[0]
+        if (
+            isinstance(base_layer, QgsRasterLayer)
+            and isinstance(compare_layer, QgsRasterLayer)
+            and base_layer.crs() == compare_layer.crs()
+        ):
+            self._start_raster_task(settings, base_layer, compare_layer)
+            return
+
+        # render layer sets, statistics start once both images are ready
+        self._waiting_images = True
+        self._settings = QgsMapSettings(settings)
+        self.base_renderer.set_layers(base_layers)
+        self.compare_renderer.set_layers(compare_layers)
+        self.base_renderer.render(settings)
+        self.compare_renderer.render(settings)
+        self._on_image_ready()
+
+    def cancel(self) -> None:
+        if self._waiting_images:
+            self._waiting_images = False
+            self._release_layers()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def clear(self) -> None:
+        self.cancel()
+        self.base_renderer.clear()
+        self.compare_renderer.clear()
+
+    def _start_raster_task(
+        self,
+        settings: QgsMapSettings,
+        base_layer: QgsRasterLayer,
+        compare_layer: QgsRasterLayer,
+    ) -> None:
+        extent = settings.visibleExtent()
+        if settings.destinationCrs() != compare_layer.crs():
+            transform = QgsCoordinateTransform(
+                settings.destinationCrs(), compare_layer.crs(), QgsProject.instance()
+            )
+            extent = transform.transformBoundingBox(extent)
+        extent = extent.intersect(compare_layer.extent())
+        if extent.isEmpty():
+            self.statisticsFailed.emit("Compare layer is not in current extent")
+            return
+        width, height = raster_grid(compare_layer, extent, self.max_raster_size)
+        self._start_task(
+            RasterBlockSource(base_layer, extent, width, height),
+            RasterBlockSource(compare_layer, extent, width, height),
+        )
+
+    def _on_image_ready(self) -> None:
+        if not self._waiting_images:
+            return
+        if self.base_renderer.is_rendering or self.compare_renderer.is_rendering:
+            # the other image is still rendering
+            return
+        self._waiting_images = False
+        base_image = self.base_renderer.image
+        compare_image = self.compare_renderer.image
+        if base_image is None or compare_image is None:
+            self._release_layers()
+            self.statisticsFailed.emit("Layers could not be rendered")
+            return
+        base_source = ImageBlockSource(base_image)
+        compare_source = ImageBlockSource(compare_image)
+        self._release_layers()
+        self._start_task(base_source, compare_source)
+
+    def _release_layers(self) -> None:
+        """
+        Stop following layer changes once images are read: renderers would
+        otherwise render again on every repaint of their layers
+        """
+        self.base_renderer.clear()
+        self.compare_renderer.clear()
+
+    def _start_task(self, base_source, compare_source) -> None:
+        task = ChangeStatisticsTask(base_source, compare_source)
+        task.progressChanged.connect(self.progressChanged)
+        task.taskCompleted.connect(lambda: self._on_task_finished(task))
+        task.taskTerminated.connect(lambda: self._on_task_finished(task))
+        self._task = task
+        QgsApplication.taskManager().addTask(task)
+
+    def _on_task_finished(self, task: ChangeStatisticsTask) -> None:
+        if task is not self._task:
+            # cancelled
+            return
+        self._task = None
+        if task.statistics is not None:
+            self.statisticsReady.emit(task.statistics)
+        else:
+            self.statisticsFailed.emit(task.error or "Change statistics cancelled")
@@ -0,0 +1,117 @@
+from typing import Optional
+
+from qgis.core import QgsRectangle
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QObject, QTimer
+
+from .constants import map_sync_frame_interval_time
+
+
+class MapSyncEngine(QObject):
+    """
+    Synchronize extent and scale of map canvases.
+    Pan and zoom events are coalesced into at most one extent change per frame,
+    applied to each other canvas in one call. Renders made stale by
+    the next movement are cancelled.
+    """
+
+    def __init__(self, main_canvas: QgsMapCanvas):
+        super().__init__(main_canvas)
+        self.main_canvas = main_canvas
+        self.canvases = []
+
+        # canvas moved by the user, other canvases follow it
+        self._source_canvas: Optional[QgsMapCanvas] = None
+        # flag to ignore extent changes made by the engine itself
+        self._applying = False
+
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.setInterval(map_sync_frame_interval_time)
+        self._frame_timer.timeout.connect(self._apply)
+
+    def add_canvas(self, canvas: QgsMapCanvas) -> None:
+        """Synchronize a canvas, the main canvas is added with the first one"""
+        if not self.canvases and canvas is not self.main_canvas:
+            self.add_canvas(self.main_canvas)
+        if canvas in self.canvases:
+            return
+        canvas.extentsChanged.connect(self._on_extents_changed)
+        canvas.destroyed.connect(self._on_canvas_destroyed)
+        self.canvases.append(canvas)
+
+    def remove_canvas(self, canvas: QgsMapCanvas) -> None:
+        if canvas not in self.canvases:
+            return
+        canvas.extentsChanged.disconnect(self._on_extents_changed)
+        canvas.destroyed.disconnect(self._on_canvas_destroyed)
+        self.canvases.remove(canvas)
+        if self._source_canvas is canvas:
+            self._source_canvas = None
+
+        # only the main canvas left: nothing to synchronize
+        if self.canvases == [self.main_canvas]:
+            self.stop()
+
+    def stop(self) -> None:
+        self._frame_timer.stop()
+        for canvas in list(self.canvases):
+            canvas.extentsChanged.disconnect(self._on_extents_changed)
+            canvas.destroyed.disconnect(self._on_canvas_destroyed)
+        self.canvases = []
+        self._source_canvas = None
+
+    def sync_from(self, source_canvas: QgsMapCanvas) -> None:
+        """Apply extent of source canvas to the other canvases immediately"""
+        self._source_canvas = source_canvas
+        self._frame_timer.stop()
+        self._apply()
+
+    def _on_extents_changed(self) -> None:
+        if self._applying:
+            return
+        self._source_canvas = self.sender()
+        # a frame is already scheduled: it will apply the latest extent
+        if not self._frame_timer.isActive():
+            self._frame_timer.start()
+
+    def _on_canvas_destroyed(self) -> None:
+        canvas = self.sender()
+        self.canvases = [c for c in self.canvases if c is not canvas]
+        if self._source_canvas is canvas:
+            self._source_canvas = None
+
+    def _apply(self) -> None:
+        source_canvas = self._source_canvas
+        if source_canvas is None:
+            return
+
+        self._applying = True
+        try:
+            for canvas in self.canvases:
+                if canvas is source_canvas:
+                    continue
+                # cancel in-flight render of the previous extent
+                canvas.stopRendering()
+                canvas.setExtent(target_extent(source_canvas, canvas))
+                canvas.refresh()
+        finally:
+            self._applying = False
+
+
+def target_extent(source_canvas: QgsMapCanvas, canvas: QgsMapCanvas) -> QgsRectangle:
+    """
+    Extent of canvas with same center and same scale as source canvas
+    (same map units per pixel for the canvas own size)
+    """
+    center = source_canvas.center()
+    map_units_per_pixel = source_canvas.mapUnitsPerPixel()
+    output_size = canvas.mapSettings().outputSize()
+    half_width = output_size.width() * map_units_per_pixel / 2
+    half_height = output_size.height() * map_units_per_pixel / 2
+    return QgsRectangle(
+        center.x() - half_width,
+        center.y() - half_height,
+        center.x() + half_width,
+        center.y() + half_height,
+    )
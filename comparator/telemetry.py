@@ -0,0 +1,423 @@
+import csv
+import time
+from collections import deque
+from contextlib import ExitStack
+from functools import partial
+from typing import Optional
+
+from qgis.core import Qgis, QgsApplication
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QObject, QPersistentModelIndex, Qt, pyqtSignal
+
+from .constants import (
+    telemetry_rate_window,
+    telemetry_sample_count,
+    telemetry_slowest_layer_count,
+)
+
+# runtime profiler group of map renders recorded with RecordProfile flag
+RENDERING_PROFILE_GROUP = "rendering"
+# data roles of runtime profiler entries (not in python bindings)
+PROFILE_GROUP_ROLE = Qt.ItemDataRole.UserRole + 2
+PROFILE_ID_ROLE = Qt.ItemDataRole.UserRole + 3
+PROFILE_ELAPSED_ROLE = Qt.ItemDataRole.UserRole + 4
+
+CSV_FIELDS = ["time", "mode", "source", "frame_time_ms", "layer_id", "layer_time_ms"]
+
+
+class RenderCounter(QObject):
+    """
+    Count map canvas render jobs per compare mode
+    so that the rendering cost of each mode can be measured
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.mode = "inactive"
+        self.counts = {}
+        self._canvases = []
+
+    def attach(self, canvas: QgsMapCanvas) -> None:
+        """
+        Count renders of a map canvas, only once per canvas
+        Any object with a renderStarting signal (e.g. LayerSetRenderer)
+        can be attached as well
+        """
+        if canvas in self._canvases:
+            return
+        canvas.renderStarting.connect(self._on_render_starting)
+        canvas.destroyed.connect(lambda: self._forget(canvas))
+        self._canvases.append(canvas)
+
+    def detach(self, canvas: QgsMapCanvas) -> None:
+        if canvas not in self._canvases:
+            return
+        canvas.renderStarting.disconnect(self._on_render_starting)
+        self._forget(canvas)
+
+    def set_mode(self, mode: str) -> None:
+        self.mode = mode
+
+    def reset(self) -> None:
+        self.counts = {}
+
+    def count(self, mode: str) -> int:
+        return self.counts.get(mode, 0)
+
+    def _forget(self, canvas: QgsMapCanvas) -> None:
+        if canvas in self._canvases:
+            self._canvases.remove(canvas)
+
+    def _on_render_starting(self) -> None:
+        self.counts[self.mode] = self.counts.get(self.mode, 0) + 1
+
+
+class InteractionRenderTimer(QObject):
+    """
+    Measure the time from the first render started by an interaction
+    (pan, zoom...) to the end of the last render of all attached canvases
+    """
+
+    # total render time in milliseconds
+    interactionRendered = pyqtSignal(float)
+
+    def __init__(self):
+        super().__init__()
+        self.last_render_time: Optional[float] = None
+        self._canvases = []
+        self._rendering_canvases = []
+        self._started_at: Optional[float] = None
+
+    def attach(self, canvas: QgsMapCanvas) -> None:
+        if canvas in self._canvases:
+            return
+        canvas.renderStarting.connect(self._on_render_starting)
+        canvas.mapCanvasRefreshed.connect(self._on_render_finished)
+        self._canvases.append(canvas)
+
+    def detach(self, canvas: QgsMapCanvas) -> None:
+        if canvas not in self._canvases:
+            return
+        canvas.renderStarting.disconnect(self._on_render_starting)
+        canvas.mapCanvasRefreshed.disconnect(self._on_render_finished)
+        self._canvases.remove(canvas)
+        if canvas in self._rendering_canvases:
+            self._rendering_canvases.remove(canvas)
+            self._finish_if_done()
+
+    def detach_all(self) -> None:
+        for canvas in list(self._canvases):
+            self.detach(canvas)
+        self._started_at = None
+
+    def _on_render_starting(self) -> None:
+        canvas = self.sender()
+        if not self._rendering_canvases:
+            self._started_at = time.perf_counter()
+        if canvas not in self._rendering_canvases:
+            self._rendering_canvases.append(canvas)
+
+    def _on_render_finished(self) -> None:
+        # cancelled renders never emit mapCanvasRefreshed:
+        # keep waiting only for canvases still drawing
+        canvas = self.sender()
+        self._rendering_canvases = [
+            c for c in self._rendering_canvases if c is not canvas and c.isDrawing()
+        ]
+        self._finish_if_done()
+
+    def _finish_if_done(self) -> None:
+        if self._rendering_canvases or self._started_at is None:
+            return
+        self.last_render_time = (time.perf_counter() - self._started_at) * 1000
+        self._started_at = None
+        self.interactionRendered.emit(self.last_render_time)
+
+
+class LayerProfileRecorder(QObject):
+    """
+    Keep track of layer entries added to the rendering group of the QGIS
+    runtime profiler, with the time they were added. Entries are read
+    by layer id and are never cleared from the profiler, which is shared
+    with QGIS development tools.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # [time added, profiler index, layer id, elapsed ms or None]
+        self._entries = []
+        self._profiler = None
+
+    def start(self) -> None:
+        if self._profiler is not None:
+            return
+        self._profiler = QgsApplication.profiler()
+        self._profiler.rowsInserted.connect(self._on_rows_inserted)
+        # QGIS may clear the group: read elapsed times before
+        self._profiler.rowsAboutToBeRemoved.connect(self._read_elapsed_times)
+        self._profiler.modelAboutToBeReset.connect(self._read_elapsed_times)
+
+    def stop(self) -> None:
+        if self._profiler is None:
+            return
+        self._profiler.rowsInserted.disconnect(self._on_rows_inserted)
+        self._profiler.rowsAboutToBeRemoved.disconnect(self._read_elapsed_times)
+        self._profiler.modelAboutToBeReset.disconnect(self._read_elapsed_times)
+        self._profiler = None
+        self._entries = []
+
+    def take_layer_times(self, since: float, layer_ids: list) -> dict:
+        """
+        Rendering time in ms of the layers, by layer id, from finished entries
+        added since a time (time.perf_counter). Entries are read only once.
+        """
+        self._read_elapsed_times()
+        layer_ids = set(layer_ids)
+        layer_times = {}
+        entries = []
+        for entry in self._entries:
+            added_at, _, layer_id, elapsed = entry
+            if added_at < since or layer_id not in layer_ids or elapsed is None:
+                entries.append(entry)
+                continue
+            layer_times[layer_id] = layer_times.get(layer_id, 0) + elapsed
+        self._entries = entries
+        return layer_times
+
+    def forget_before(self, time_: float) -> None:
+        """Forget entries added before a time, of renders not waited for anymore"""
+        self._entries = [entry for entry in self._entries if entry[0] >= time_]
+
+    def _read_elapsed_times(self, *args) -> None:
+        for entry in self._entries:
+            index = entry[1]
+            if entry[3] is None and index.isValid():
+                # elapsed time is 0 until the entry is finished
+                elapsed = index.data(PROFILE_ELAPSED_ROLE)
+                if elapsed:
+                    entry[3] = elapsed * 1000
+
+    def _on_rows_inserted(self, parent, first: int, last: int) -> None:
+        added_at = time.perf_counter()
+        parent_id = parent.data(PROFILE_ID_ROLE) if parent.isValid() else None
+        for row in range(first, last + 1):
+            index = self._profiler.index(row, 0, parent)
+            if index.data(PROFILE_GROUP_ROLE) != RENDERING_PROFILE_GROUP:
+                continue
+            layer_id = index.data(PROFILE_ID_ROLE)
+            # entries nested in an entry of the same layer are counted in it
+            if not layer_id or layer_id == parent_id:
+                continue
+            self._entries.append(
+                [added_at, QPersistentModelIndex(index), layer_id, None]
+            )
+
+
+class RenderTelemetry(QObject):
+    """
+    Record a sample for each render finished by attached map canvases
+    and compositing renderers: frame time, and rendering time of each layer
+    when layer profiling is enabled. Layer times are recorded by the QGIS
+    runtime profiler, and entries of the layers of a source added between
+    the start and the end of its render are given to its sample.
+    Samples can be appended to a CSV file.
+    """
+
+    sampleAdded = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.mode = "inactive"
+        # samples are dicts with time, mode, source, frame_time_ms
+        # and layer_times_ms ({layer id: ms}) keys
+        self.samples = deque(maxlen=telemetry_sample_count)
+        self.layer_profiling = False
+
+        # source -> (name, start slot, finish slot)
+        self._sources = {}
+        self._started_at = {}
+        self._layer_profile = LayerProfileRecorder()
+        # canvases with RecordProfile flag set by telemetry
+        self._profiled_canvases = []
+        self._csv_exit_stack = None
+        self._csv_file = None
+        self._csv_writer = None
+
+    def attach(self, source, name: str) -> None:
+        """
+        Record renders of a map canvas or of a LayerSetRenderer,
+        only once per source
+        """
+        if source in self._sources:
+            return
+        on_started = partial(self._on_render_starting, source)
+        on_finished = partial(self._on_render_finished, source, name)
+        source.renderStarting.connect(on_started)
+        self._finished_signal(source).connect(on_finished)
+        source.destroyed.connect(partial(self._forget, source))
+        self._sources[source] = (name, on_started, on_finished)
+        self._set_profiling(source, self.layer_profiling)
+
+    def detach(self, source) -> None:
+        if source not in self._sources:
+            return
+        _, on_started, on_finished = self._sources[source]
+        source.renderStarting.disconnect(on_started)
+        self._finished_signal(source).disconnect(on_finished)
+        self._set_profiling(source, False)
+        self._forget(source)
+
+    def set_mode(self, mode: str) -> None:
+        self.mode = mode
+
+    def set_layer_profiling(self, enabled: bool) -> None:
+        """Record rendering time of each layer, at a small rendering cost"""
+        enabled = enabled and can_profile_layers()
+        self.layer_profiling = enabled
+        if enabled:
+            self._layer_profile.start()
+        else:
+            self._layer_profile.stop()
+        for source in self._sources:
+            self._set_profiling(source, enabled)
+
+    def start_csv_export(self, path: str) -> None:
+        """Append next samples to a CSV file, with a header if it is new or empty"""
+        self.stop_csv_export()
+        with ExitStack() as stack:
+            csv_file = stack.enter_context(open(path, "a", newline=""))
+            csv_writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDS)
+            if csv_file.tell() == 0:
+                csv_writer.writeheader()
+                csv_file.flush()
+            # the file is closed by stop_csv_export()
+            self._csv_exit_stack = stack.pop_all()
+        self._csv_file = csv_file
+        self._csv_writer = csv_writer
+
+    def stop_csv_export(self) -> None:
+        if self._csv_file is None:
+            return
+        self._csv_exit_stack.close()
+        self._csv_exit_stack = None
+        self._csv_file = None
+        self._csv_writer = None
+
+    @property
+    def is_exporting(self) -> bool:
+        return self._csv_file is not None
+
+    def last_frame_time(self) -> Optional[float]:
+        if not self.samples:
+            return None
+        return self.samples[-1]["frame_time_ms"]
+
+    def renders_per_second(self) -> float:
+        since = time.time() - telemetry_rate_window
+        count = 0
+        for sample in reversed(self.samples):
+            if sample["time"] < since:
+                break
+            count += 1
+        return count / telemetry_rate_window
+
+    def slowest_layers(self, count: int = telemetry_slowest_layer_count) -> list:
+        """(layer id, mean rendering time in ms) of the slowest layers"""
+        layer_times = {}
+        for sample in self.samples:
+            for layer_id, layer_time in sample["layer_times_ms"].items():
+                layer_times.setdefault(layer_id, []).append(layer_time)
+        means = [
+            (layer_id, sum(times) / len(times))
+            for layer_id, times in layer_times.items()
+        ]
+        means.sort(key=lambda item: item[1], reverse=True)
+        return means[:count]
+
+    def clear(self) -> None:
+        self.samples.clear()
+
+    def _finished_signal(self, source):
+        if isinstance(source, QgsMapCanvas):
+            return source.mapCanvasRefreshed
+        return source.imageReady
+
+    def _forget(self, source, *args) -> None:
+        self._sources.pop(source, None)
+        self._started_at.pop(source, None)
+        if source in self._profiled_canvases:
+            self._profiled_canvases.remove(source)
+
+    def _set_profiling(self, source, enabled: bool) -> None:
+        if not isinstance(source, QgsMapCanvas):
+            # LayerSetRenderer
+            source.record_profile = enabled
+            return
+        flag = Qgis.MapSettingsFlag.RecordProfile
+        if enabled and not source.mapSettings().testFlag(flag):
+            source.setMapSettingsFlags(source.mapSettings().flags() | flag)
+            self._profiled_canvases.append(source)
+        elif not enabled and source in self._profiled_canvases:
+            # the flag may have been set by QGIS development tools
+            source.setMapSettingsFlags(source.mapSettings().flags() & ~flag)
+            self._profiled_canvases.remove(source)
+
+    def _on_render_starting(self, source) -> None:
+        self._started_at[source] = time.perf_counter()
+
+    def _on_render_finished(self, source, name: str) -> None:
+        started_at = self._started_at.pop(source, None)
+        if started_at is None:
+            # cached image reused, nothing was rendered
+            return
+        sample = {
+            "time": time.time(),
+            "mode": self.mode,
+            "source": name,
+            "frame_time_ms": (time.perf_counter() - started_at) * 1000,
+            "layer_times_ms": self._layer_times(source, started_at),
+        }
+        self.samples.append(sample)
+        if self._csv_writer is not None:
+            self._write_csv_rows(sample)
+        self.sampleAdded.emit()
+
+    def _layer_times(self, source, started_at: float) -> dict:
+        if not self.layer_profiling:
+            return {}
+        if isinstance(source, QgsMapCanvas):
+            layer_ids = source.mapSettings().layerIds()
+        else:
+            layer_ids = [layer.id() for layer in source.layers]
+        layer_times = self._layer_profile.take_layer_times(started_at, layer_ids)
+        # entries older than renders still waited for are not needed anymore
+        self._layer_profile.forget_before(
+            min(self._started_at.values(), default=time.perf_counter())
+        )
+        return layer_times
+
+    def _write_csv_rows(self, sample: dict) -> None:
+        row = {
+            "time": sample["time"],
+            "mode": sample["mode"],
+            "source": sample["source"],
+            "frame_time_ms": sample["frame_time_ms"],
+            "layer_id": "",
+            "layer_time_ms": "",
+        }
+        try:
+            self._csv_writer.writerow(row)
+            for layer_id, layer_time in sample["layer_times_ms"].items():
+                self._csv_writer.writerow(
+                    {**row, "layer_id": layer_id, "layer_time_ms": layer_time}
+                )
+            self._csv_file.flush()
+        except OSError:
+            # e.g. disk full: stop exporting rather than failing every render
+            self.stop_csv_export()
+            raise
+
+
+def can_profile_layers() -> bool:
+    """Render profiling has been added in QGIS 3.34"""
+    return hasattr(Qgis.MapSettingsFlag, "RecordProfile")
@@ -1,16 +1,20 @@
+from bisect import bisect_left
+from typing import Iterator, Optional
+
 from qgis.core import (
-    Qgis,
+    QgsLayerTree,
     QgsLayerTreeGroup,
     QgsLayerTreeLayer,
-    QgsMapLayer,
+    QgsMapThemeCollection,
     QgsProject,
+    QgsVectorLayer,
 )
 from qgis.gui import QgsMapCanvas
 from qgis.PyQt.QtCore import QT_VERSION_STR, Qt
 from qgis.PyQt.QtWidgets import QDockWidget
 from qgis.utils import iface
 
-from .constants import lens_auto_refresh_interval_time
+from .constants import compare_setup_batch_size
 
 QT_VERSION_INT = int(QT_VERSION_STR.split(".")[0])
 
@@ -20,61 +24,188 @@ else:
     right_dock_widget_area = Qt.DockWidgetArea.RightDockWidgetArea
 
 
-def is_in_group(layer: QgsMapLayer, layer_group: QgsLayerTreeGroup) -> bool:
+def plan_layer_order_update(current_ids: list, target_ids: list) -> tuple:
     """
-    Return True if a target layer is in a target layer group
+    Compare current and target layer id orders of a layer group
+    Return (removed_ids, moved_ids, added_ids):
+    - removed_ids: layers not in target anymore
+    - moved_ids: kept layers which have to move to follow target order
+    - added_ids: layers not in group yet
+    Kept layers which are not moved stay in place, they are chosen as
+    the longest sequence already in target order to minimize moves.
     """
-    for child in layer_group.children():
-        if child.layerId() == layer.id():  # 0 = Layer node
-            return True
-    return False
-
-
-def make_dynamic(layer: QgsMapLayer) -> None:
+    target_positions = {layer_id: i for i, layer_id in enumerate(target_ids)}
+    removed_ids = [i for i in current_ids if i not in target_positions]
+    kept_ids = [i for i in current_ids if i in target_positions]
+    current_id_set = set(current_ids)
+    added_ids = [i for i in target_ids if i not in current_id_set]
+
+    stable_ids = set(
+        _longest_increasing_subsequence(kept_ids, lambda i: target_positions[i])
+    )
+    moved_ids = [i for i in kept_ids if i not in stable_ids]
+
+    return removed_ids, moved_ids, added_ids
+
+
+def _longest_increasing_subsequence(items: list, key) -> list:
+    """Longest subsequence of items with increasing key, in O(n log n)"""
+    # tails_keys[k] is the smallest key ending an increasing subsequence of k+1 items
+    tails_keys = []
+    tails_indexes = []
+    previous_indexes = [-1] * len(items)
+    for index, item in enumerate(items):
+        item_key = key(item)
+        position = bisect_left(tails_keys, item_key)
+        if position > 0:
+            previous_indexes[index] = tails_indexes[position - 1]
+        if position == len(tails_keys):
+            tails_keys.append(item_key)
+            tails_indexes.append(index)
+        else:
+            tails_keys[position] = item_key
+            tails_indexes[position] = index
+
+    subsequence = []
+    index = tails_indexes[-1] if tails_indexes else -1
+    while index != -1:
+        subsequence.append(items[index])
+        index = previous_indexes[index]
+    subsequence.reverse()
+    return subsequence
+
+
+def group_layer_ids(layer_group: QgsLayerTreeGroup) -> list:
+    """Layer id of each child of a layer group, None for non layer nodes"""
+    return [
+        child.layerId() if QgsLayerTree.isLayer(child) else None
+        for child in layer_group.children()
+    ]
+
+
+def plan_group_layers(current_ids: list, target_ids: list) -> tuple:
     """
-    make layer dynamic by refreshing with interval
-    interval is set with lens_auto_refresh_interval_time in ms
+    Plan of a layer group update from layer ids only, usable off GUI thread
+    Return (current_ids, removed_ids, moved_ids, added_ids)
     """
-    layer.setAutoRefreshInterval(lens_auto_refresh_interval_time)
-    layer.setAutoRefreshMode(Qgis.AutoRefreshMode.ReloadData)
+    return (current_ids, *plan_layer_order_update(current_ids, target_ids))
 
 
-def get_visible_layers(node=None) -> list:
+def reconcile_group_layers_steps(
+    layer_group: QgsLayerTreeGroup,
+    target_ids: list,
+    plan: Optional[tuple] = None,
+    chunk_size: int = compare_setup_batch_size,
+) -> Iterator[float]:
     """
-    Recursively gather all layers that are marked as visible
-    under the given layer tree node (defaults to project root).
-    Returns a list of QgsMapLayer objects.
+    Update layer group children to be the target layers in the same order,
+    yielding progress (0 to 1) after each layer tree change
+    Only added and removed layers change, kept layer nodes stay in place
+    (order changes are done by moving the nodes)
+    - target_ids: ids of the layers in group order, layers removed
+      from the project meanwhile are skipped
+    - plan: plan_group_layers prepared beforehand,
+      planned again if group children changed since
+    - chunk_size: maximum number of consecutive new layers inserted at once
     """
-    if node is None:
-        node = QgsProject.instance().layerTreeRoot()
-
-    visible_layers = []
-
-    for child in node.children():
-        if isinstance(child, QgsLayerTreeGroup):
-            # Recurse into sub-groups
-            visible_layers.extend(get_visible_layers(child))
-        elif isinstance(child, QgsLayerTreeLayer):
-            # If the layer node is visible in the layer tree
-            if child.isVisible():
-                visible_layers.append(child.layer())
-
-    return visible_layers
-
-
-def toggle_layers(layers_to_display: list) -> None:
+    current_ids = group_layer_ids(layer_group)
+    if plan is None or plan[0] != current_ids:
+        plan = plan_group_layers(current_ids, target_ids)
+    _, removed_ids, moved_ids, _ = plan
+    removed_ids = set(removed_ids)
+    moved_ids = set(moved_ids)
+    step_count = len(removed_ids) + len(moved_ids) + len(target_ids)
+    step = 0
+
+    # remove layers not requested anymore (and non layer nodes)
+    # detach layer nodes to move, they are inserted back at target index
+    moved_nodes = {}
+    for child, layer_id in zip(list(layer_group.children()), current_ids):
+        if layer_id in moved_ids:
+            moved_nodes[layer_id] = child.clone()
+        elif layer_id not in removed_ids:
+            continue
+        layer_group.removeChildNode(child)
+        step += 1
+        yield step / step_count
+
+    # children are now the stable layers in target order: insert the others,
+    # consecutive new layers by chunks
+    project = QgsProject.instance()
+    stable_ids = set(group_layer_ids(layer_group))
+    kept_ids = stable_ids | set(moved_nodes)
+    index = 0
+    new_nodes = []
+    for position, layer_id in enumerate(target_ids):
+        if layer_id in kept_ids:
+            step += 1
+            if layer_id in moved_nodes:
+                layer_group.insertChildNode(index, moved_nodes[layer_id])
+                yield step / step_count
+            index += 1
+            continue
+
+        layer = project.mapLayer(layer_id)
+        if layer is None:
+            step += 1
+        else:
+            new_nodes.append(QgsLayerTreeLayer(layer))
+        is_last_new = (
+            position + 1 == len(target_ids) or target_ids[position + 1] in kept_ids
+        )
+        if not new_nodes or (len(new_nodes) < chunk_size and not is_last_new):
+            continue
+        layer_group.insertChildNodes(index, new_nodes)
+        index += len(new_nodes)
+        # one step per layer, so that a batch of steps stays the same size
+        for _ in new_nodes:
+            step += 1
+            yield step / step_count
+        new_nodes = []
+
+
+def map_theme_record(layers: list) -> QgsMapThemeCollection.MapThemeRecord:
+    """
+    Map theme showing only input layers with their current style
+    and legend items checked in the layer tree,
+    built without changing layer tree visibility
+    """
+    record = QgsMapThemeCollection.MapThemeRecord()
+    layer_records = []
+    for layer in layers:
+        layer_record = QgsMapThemeCollection.MapThemeLayerRecord(layer)
+        layer_record.usingCurrentStyle = True
+        layer_record.currentStyle = layer.styleManager().currentStyle()
+        checked_items = checked_legend_items(layer)
+        if checked_items is not None:
+            layer_record.usingLegendItems = True
+            layer_record.checkedLegendItems = checked_items
+        layer_records.append(layer_record)
+    record.setLayerRecords(layer_records)
+    return record
+
+
+def checked_legend_items(layer) -> Optional[set]:
     """
-    Make visible only a list a layer set as input
+    Rule keys of the checked legend items of a layer, None when all its
+    items are checked. Check states are read from the layer renderer,
+    where the legend nodes of the layer tree model store them.
     """
-    root = QgsProject.instance().layerTreeRoot()
-    layer_to_display_ids = [layer.id() for layer in layers_to_display]
-
-    for child in root.children():
-        if isinstance(child, QgsLayerTreeLayer):
-            if child.layerId() in layer_to_display_ids:
-                child.setItemVisibilityChecked(True)
-            else:
-                child.setItemVisibilityChecked(False)
+    if not isinstance(layer, QgsVectorLayer) or layer.renderer() is None:
+        return None
+    renderer = layer.renderer()
+    if not renderer.legendSymbolItemsCheckable():
+        return None
+    checked_items = set()
+    some_items_unchecked = False
+    for item in renderer.legendSymbolItems():
+        if not item.isCheckable():
+            continue
+        if renderer.legendSymbolItemChecked(item.ruleKey()):
+            checked_items.add(item.ruleKey())
+        else:
+            some_items_unchecked = True
+    return checked_items if some_items_unchecked else None
 
 
 def get_map_dockwidgets() -> list:
@@ -4,6 +4,7 @@ from qgis.PyQt.QtCore import QT_VERSION_STR, Qt
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction
 
+from .comparator.process import change_statistics
 from .qmapcompare_dockwidget import QMapCompareDockWidget
 
 QT_VERSION_INT = int(QT_VERSION_STR.split(".")[0])
@@ -73,6 +74,12 @@ class QMapCompare:
         for action in self.actions:
             self.iface.removePluginMenu(PLUGIN_NAME, action)
             self.iface.removeToolBarIcon(action)
+        # Stop any ongoing comparison (e.g. release frozen canvas)
+        self.dockwidget._on_pushbutton_stopcompare_clicked()
+        # Close render samples CSV file
+        self.dockwidget.ui.checkBox_telemetry_csv.setChecked(False)
+        # Cancel change statistics task
+        change_statistics.clear()
         self.iface.removeDockWidget(self.dockwidget)
         self.dockwidget = None
 
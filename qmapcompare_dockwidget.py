@@ -1,28 +1,40 @@
 import os
 
-from qgis.core import (
-    QgsApplication,
-    QgsLayerTree,
-    QgsLayerTreeGroup,
-    QgsLayerTreeLayer,
-    QgsMapLayerModel,
-    QgsProject,
+from qgis.core import QgsApplication, QgsProject
+from qgis.PyQt import uic
+from qgis.PyQt.QtCore import QT_VERSION_STR, QTimer
+from qgis.PyQt.QtWidgets import (
+    QDockWidget,
+    QFileDialog,
+    QMessageBox,
 )
-from qgis.PyQt import sip, uic
-from qgis.PyQt.QtCore import QT_VERSION_STR, Qt
-from qgis.PyQt.QtGui import QIcon
-from qgis.PyQt.QtWidgets import QDockWidget, QMessageBox, QTreeWidgetItem
 
 from .comparator.constants import (
-    compare_group_name,
+    difference_default_threshold,
+    difference_max_threshold,
+    fade_default_opacity,
     lens_default_size_rate,
     lens_max_size_rate,
     lens_min_size_rate,
+    lens_zoom_factors,
+    telemetry_panel_refresh_interval_time,
 )
+from .comparator.layer_model import CompareLayerModel
 from .comparator.process import (
+    change_statistics,
+    compare_setup,
+    compare_with_compositor,
+    compare_with_grid,
     compare_with_mapview,
     compare_with_mask,
+    compute_change_statistics,
+    render_telemetry,
+    set_difference_threshold,
+    set_fade_opacity,
+    set_prefetch_enabled,
+    stop_compare_with_compositor,
     stop_compare_with_mask,
+    stop_grid_compare,
     stop_mirror_compare,
 )
 
@@ -41,26 +53,85 @@ class QMapCompareDockWidget(QDockWidget):
         except Exception as e:
             raise RuntimeError(f"Error when loading UI file: {str(e)}")
 
-        # Update layer list when layer tree has been updated
-        QgsProject.instance().layerTreeRoot().layerOrderChanged.connect(
-            self.process_node
+        # Layer list: rows are made from QGIS layer tree when their group
+        # is expanded, and updated when layer tree has been updated
+        # only the added, removed or renamed rows are changed
+        # (a reorder is a removal and an addition of layer tree nodes)
+        self.layer_model = CompareLayerModel(
+            QgsProject.instance().layerTreeRoot(), self
         )
+        self.ui.layerTree.setModel(self.layer_model)
+        self.ui.layerTree.setUniformRowHeights(True)
+
+        # Layer list shows layers matching filter text, from the name index
+        self.ui.lineEdit_layer_filter.setShowSearchIcon(True)
+        self.ui.lineEdit_layer_filter.setPlaceholderText("Filter layers by name")
+        self.ui.lineEdit_layer_filter.textChanged.connect(self.layer_model.set_filter)
 
         # reprocess when UI layer tree changed
-        self.ui.layerTree.itemChanged.connect(self._on_layertree_item_changed)
+        # all check state changes of one user action (e.g. checking a group
+        # and its children) are collapsed into one compare update
+        # on the next event loop turn
+        self._compare_update_timer = QTimer(self)
+        self._compare_update_timer.setSingleShot(True)
+        self._compare_update_timer.setInterval(0)
+        self._compare_update_timer.timeout.connect(self._update_compare)
+        self.layer_model.checkedLayersChanged.connect(self._on_layertree_item_changed)
 
         # buttons tooltips
         self.ui.pushButton_h_split.setToolTip("Horizontal Split")
         self.ui.pushButton_v_split.setToolTip("Vertical Split")
         self.ui.pushButton_lens.setToolTip("Lens")
+        self.ui.pushButton_difference.setToolTip("Pixel Difference")
+        self.ui.pushButton_difference.setIcon(
+            QgsApplication.getThemeIcon("/algorithms/mAlgorithmDifference.svg")
+        )
+        self.ui.pushButton_fade.setToolTip("Fade")
+        self.ui.pushButton_fade.setIcon(
+            QgsApplication.getThemeIcon("/propertyicons/transparency.svg")
+        )
         self.ui.pushButton_mirror.setToolTip("Mirror")
+        self.ui.pushButton_grid.setToolTip("Grid (one synchronized map per layer)")
+        self.ui.pushButton_grid.setIcon(
+            QgsApplication.getThemeIcon("/mActionNewMapCanvas.svg")
+        )
         self.ui.pushButton_stopcompare.setToolTip("Stop Compare")
+        self.ui.checkBox_compositing.setToolTip(
+            "Render base and compare layers once per extent and composite them "
+            "when split or lens moves. The split divider can be dragged."
+        )
+        self.ui.checkBox_prefetch.setToolTip(
+            "Load tiled compare layers (XYZ, WMS, COG...) around the map "
+            "while it stays still, so that panning and zooming in are faster."
+        )
+
+        # button and settings of each compare mode: the button of the active
+        # mode is disabled and only its settings are shown
+        self._mode_buttons = {
+            "hsplit": self.ui.pushButton_h_split,
+            "vsplit": self.ui.pushButton_v_split,
+            "lens": self.ui.pushButton_lens,
+            "difference": self.ui.pushButton_difference,
+            "fade": self.ui.pushButton_fade,
+            "mirror": self.ui.pushButton_mirror,
+            "grid": self.ui.pushButton_grid,
+        }
+        self._mode_settings = {
+            "lens": self.ui.groupBox_lens_settings,
+            "difference": self.ui.groupBox_difference_settings,
+            "fade": self.ui.groupBox_fade_settings,
+        }
 
         # buttons connections
         self.ui.pushButton_h_split.clicked.connect(self._on_pushbutton_h_split_clicked)
         self.ui.pushButton_v_split.clicked.connect(self._on_pushbutton_v_split_clicked)
         self.ui.pushButton_lens.clicked.connect(self._on_pushbutton_lens_clicked)
+        self.ui.pushButton_difference.clicked.connect(
+            self._on_pushbutton_difference_clicked
+        )
+        self.ui.pushButton_fade.clicked.connect(self._on_pushbutton_fade_clicked)
         self.ui.pushButton_mirror.clicked.connect(self._on_pushbutton_mirror_clicked)
+        self.ui.pushButton_grid.clicked.connect(self._on_pushbutton_grid_clicked)
         self.ui.pushButton_stopcompare.clicked.connect(
             self._on_pushbutton_stopcompare_clicked
         )
@@ -70,6 +141,11 @@ class QMapCompareDockWidget(QDockWidget):
         self.ui.slider_lens_size.setMaximum(int(lens_max_size_rate * 100))
         self.ui.slider_lens_size.setValue(int(lens_default_size_rate * 100))
         self.ui.label_lens_size_value.setText(f"{int(lens_default_size_rate * 100)}%")
+        for zoom in lens_zoom_factors:
+            self.ui.comboBox_lens_zoom.addItem(f"{zoom}x", zoom)
+        self.ui.comboBox_lens_zoom.setToolTip(
+            "Show compare layers magnified in the lens (always composited)"
+        )
 
         # Lens settings signals
         self.ui.slider_lens_size.sliderReleased.connect(self._on_lens_settings_changed)
@@ -77,19 +153,72 @@ class QMapCompareDockWidget(QDockWidget):
             self._on_lens_settings_changed
         )
         self.ui.slider_lens_size.valueChanged.connect(self._on_lens_size_value_changed)
+        self.ui.comboBox_lens_zoom.currentIndexChanged.connect(
+            self._on_lens_settings_changed
+        )
+
+        # Difference settings: a threshold change only computes difference again
+        self.ui.slider_difference_threshold.setMinimum(0)
+        self.ui.slider_difference_threshold.setMaximum(difference_max_threshold)
+        self.ui.slider_difference_threshold.setValue(difference_default_threshold)
+        self.ui.label_difference_threshold_value.setText(
+            _threshold_text(difference_default_threshold)
+        )
+        self.ui.slider_difference_threshold.valueChanged.connect(
+            self._on_difference_threshold_changed
+        )
+
+        # Fade settings: an opacity change only blends cached images again
+        self.ui.slider_fade_opacity.setMinimum(0)
+        self.ui.slider_fade_opacity.setMaximum(100)
+        self.ui.slider_fade_opacity.setValue(int(fade_default_opacity * 100))
+        self.ui.label_fade_opacity_value.setText(f"{int(fade_default_opacity * 100)}%")
+        self.ui.slider_fade_opacity.valueChanged.connect(self._on_fade_opacity_changed)
+
+        # Switch split and lens rendering engine
+        self.ui.checkBox_compositing.toggled.connect(self._on_compositing_toggled)
+
+        # Opt-in prefetch of compare layers around the map
+        self.ui.checkBox_prefetch.toggled.connect(self._on_prefetch_toggled)
+
+        # Change statistics of checked layers, computed in background
+        self.ui.pushButton_statistics.setToolTip(
+            "Compare checked layers with the other visible layers "
+            "in current map extent: changed pixels, and mean difference "
+            "and histogram overlap of each band"
+        )
+        self.ui.pushButton_statistics.clicked.connect(
+            self._on_pushbutton_statistics_clicked
+        )
+        change_statistics.progressChanged.connect(self._on_statistics_progress)
+        change_statistics.statisticsReady.connect(self._on_statistics_ready)
+        change_statistics.statisticsFailed.connect(self._on_statistics_failed)
+
+        # Render telemetry panel, refreshed while expanded
+        self._telemetry_refresh_timer = QTimer(self)
+        self._telemetry_refresh_timer.setInterval(telemetry_panel_refresh_interval_time)
+        self._telemetry_refresh_timer.timeout.connect(self._refresh_telemetry_panel)
+        self.ui.groupBox_telemetry.collapsedStateChanged.connect(
+            self._on_telemetry_collapsed_state_changed
+        )
+        self.ui.checkBox_telemetry_csv.toggled.connect(self._on_telemetry_csv_toggled)
+        self._refresh_telemetry_panel()
 
         # Populate layer tree box when open a project
         QgsProject.instance().readProject.connect(self.process_node)
 
         # memorize layers id checked by user
-        self.checked_layers = []
+        self.checked_layers = set()
 
         # memorize current active mode
-        # (inactive, hsplit, vsplit, lens, mirror)
+        # (inactive, hsplit, vsplit, lens, difference, fade, mirror, grid)
         self.active_compare_mode = "inactive"
 
-        # flag current process to avoid recusrsive process bugs
-        self.is_processing = False
+        # Split, lens and mirror setup run in background, by batches
+        # of layer tree changes: compare group nodes are not shown in UI
+        # layer tree, other nodes added meanwhile are added to it as usual
+        compare_setup.progressChanged.connect(self._on_compare_setup_progress)
+        compare_setup.setupFinished.connect(self._on_compare_setup_finished)
 
         # Stop compare mode when project is reinitialized
         QgsProject.instance().cleared.connect(self._on_pushbutton_stopcompare_clicked)
@@ -108,23 +237,18 @@ class QMapCompareDockWidget(QDockWidget):
         # get layers
         layers = self._get_checked_layers()
         if layers:
-            # Disable only horizontal split
-            self.ui.pushButton_h_split.setEnabled(False)
-            self.ui.pushButton_v_split.setEnabled(True)
-            self.ui.pushButton_lens.setEnabled(True)
-            self.ui.pushButton_mirror.setEnabled(True)
-            self.ui.groupBox_lens_settings.setVisible(False)
+            self._set_mode_controls("hsplit")
 
             if self.active_compare_mode == "mirror":
                 stop_mirror_compare()
+            if self.active_compare_mode == "grid":
+                stop_grid_compare()
 
             self.active_compare_mode = "hsplit"
 
             self._memorize_checked_layers(layers)
 
-            self.is_processing = True
-            compare_with_mask(layers, "horizontal")
-            self.is_processing = False
+            self._compare_with_mask(layers, "horizontal")
         else:
             QMessageBox.information(
                 None, "Error", "Please select at least one layer to compare"
@@ -134,23 +258,18 @@ class QMapCompareDockWidget(QDockWidget):
         # get layers
         layers = self._get_checked_layers()
         if layers:
-            # Disable only vertical split
-            self.ui.pushButton_v_split.setEnabled(False)
-            self.ui.pushButton_h_split.setEnabled(True)
-            self.ui.pushButton_lens.setEnabled(True)
-            self.ui.pushButton_mirror.setEnabled(True)
-            self.ui.groupBox_lens_settings.setVisible(False)
+            self._set_mode_controls("vsplit")
 
             if self.active_compare_mode == "mirror":
                 stop_mirror_compare()
+            if self.active_compare_mode == "grid":
+                stop_grid_compare()
 
             self.active_compare_mode = "vsplit"
 
             self._memorize_checked_layers(layers)
 
-            self.is_processing = True
-            compare_with_mask(layers, "vertical")
-            self.is_processing = False
+            self._compare_with_mask(layers, "vertical")
         else:
             QMessageBox.information(
                 None, "Error", "Please select at least one layer to compare"
@@ -160,28 +279,60 @@ class QMapCompareDockWidget(QDockWidget):
         # get layers
         layers = self._get_checked_layers()
         if layers:
-            # Disable only lens split
-            self.ui.pushButton_h_split.setEnabled(True)
-            self.ui.pushButton_v_split.setEnabled(True)
-            self.ui.pushButton_lens.setEnabled(False)
-            self.ui.pushButton_mirror.setEnabled(True)
-            self.ui.groupBox_lens_settings.setVisible(True)
+            self._set_mode_controls("lens")
 
             if self.active_compare_mode == "mirror":
                 stop_mirror_compare()
+            if self.active_compare_mode == "grid":
+                stop_grid_compare()
 
             self.active_compare_mode = "lens"
 
             self._memorize_checked_layers(layers)
 
-            self.is_processing = True
-            compare_with_mask(
-                layers,
-                "lens",
-                lens_shape=self._get_lens_shape(),
-                lens_size_rate=self._get_lens_size_rate(),
+            self._compare_with_mask(layers, "lens")
+        else:
+            QMessageBox.information(
+                None, "Error", "Please select at least one layer to compare"
+            )
+
+    def _on_pushbutton_difference_clicked(self):
+        # get layers
+        layers = self._get_checked_layers()
+        if layers:
+            self._set_mode_controls("difference")
+
+            if self.active_compare_mode == "mirror":
+                stop_mirror_compare()
+            if self.active_compare_mode == "grid":
+                stop_grid_compare()
+
+            self.active_compare_mode = "difference"
+
+            self._memorize_checked_layers(layers)
+
+            self._compare_with_difference(layers)
+        else:
+            QMessageBox.information(
+                None, "Error", "Please select at least one layer to compare"
             )
-            self.is_processing = False
+
+    def _on_pushbutton_fade_clicked(self):
+        # get layers
+        layers = self._get_checked_layers()
+        if layers:
+            self._set_mode_controls("fade")
+
+            if self.active_compare_mode == "mirror":
+                stop_mirror_compare()
+            if self.active_compare_mode == "grid":
+                stop_grid_compare()
+
+            self.active_compare_mode = "fade"
+
+            self._memorize_checked_layers(layers)
+
+            self._compare_with_fade(layers)
         else:
             QMessageBox.information(
                 None, "Error", "Please select at least one layer to compare"
@@ -191,64 +342,86 @@ class QMapCompareDockWidget(QDockWidget):
         # get layers
         layers = self._get_checked_layers()
         if layers:
-            # Disable only mirror split
-            self.ui.pushButton_h_split.setEnabled(True)
-            self.ui.pushButton_v_split.setEnabled(True)
-            self.ui.pushButton_lens.setEnabled(True)
-            self.ui.pushButton_mirror.setEnabled(False)
-            self.ui.groupBox_lens_settings.setVisible(False)
+            self._set_mode_controls("mirror")
 
             # Stop compare to remove mask group layer
-            if self.active_compare_mode in ["hsplit", "vsplit", "lens"]:
+            if self.active_compare_mode in [
+                "hsplit",
+                "vsplit",
+                "lens",
+                "difference",
+                "fade",
+            ]:
                 stop_compare_with_mask()
+                stop_compare_with_compositor()
+            if self.active_compare_mode == "grid":
+                stop_grid_compare()
 
             self.active_compare_mode = "mirror"
 
             self._memorize_checked_layers(layers)
 
-            self.is_processing = True
-            compare_with_mapview(layers)
-            self.is_processing = False
+            compare_with_mapview(layers, asynchronous=True)
+        else:
+            QMessageBox.information(
+                None, "Error", "Please select at least one layer to compare"
+            )
+
+    def _on_pushbutton_grid_clicked(self):
+        # get layers
+        layers = self._get_checked_layers()
+        if layers:
+            self._set_mode_controls("grid")
+
+            # Stop compare to remove mask group layer or mirror map
+            if self.active_compare_mode in [
+                "hsplit",
+                "vsplit",
+                "lens",
+                "difference",
+                "fade",
+            ]:
+                stop_compare_with_mask()
+                stop_compare_with_compositor()
+            if self.active_compare_mode == "mirror":
+                stop_mirror_compare()
+
+            self.active_compare_mode = "grid"
+
+            self._memorize_checked_layers(layers)
+
+            compare_with_grid(layers)
         else:
             QMessageBox.information(
                 None, "Error", "Please select at least one layer to compare"
             )
 
     def _on_pushbutton_stopcompare_clicked(self):
+        # drop pending compare update
+        self._compare_update_timer.stop()
+
         # remove compare layer group
-        self.is_processing = True
         stop_compare_with_mask()
+        stop_compare_with_compositor()
         if self.active_compare_mode == "mirror":
             stop_mirror_compare()
-        self.is_processing = False
+        if self.active_compare_mode == "grid":
+            stop_grid_compare()
 
         # re-enable all compare push_button
-        self.ui.pushButton_h_split.setEnabled(True)
-        self.ui.pushButton_v_split.setEnabled(True)
-        self.ui.pushButton_lens.setEnabled(True)
-        self.ui.pushButton_mirror.setEnabled(True)
-        self.ui.groupBox_lens_settings.setVisible(False)
+        self._set_mode_controls("inactive")
 
         self.active_compare_mode = "inactive"
 
+    def _set_mode_controls(self, active_mode: str) -> None:
+        """Disable only the button of active mode and show only its settings"""
+        for mode, button in self._mode_buttons.items():
+            button.setEnabled(mode != active_mode)
+        for mode, settings in self._mode_settings.items():
+            settings.setVisible(mode == active_mode)
+
     def _get_checked_layers(self):
-        layers = []
-        # Recursively retrieve child elements of a QTreeWidget
-        for i in range(self.ui.layerTree.topLevelItemCount()):
-            item = self.ui.layerTree.topLevelItem(i)
-            layers.extend(self._get_checked_layers_recursive(item))
-        return layers
-
-    def _get_checked_layers_recursive(self, item):
-        layers = []
-        if item.checkState(0) == Qt.CheckState.Checked:
-            layer = QgsProject.instance().mapLayer(item.text(1))
-            if layer:
-                layers.append(layer)
-        for i in range(item.childCount()):
-            child_item = item.child(i)
-            layers.extend(self._get_checked_layers_recursive(child_item))
-        return layers
+        return self.layer_model.checked_layers()
 
     def process_node(self):
         """
@@ -258,84 +431,8 @@ class QMapCompareDockWidget(QDockWidget):
             # don't process_node when dialog invisible to avoid crash
             return
 
-        if self.is_processing:
-            # don't process_node when compare setup is processing and avoid crash
-            return
-
-        self.ui.layerTree.clear()
-        self._process_node_recursive(QgsProject.instance().layerTreeRoot(), None)
-
-    def _process_node_recursive(self, node, parent_node):
-        """
-        Load QGIS layers to target layer tree
-        """
-        for child in node.children():
-            # check signal is connected or not
-            try:
-                child.nameChanged.disconnect(self.process_node)
-            except TypeError:
-                # when signal is not connected
-                pass
-            child.nameChanged.connect(self.process_node)
-
-            if QgsLayerTree.isGroup(child):
-                if not isinstance(child, QgsLayerTreeGroup):
-                    child = sip.cast(child, QgsLayerTreeGroup)
-                child_type = "group"
-                child_icon = QIcon(QgsApplication.iconPath("mActionFolder.svg"))
-                child_id = ""
-
-            elif QgsLayerTree.isLayer(child):
-                if not isinstance(child, QgsLayerTreeLayer):
-                    child = sip.cast(child, QgsLayerTreeLayer)
-
-                if not child.layer():
-                    continue
-
-                child_type = "layer"
-                child_icon = QgsMapLayerModel.iconForLayer(child.layer())
-                child_id = child.layer().id()
-
-                if not child.layer().isSpatial():
-                    # exclude no geometry layers such as CSV files
-                    continue
-
-            else:
-                raise Exception("Unknown child type")
-
-            # Don't add compare group to layer tree
-            if child.name() == compare_group_name:
-                continue
-
-            item = QTreeWidgetItem([child.name(), child_id])
-            item.setIcon(0, child_icon)
-            item.setFlags(
-                item.flags()
-                | Qt.ItemFlag.ItemIsUserCheckable
-                | Qt.ItemFlag.ItemIsAutoTristate
-            )
-
-            item.setCheckState(
-                0,
-                Qt.CheckState.Unchecked,
-            )
-
-            # recheck if layer has been checked by user on UI
-            if child_id in self.checked_layers:
-                item.setCheckState(
-                    0,
-                    Qt.CheckState.Checked,
-                )
-
-            # Move group or layer to its parent node
-            if not parent_node:
-                self.ui.layerTree.addTopLevelItem(item)
-            else:
-                parent_node.addChild(item)
-
-            # add layers to layer tree UI except compare group's children
-            if child_type == "group" and child.name() != compare_group_name:
-                self._process_node_recursive(child, item)
+        # top level rows are made again, with layers of last compare checked
+        self.layer_model.reset(self.checked_layers)
 
     def _get_lens_size_rate(self) -> float:
         return self.ui.slider_lens_size.value() / 100.0
@@ -345,6 +442,9 @@ class QMapCompareDockWidget(QDockWidget):
             return "square"
         return "circle"
 
+    def _get_lens_zoom(self) -> float:
+        return self.ui.comboBox_lens_zoom.currentData() or 1
+
     def _on_lens_size_value_changed(self, value: int) -> None:
         self.ui.label_lens_size_value.setText(f"{value}%")
         if not self.ui.slider_lens_size.isSliderDown():
@@ -356,44 +456,209 @@ class QMapCompareDockWidget(QDockWidget):
             return
         layers = self._get_checked_layers()
         if layers:
-            self.is_processing = True
+            self._compare_with_mask(layers, "lens")
+
+    def _compare_with_mask(self, layers: list, compare_method: str) -> None:
+        """Run split or lens compare with masking group or cached compositing"""
+        # a mask can't magnify: magnifier lens is always composited
+        magnifying = compare_method == "lens" and self._get_lens_zoom() > 1
+        if self.ui.checkBox_compositing.isChecked() or magnifying:
+            compare_with_compositor(
+                layers,
+                compare_method,
+                lens_shape=self._get_lens_shape(),
+                lens_size_rate=self._get_lens_size_rate(),
+                lens_zoom=self._get_lens_zoom(),
+            )
+        else:
             compare_with_mask(
                 layers,
-                "lens",
+                compare_method,
                 lens_shape=self._get_lens_shape(),
                 lens_size_rate=self._get_lens_size_rate(),
+                asynchronous=True,
             )
-            self.is_processing = False
+
+    def _compare_with_difference(self, layers: list) -> None:
+        """Difference of base and compare layers is always composited"""
+        compare_with_compositor(
+            layers,
+            "difference",
+            difference_threshold=self.ui.slider_difference_threshold.value(),
+        )
+
+    def _on_difference_threshold_changed(self, value: int) -> None:
+        self.ui.label_difference_threshold_value.setText(_threshold_text(value))
+        if self.active_compare_mode == "difference":
+            set_difference_threshold(value)
+
+    def _compare_with_fade(self, layers: list) -> None:
+        """Fade of compare layers over base layers is always composited"""
+        compare_with_compositor(
+            layers,
+            "fade",
+            fade_opacity=self.ui.slider_fade_opacity.value() / 100,
+        )
+
+    def _on_fade_opacity_changed(self, value: int) -> None:
+        self.ui.label_fade_opacity_value.setText(f"{value}%")
+        if self.active_compare_mode == "fade":
+            set_fade_opacity(value / 100)
+
+    def _on_compare_setup_progress(self, percentage: float) -> None:
+        self.ui.progressBar_compare_setup.setVisible(True)
+        self.ui.progressBar_compare_setup.setValue(int(percentage))
+
+    def _on_compare_setup_finished(self, completed: bool) -> None:
+        self.ui.progressBar_compare_setup.setVisible(False)
+
+    def _on_compositing_toggled(self) -> None:
+        """Restart split or lens compare with the selected rendering engine"""
+        if self.active_compare_mode not in ["hsplit", "vsplit", "lens"]:
+            return
+        self._update_compare()
+
+    def _on_prefetch_toggled(self, checked: bool) -> None:
+        set_prefetch_enabled(checked)
+        if checked and self.active_compare_mode in [
+            "hsplit",
+            "vsplit",
+            "lens",
+            "mirror",
+        ]:
+            self._update_compare()
+
+    def _on_pushbutton_statistics_clicked(self) -> None:
+        if change_statistics.is_running:
+            change_statistics.cancel()
+            self._on_statistics_failed("Change statistics cancelled")
+            return
+        layers = self._get_checked_layers()
+        if not layers:
+            QMessageBox.information(
+                None, "Error", "Please select at least one layer to compare"
+            )
+            return
+        self.ui.pushButton_statistics.setText("Cancel")
+        self.ui.progressBar_statistics.setValue(0)
+        self.ui.progressBar_statistics.setVisible(True)
+        self.ui.label_statistics.setText("")
+        compute_change_statistics(layers)
+
+    def _on_statistics_progress(self, progress: float) -> None:
+        self.ui.progressBar_statistics.setValue(int(progress))
+
+    def _on_statistics_ready(self, statistics: dict) -> None:
+        self._reset_statistics_panel()
+        lines = [
+            f"Compared pixels: {statistics['pixel_count']:,} "
+            f"({statistics['width']} x {statistics['height']})",
+            f"Changed pixels: {statistics['changed_percentage']:.2f}%",
+        ]
+        for band in statistics["bands"]:
+            lines.append(
+                f"Band {band['band']}: "
+                f"mean difference {band['mean_difference']:.3g}, "
+                f"mean absolute difference {band['mean_absolute_difference']:.3g}, "
+                f"histogram overlap {band['histogram_overlap']:.2f}"
+            )
+        self.ui.label_statistics.setText("\n".join(lines))
+
+    def _on_statistics_failed(self, message: str) -> None:
+        self._reset_statistics_panel()
+        self.ui.label_statistics.setText(message)
+
+    def _reset_statistics_panel(self) -> None:
+        self.ui.pushButton_statistics.setText("Compute in current extent")
+        self.ui.progressBar_statistics.setVisible(False)
+
+    def _on_telemetry_collapsed_state_changed(self, collapsed: bool) -> None:
+        # per layer times cost a little: record them only when shown
+        render_telemetry.set_layer_profiling(not collapsed)
+        if collapsed:
+            self._telemetry_refresh_timer.stop()
+        else:
+            self._refresh_telemetry_panel()
+            self._telemetry_refresh_timer.start()
+
+    def _refresh_telemetry_panel(self) -> None:
+        frame_time = render_telemetry.last_frame_time()
+        if frame_time is None:
+            self.ui.label_frame_time.setText("Frame time: -")
+        else:
+            self.ui.label_frame_time.setText(f"Frame time: {frame_time:.0f} ms")
+        self.ui.label_renders_per_second.setText(
+            f"Renders per second: {render_telemetry.renders_per_second():.1f}"
+        )
+
+        slowest_layers = render_telemetry.slowest_layers()
+        if slowest_layers:
+            project = QgsProject.instance()
+            lines = []
+            for layer_id, time in slowest_layers:
+                layer = project.mapLayer(layer_id)
+                name = layer.name() if layer is not None else layer_id
+                lines.append(f"{name}: {time:.0f} ms")
+            self.ui.label_slowest_layers.setText("Slowest layers:\n" + "\n".join(lines))
+        elif render_telemetry.layer_profiling:
+            self.ui.label_slowest_layers.setText("Slowest layers: -")
+        else:
+            self.ui.label_slowest_layers.setText(
+                "Slowest layers: not available before QGIS 3.34"
+            )
+
+    def _on_telemetry_csv_toggled(self, checked: bool) -> None:
+        if not checked:
+            render_telemetry.stop_csv_export()
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export render samples", "", "CSV files (*.csv)"
+        )
+        if not path:
+            self.ui.checkBox_telemetry_csv.blockSignals(True)
+            self.ui.checkBox_telemetry_csv.setChecked(False)
+            self.ui.checkBox_telemetry_csv.blockSignals(False)
+            return
+        render_telemetry.start_csv_export(path)
 
     def _memorize_checked_layers(self, layers):
-        self.checked_layers = []
-        for layer in layers:
-            self.checked_layers.append(layer.id())
+        self.checked_layers = {layer.id() for layer in layers}
 
     def _on_layertree_item_changed(self):
+        """schedule compare update once check state changes are done"""
+        if not self._compare_update_timer.isActive():
+            self._compare_update_timer.start()
+
+    def _update_compare(self):
         """redo compare process if compare is active"""
         # dont't process if compare is inactive
-        if self.active_compare_mode not in ["hsplit", "vsplit", "lens", "mirror"]:
+        if self.active_compare_mode not in [
+            "hsplit",
+            "vsplit",
+            "lens",
+            "difference",
+            "fade",
+            "mirror",
+            "grid",
+        ]:
             return
 
         layers = self._get_checked_layers()
         if layers:
-            self.is_processing = True
             if self.active_compare_mode == "vsplit":
-                compare_with_mask(layers, "vertical")
+                self._compare_with_mask(layers, "vertical")
             if self.active_compare_mode == "hsplit":
-                compare_with_mask(layers, "horizontal")
+                self._compare_with_mask(layers, "horizontal")
             if self.active_compare_mode == "lens":
-                compare_with_mask(
-                    layers,
-                    "lens",
-                    lens_shape=self._get_lens_shape(),
-                    lens_size_rate=self._get_lens_size_rate(),
-                )
+                self._compare_with_mask(layers, "lens")
+            if self.active_compare_mode == "difference":
+                self._compare_with_difference(layers)
+            if self.active_compare_mode == "fade":
+                self._compare_with_fade(layers)
             if self.active_compare_mode == "mirror":
-                compare_with_mapview(layers)
-
-            self.is_processing = False
+                compare_with_mapview(layers, asynchronous=True)
+            if self.active_compare_mode == "grid":
+                compare_with_grid(layers)
 
         else:
             QMessageBox.information(
@@ -401,3 +666,8 @@ class QMapCompareDockWidget(QDockWidget):
             )
             # reinitialize UI since no layer has been selected
             self._on_pushbutton_stopcompare_clicked()
+
+
+def _threshold_text(value: int) -> str:
+    """Threshold 0 shows the pixel difference instead of changed pixels"""
+    return "Off" if value == 0 else str(value)
@@ -0,0 +1,93 @@
+"""
+Microbenchmark of checked layers reading with many layers
+
+For each layer count, half of the layers are checked and are measured:
+- a recursive walk of the layer tree, as the layer panel formerly did
+  on every read of checked layers
+- reading checked layers from CheckedLayerSet
+- checking then unchecking one layer, followed by a read
+- the first read after a layer tree change, when positions are read again
+
+Run inside QGIS python environment:
+    python -m plugin_dir.tests.benchmarks.bench_checked_layers
+"""
+
+import json
+import time
+
+from qgis.core import QgsLayerTree, QgsLayerTreeGroup, QgsProject, QgsVectorLayer
+
+from ...comparator.layer_model import CheckedLayerSet
+from ..utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+LAYER_COUNTS = [100, 1000, 5000, 10000]
+LAYERS_PER_GROUP = 100
+REPEAT = 20
+
+
+def _walk_checked_layers(node, checked_ids: list) -> list:
+    layers = []
+    for child in node.children():
+        if QgsLayerTree.isGroup(child):
+            layers.extend(_walk_checked_layers(child, checked_ids))
+        elif QgsLayerTree.toLayer(child).layerId() in checked_ids:
+            layers.append(QgsLayerTree.toLayer(child).layer())
+    return layers
+
+
+def _measure(function, *args) -> float:
+    """Mean time of REPEAT calls, in ms"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function(*args)
+    return (time.perf_counter() - start) * 1000 / REPEAT
+
+
+def _toggle_and_read(checked: CheckedLayerSet, layer_id: str) -> None:
+    checked.discard([layer_id])
+    checked.layers()
+    checked.add([layer_id])
+    checked.layers()
+
+
+def _invalidate_and_read(checked: CheckedLayerSet) -> None:
+    checked.invalidate_order()
+    checked.layers()
+
+
+def run() -> dict:
+    project = QgsProject.instance()
+    results = {}
+    for layer_count in LAYER_COUNTS:
+        layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", f"layer_{i}", "memory")
+            for i in range(layer_count)
+        ]
+        project.addMapLayers(layers, False)
+        root = QgsLayerTreeGroup()
+        for start in range(0, layer_count, LAYERS_PER_GROUP):
+            group = root.addGroup(f"group_{start}")
+            for layer in layers[start : start + LAYERS_PER_GROUP]:
+                group.addLayer(layer)
+        checked_ids = [layer.id() for layer in layers[::2]]
+
+        checked = CheckedLayerSet(root)
+        checked.add(checked_ids)
+        checked.layers()
+
+        results[layer_count] = {
+            "tree_walk_ms": _measure(_walk_checked_layers, root, checked_ids),
+            "read_ms": _measure(checked.layers),
+            "toggle_and_read_ms": _measure(
+                _toggle_and_read, checked, checked_ids[len(checked_ids) // 2]
+            ),
+            "read_after_layer_tree_change_ms": _measure(_invalidate_and_read, checked),
+        }
+        project.removeMapLayers([layer.id() for layer in layers])
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
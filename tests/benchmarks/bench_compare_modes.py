@@ -0,0 +1,413 @@
+"""
+Rendering benchmark of every compare mode
+
+Synthetic GeoTIFFs (NumPy + GDAL) and vector layers with many features
+are compared in each mode across the same scripted pans, zooms and
+cursor moves. For each mode are measured:
+- render time: wall time until all maps are rendered after each step
+- render count: render jobs started during the script
+- peak memory: native memory (QImage, GDAL and render buffers included)
+  as the peak RSS of a process running only this mode, and the peak
+  increase of RSS sampled during the mode over the RSS before it started
+
+Each mode is run in its own Python process, so peak RSS of a mode is
+not the one of an earlier mode. Sampled RSS is read from /proc and is
+only reported on Linux.
+
+The mirror mode is measured with a second map canvas synchronized by
+MapSyncEngine and sharing main map renders, as the mirror dock of QGIS
+is not available with the tests/qgis_interface.py stand-in.
+
+Run offscreen inside QGIS python environment, results are printed
+as JSON or written to a file:
+    QT_QPA_PLATFORM=offscreen \\
+    python -m plugin_dir.tests.benchmarks.bench_compare_modes [output.json]
+
+A single mode can be run in the current process with --mode MODE.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+import numpy as np
+from osgeo import gdal, osr
+from qgis.core import (
+    Qgis,
+    QgsFeature,
+    QgsGeometry,
+    QgsLayerTreeMapCanvasBridge,
+    QgsMapThemeCollection,
+    QgsPointXY,
+    QgsProject,
+    QgsRasterLayer,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QT_VERSION_STR, QCoreApplication, QPoint, QSize
+from qgis.PyQt.QtTest import QTest
+
+from ...comparator import process
+from ...comparator.process import (
+    compare_with_compositor,
+    compare_with_mask,
+    stop_compare_with_compositor,
+    stop_compare_with_mask,
+)
+from ...comparator.shared_cache import MirrorSharedRenderCache
+from ...comparator.sync import MapSyncEngine
+from ..utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+CANVAS_SIZE = QSize(1280, 800)
+# synthetic data covers 0..DATA_SIZE meters in EPSG:3857
+DATA_SIZE = 200000
+RASTER_EPOCH_COUNT = 3
+RASTER_PIXEL_COUNT = 2048
+POINT_COUNT = 100000
+POLYGON_COUNT = 10000
+CURSOR_MOVE_COUNT = 50
+# a step is done when no map is rendering after this idle time (ms)
+IDLE_TIME = 50
+STEP_TIMEOUT = 60
+
+MODES = [
+    "vsplit",
+    "hsplit",
+    "lens-circle",
+    "lens-square",
+    "vsplit-compositing",
+    "hsplit-compositing",
+    "lens-circle-compositing",
+    "lens-square-compositing",
+    "mirror",
+]
+
+
+def _write_geotiff(path: str, seed: int) -> None:
+    """RGB GeoTIFF of a gradient with noise, different for each seed"""
+    rng = np.random.default_rng(seed)
+    size = RASTER_PIXEL_COUNT
+    gradient = np.linspace(0, 255, size, dtype=np.float32)
+    driver = gdal.GetDriverByName("GTiff")
+    dataset = driver.Create(
+        path, size, size, 3, gdal.GDT_Byte, options=["TILED=YES", "COMPRESS=NONE"]
+    )
+    dataset.SetGeoTransform([0, DATA_SIZE / size, 0, DATA_SIZE, 0, -DATA_SIZE / size])
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(3857)
+    dataset.SetProjection(srs.ExportToWkt())
+    for band_index in range(3):
+        noise = rng.normal(0, 30, (size, size)).astype(np.float32)
+        base = np.roll(gradient, seed * 100 + band_index * 500)[np.newaxis, :]
+        band = np.clip(base + noise, 0, 255).astype(np.uint8)
+        dataset.GetRasterBand(band_index + 1).WriteArray(band)
+    dataset.FlushCache()
+    dataset = None
+
+
+def _point_layer() -> QgsVectorLayer:
+    rng = np.random.default_rng(0)
+    coordinates = rng.uniform(0, DATA_SIZE, (POINT_COUNT, 2))
+    layer = QgsVectorLayer("Point?crs=EPSG:3857", "points", "memory")
+    features = []
+    for x, y in coordinates:
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)))
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
+    return layer
+
+
+def _polygon_layer() -> QgsVectorLayer:
+    rng = np.random.default_rng(1)
+    centers = rng.uniform(0, DATA_SIZE, (POLYGON_COUNT, 2))
+    radius = DATA_SIZE / 200
+    layer = QgsVectorLayer("Polygon?crs=EPSG:3857", "polygons", "memory")
+    features = []
+    for x, y in centers:
+        feature = QgsFeature()
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, y)).buffer(radius, 8))
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
+    return layer
+
+
+def _rss_bytes():
+    """Current resident memory of this process, None if not on Linux"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _peak_rss_bytes() -> int:
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+class _RssPeak:
+    """Peak resident memory sampled while renders are waited for"""
+
+    def __init__(self):
+        self.baseline = _rss_bytes()
+        self.peak = self.baseline
+
+    def sample(self) -> None:
+        if self.baseline is not None:
+            self.peak = max(self.peak, _rss_bytes())
+
+    @property
+    def increase(self):
+        if self.baseline is None:
+            return None
+        return self.peak - self.baseline
+
+
+def _canvases_idle(canvases, compositor) -> bool:
+    if any(canvas.isDrawing() for canvas in canvases):
+        return False
+    if compositor is not None and compositor.is_running:
+        renderers = [compositor.base_renderer, compositor.compare_renderer]
+        return all(renderer._job is None for renderer in renderers)
+    return True
+
+
+def _wait_idle(canvases, rss_peak=None) -> float:
+    """Wait for all renders to finish, return elapsed time in ms"""
+    start = time.perf_counter()
+    deadline = time.time() + STEP_TIMEOUT
+    idle_since = None
+    while time.time() < deadline:
+        QCoreApplication.processEvents()
+        if rss_peak is not None:
+            rss_peak.sample()
+        if _canvases_idle(canvases, process.compositor):
+            idle_since = idle_since or time.perf_counter()
+            if (time.perf_counter() - idle_since) * 1000 >= IDLE_TIME:
+                break
+        else:
+            idle_since = None
+        time.sleep(0.001)
+    # idle time is waiting, not rendering
+    return (time.perf_counter() - start) * 1000 - IDLE_TIME
+
+
+def _script(canvas: QgsMapCanvas) -> list:
+    """Scripted interactions: (name, function) steps"""
+    viewport = canvas.viewport()
+
+    def pan(dx, dy):
+        def step():
+            extent = canvas.extent()
+            width = extent.width()
+            height = extent.height()
+            canvas.setExtent(
+                QgsRectangle(
+                    extent.xMinimum() + width * dx,
+                    extent.yMinimum() + height * dy,
+                    extent.xMaximum() + width * dx,
+                    extent.yMaximum() + height * dy,
+                )
+            )
+            canvas.refresh()
+
+        return step
+
+    def zoom(factor):
+        def step():
+            canvas.zoomByFactor(factor)
+
+        return step
+
+    def cursor_moves():
+        height = viewport.height() // 2
+        for i in range(CURSOR_MOVE_COUNT):
+            x = int(viewport.width() * (i + 1) / (CURSOR_MOVE_COUNT + 1))
+            QTest.mouseMove(viewport, QPoint(x, height))
+            QCoreApplication.processEvents()
+
+    return [
+        ("pan_east", pan(0.25, 0)),
+        ("pan_north", pan(0, 0.25)),
+        ("zoom_in", zoom(0.5)),
+        ("zoom_in_again", zoom(0.5)),
+        ("cursor_moves", cursor_moves),
+        ("zoom_out", zoom(4)),
+        ("pan_south_west", pan(-0.25, -0.25)),
+        ("cursor_moves_again", cursor_moves),
+    ]
+
+
+def _start_mode(mode: str, compare_layers: list, base_layers: list):
+    """Start a compare mode, return (render counter mode, extra canvases, stop)"""
+    if mode == "mirror":
+        return _start_mirror(compare_layers, base_layers)
+
+    compositing = mode.endswith("-compositing")
+    name = mode.replace("-compositing", "")
+    method = {"vsplit": "vertical", "hsplit": "horizontal"}.get(name, "lens")
+    lens_shape = "square" if name == "lens-square" else "circle"
+
+    if compositing:
+        compare_with_compositor(compare_layers, method, lens_shape=lens_shape)
+        return f"{method}-compositing", [], stop_compare_with_compositor
+    compare_with_mask(compare_layers, method, lens_shape=lens_shape)
+    return method, [], stop_compare_with_mask
+
+
+def _start_mirror(compare_layers: list, base_layers: list):
+    project = QgsProject.instance()
+    record = QgsMapThemeCollection.MapThemeRecord()
+    record.setLayerRecords(
+        [
+            QgsMapThemeCollection.MapThemeLayerRecord(layer)
+            for layer in compare_layers + base_layers
+        ]
+    )
+    project.mapThemeCollection().insert("benchmark mirror", record)
+
+    mirror_canvas = QgsMapCanvas(PARENT)
+    mirror_canvas.resize(QSize(CANVAS_SIZE.width() // 2, CANVAS_SIZE.height()))
+    mirror_canvas.show()
+    mirror_canvas.setDestinationCrs(CANVAS.mapSettings().destinationCrs())
+    mirror_canvas.setTheme("benchmark mirror")
+    process.render_counter.attach(mirror_canvas)
+    process.render_counter.set_mode("mirror")
+
+    sync_engine = MapSyncEngine(CANVAS)
+    sync_engine.add_canvas(mirror_canvas)
+    sync_engine.sync_from(CANVAS)
+    shared_cache = MirrorSharedRenderCache(CANVAS, mirror_canvas)
+    shared_cache.start("benchmark mirror")
+
+    def stop():
+        shared_cache.stop()
+        sync_engine.stop()
+        process.render_counter.detach(mirror_canvas)
+        project.mapThemeCollection().removeMapTheme("benchmark mirror")
+        mirror_canvas.hide()
+        mirror_canvas.deleteLater()
+
+    return "mirror", [mirror_canvas], stop
+
+
+def _run_mode(mode: str, compare_layers: list, base_layers: list) -> dict:
+    CANVAS.setExtent(QgsRectangle(0, 0, DATA_SIZE, DATA_SIZE))
+    CANVAS.refresh()
+    _wait_idle([CANVAS])
+
+    rss_peak = _RssPeak()
+    counter_mode, extra_canvases, stop = _start_mode(mode, compare_layers, base_layers)
+    canvases = [CANVAS, *extra_canvases]
+    setup_time = _wait_idle(canvases, rss_peak)
+
+    process.render_counter.reset()
+    steps = {}
+    for name, step in _script(CANVAS):
+        step()
+        rss_peak.sample()
+        steps[name] = _wait_idle(canvases, rss_peak)
+    render_count = process.render_counter.count(counter_mode)
+
+    stop()
+    _wait_idle([CANVAS])
+
+    return {
+        "setup_render_time_ms": setup_time,
+        "render_time_ms": sum(steps.values()),
+        "step_render_time_ms": steps,
+        "render_count": render_count,
+        "peak_rss_increase_bytes": rss_peak.increase,
+    }
+
+
+def run_mode(mode: str) -> dict:
+    """Run one mode in this process"""
+    project = QgsProject.instance()
+    bridge = QgsLayerTreeMapCanvasBridge(project.layerTreeRoot(), CANVAS)
+    CANVAS.resize(CANVAS_SIZE)
+    CANVAS.show()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        epochs = []
+        for i in range(RASTER_EPOCH_COUNT):
+            path = os.path.join(data_dir, f"epoch_{i}.tif")
+            _write_geotiff(path, i)
+            epochs.append(QgsRasterLayer(path, f"epoch_{i}"))
+        vector_layers = [_point_layer(), _polygon_layer()]
+        project.addMapLayers(vector_layers + epochs)
+        # compare the newest epoch and the points with the other layers
+        compare_layers = [epochs[-1], vector_layers[0]]
+        base_layers = [vector_layers[1], *epochs[:-1]]
+
+        with patch.object(process, "iface", IFACE):
+            result = _run_mode(mode, compare_layers, base_layers)
+
+        project.removeAllMapLayers()
+
+    del bridge
+    # includes data generation, the same in every mode
+    result["peak_rss_bytes"] = _peak_rss_bytes()
+    return result
+
+
+def _run_mode_process(mode: str) -> dict:
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_path = os.path.join(output_dir, f"{mode}.json")
+        subprocess.run(
+            [sys.executable, "-m", __spec__.name, "--mode", mode, output_path],
+            check=True,
+        )
+        with open(output_path) as f:
+            return json.load(f)
+
+
+def run() -> dict:
+    """Run every mode in its own process"""
+    results = {mode: _run_mode_process(mode) for mode in MODES}
+    return {
+        "environment": {
+            "qgis_version": Qgis.version(),
+            "qt_version": QT_VERSION_STR,
+            "python_version": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "parameters": {
+            "canvas_size": [CANVAS_SIZE.width(), CANVAS_SIZE.height()],
+            "raster_epoch_count": RASTER_EPOCH_COUNT,
+            "raster_pixel_count": RASTER_PIXEL_COUNT,
+            "point_count": POINT_COUNT,
+            "polygon_count": POLYGON_COUNT,
+            "cursor_move_count": CURSOR_MOVE_COUNT,
+        },
+        "modes": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output", nargs="?")
+    parser.add_argument("--mode", choices=MODES)
+    args = parser.parse_args()
+
+    output = json.dumps(run_mode(args.mode) if args.mode else run(), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
@@ -0,0 +1,149 @@
+"""
+Microbenchmark of split compare setup with many compare layers
+
+Compare layer group is filled at once, or in background by compare_setup.
+For each layer count are measured the total setup time and the longest
+event loop turn, during which QGIS doesn't respond. Mirror theme creation
+by toggling layer tree visibility is compared with map_theme_record.
+
+Run offscreen inside QGIS python environment:
+    QT_QPA_PLATFORM=offscreen \\
+    python -m plugin_dir.tests.benchmarks.bench_compare_setup
+"""
+
+import json
+import time
+from unittest.mock import patch
+
+from qgis.core import (
+    QgsLayerTreeGroup,
+    QgsLayerTreeLayer,
+    QgsLayerTreeModel,
+    QgsMapThemeCollection,
+    QgsProject,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QCoreApplication
+
+from ...comparator import process
+from ...comparator.process import (
+    compare_setup,
+    compare_with_mask,
+    stop_compare_with_mask,
+)
+from ...comparator.utils import map_theme_record
+from ..utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+LAYER_COUNTS = [100, 500, 1000]
+
+
+def _setup_at_once(layers: list) -> dict:
+    start = time.perf_counter()
+    compare_with_mask(layers, "vertical")
+    total_ms = (time.perf_counter() - start) * 1000
+    return {"total_ms": total_ms, "longest_turn_ms": total_ms}
+
+
+def _setup_in_background(layers: list) -> dict:
+    start = time.perf_counter()
+    compare_with_mask(layers, "vertical", asynchronous=True)
+    longest_turn_ms = (time.perf_counter() - start) * 1000
+    while compare_setup.is_running:
+        turn_start = time.perf_counter()
+        QCoreApplication.processEvents()
+        longest_turn_ms = max(
+            longest_turn_ms, (time.perf_counter() - turn_start) * 1000
+        )
+    return {
+        "total_ms": (time.perf_counter() - start) * 1000,
+        "longest_turn_ms": longest_turn_ms,
+    }
+
+
+# former mirror theme creation, toggling layer tree visibility
+
+
+def _visible_layers(node=None) -> list:
+    """
+    Recursively gather all layers that are marked as visible
+    under the given layer tree node (defaults to project root).
+    Returns a list of QgsMapLayer objects.
+    """
+    if node is None:
+        node = QgsProject.instance().layerTreeRoot()
+
+    visible_layers = []
+
+    for child in node.children():
+        if isinstance(child, QgsLayerTreeGroup):
+            # Recurse into sub-groups
+            visible_layers.extend(_visible_layers(child))
+        elif isinstance(child, QgsLayerTreeLayer):
+            # If the layer node is visible in the layer tree
+            if child.isVisible():
+                visible_layers.append(child.layer())
+
+    return visible_layers
+
+
+def _toggle_layers(layers_to_display: list) -> None:
+    """
+    Make visible only a list a layer set as input
+    """
+    root = QgsProject.instance().layerTreeRoot()
+    layer_to_display_ids = [layer.id() for layer in layers_to_display]
+
+    for child in root.children():
+        if isinstance(child, QgsLayerTreeLayer):
+            if child.layerId() in layer_to_display_ids:
+                child.setItemVisibilityChecked(True)
+            else:
+                child.setItemVisibilityChecked(False)
+
+
+def _theme_by_toggling(layers: list) -> float:
+    start = time.perf_counter()
+    visible_layers = _visible_layers()
+    _toggle_layers(layers)
+    root = QgsProject.instance().layerTreeRoot()
+    QgsMapThemeCollection.createThemeFromCurrentState(root, QgsLayerTreeModel(root))
+    _toggle_layers(visible_layers)
+    return (time.perf_counter() - start) * 1000
+
+
+def _theme_record(layers: list) -> float:
+    start = time.perf_counter()
+    map_theme_record(layers)
+    return (time.perf_counter() - start) * 1000
+
+
+def run() -> dict:
+    project = QgsProject.instance()
+    results = {}
+    with patch.object(process, "iface", IFACE):
+        for layer_count in LAYER_COUNTS:
+            layers = [
+                QgsVectorLayer("Point?crs=EPSG:3857", f"layer_{i}", "memory")
+                for i in range(layer_count)
+            ]
+            project.addMapLayers(layers)
+
+            at_once = _setup_at_once(layers)
+            stop_compare_with_mask()
+            in_background = _setup_in_background(layers)
+            stop_compare_with_mask()
+
+            results[layer_count] = {
+                "at_once": at_once,
+                "in_background": in_background,
+                "theme_by_toggling_ms": _theme_by_toggling(layers),
+                "theme_record_ms": _theme_record(layers),
+            }
+            project.removeMapLayers([layer.id() for layer in layers])
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
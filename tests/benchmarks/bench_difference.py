@@ -0,0 +1,79 @@
+"""
+Difference mode computation time on a 4K canvas
+
+Base and compare images are random 3840 x 2160 images, like two renders
+of the map. Each case runs the difference computation as done by
+DifferenceTask, off the GUI thread:
+- first_images: images read into arrays, then absolute difference
+- threshold_change: difference again of the same arrays, with a threshold
+
+Run inside QGIS python environment:
+    python -m plugin_dir.tests.benchmarks.bench_difference
+"""
+
+import json
+import statistics
+import time
+
+import numpy as np
+
+from ...comparator.difference import (
+    DifferenceTask,
+    array_to_image,
+)
+from ..utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+IMAGE_WIDTH = 3840
+IMAGE_HEIGHT = 2160
+RUN_COUNT = 10
+THRESHOLD = 32
+
+
+def _random_image(rng):
+    array = rng.integers(0, 256, (IMAGE_HEIGHT, IMAGE_WIDTH, 4), dtype=np.uint8)
+    array[..., 3] = 255
+    return array_to_image(array)
+
+
+def _summary(times: list) -> dict:
+    return {
+        "time_mean_ms": statistics.mean(times),
+        "time_median_ms": statistics.median(times),
+        "time_max_ms": max(times),
+    }
+
+
+def _run_task(task: DifferenceTask) -> float:
+    """Run the task body in this thread, return time in ms"""
+    start = time.perf_counter()
+    assert task.run()
+    return (time.perf_counter() - start) * 1000
+
+
+def run() -> dict:
+    rng = np.random.default_rng(0)
+    base_image = _random_image(rng)
+    compare_image = _random_image(rng)
+
+    first_images = []
+    threshold_change = []
+    for _ in range(RUN_COUNT):
+        task = DifferenceTask(base_image, compare_image, 0)
+        first_images.append(_run_task(task))
+        task = DifferenceTask(base_image, compare_image, THRESHOLD, task.arrays)
+        threshold_change.append(_run_task(task))
+
+    return {
+        "image_size": [IMAGE_WIDTH, IMAGE_HEIGHT],
+        "run_count": RUN_COUNT,
+        "results": {
+            "first_images": _summary(first_images),
+            "threshold_change": _summary(threshold_change),
+        },
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,110 @@
+"""
+Microbenchmark of the layer panel model with many layers
+
+For each layer count are measured the model reset (top level rows only),
+the expansion of one group, and name searches with the word prefix index
+compared with a scan of all layer names. Searches and set_filter (search
+and model reset) are reported against the target of 1 ms.
+
+Run inside QGIS python environment:
+    python -m plugin_dir.tests.benchmarks.bench_layer_model
+"""
+
+import json
+import time
+
+from qgis.core import QgsLayerTreeGroup, QgsProject, QgsVectorLayer
+from qgis.PyQt.QtCore import QModelIndex
+
+from ...comparator.layer_model import CompareLayerModel, name_words
+from ..utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+LAYER_COUNTS = [1000, 5000, 10000]
+LAYERS_PER_GROUP = 100
+QUERIES = ["r", "roa", "roads 12", "river 99", "missing"]
+SEARCH_TARGET_MS = 1.0
+REPEAT = 20
+
+
+def _layer_name(i: int) -> str:
+    kind = ["roads", "rivers", "buildings"][i % 3]
+    return f"{kind} {i}"
+
+
+def _scan_search(names: dict, text: str) -> list:
+    query_words = name_words(text)
+    return [
+        layer_id
+        for layer_id, name in names.items()
+        if all(
+            any(word.startswith(query_word) for word in name_words(name))
+            for query_word in query_words
+        )
+    ]
+
+
+def _measure(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def _measure_mean(function, *args) -> float:
+    """Mean time of REPEAT calls, in ms"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function(*args)
+    return (time.perf_counter() - start) * 1000 / REPEAT
+
+
+def _search_result(model: CompareLayerModel, names: dict, query: str) -> dict:
+    index_ms = _measure_mean(model.name_index.search, query)
+    set_filter_ms = _measure_mean(model.set_filter, query)
+    model.set_filter("")
+    return {
+        "index": index_ms,
+        "set_filter": set_filter_ms,
+        "scan": _measure(_scan_search, names, query),
+        "within_target": set_filter_ms < SEARCH_TARGET_MS,
+    }
+
+
+def run() -> dict:
+    project = QgsProject.instance()
+    results = {}
+    for layer_count in LAYER_COUNTS:
+        layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", _layer_name(i), "memory")
+            for i in range(layer_count)
+        ]
+        project.addMapLayers(layers, False)
+        root = QgsLayerTreeGroup()
+        for start in range(0, layer_count, LAYERS_PER_GROUP):
+            group = root.addGroup(f"group_{start}")
+            for layer in layers[start : start + LAYERS_PER_GROUP]:
+                group.addLayer(layer)
+        names = {layer.id(): layer.name() for layer in layers}
+
+        model_start = time.perf_counter()
+        model = CompareLayerModel(root)
+        create_ms = (time.perf_counter() - model_start) * 1000
+        reset_ms = _measure(model.reset)
+        expand_ms = _measure(model.fetchMore, model.index(0, 0, QModelIndex()))
+
+        results[layer_count] = {
+            "create_ms": create_ms,
+            "reset_ms": reset_ms,
+            "expand_group_ms": expand_ms,
+            "search_target_ms": SEARCH_TARGET_MS,
+            "search_ms": {
+                query: _search_result(model, names, query) for query in QUERIES
+            },
+        }
+        project.removeMapLayers(list(names))
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,105 @@
+"""
+Microbenchmark of layer tree rename signal connections on panel rebuild
+
+Compare the former disconnect/connect churn on every node with
+LayerTreeConnectionRegistry, for a first rebuild and for a rebuild
+where only a few nodes changed.
+
+Run inside QGIS python environment:
+    python -m plugin_dir.tests.benchmarks.bench_layer_tree_connections
+"""
+
+import json
+import time
+
+from qgis.core import QgsLayerTreeGroup
+from qgis.PyQt.QtCore import QObject
+
+from ...comparator.layer_tree import LayerTreeConnectionRegistry
+from ..utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+GROUP_COUNT = 100
+CHILDREN_PER_GROUP = 50
+CHANGED_NODE_COUNT = 10
+
+
+class _Receiver(QObject):
+    def on_name_changed(self, node, name):
+        pass
+
+
+def _build_tree() -> QgsLayerTreeGroup:
+    root = QgsLayerTreeGroup("root")
+    for i in range(GROUP_COUNT):
+        group = root.addGroup(f"group_{i}")
+        for j in range(CHILDREN_PER_GROUP):
+            group.addGroup(f"child_{i}_{j}")
+    return root
+
+
+def _walk(node):
+    for child in node.children():
+        yield child
+        yield from _walk(child)
+
+
+def _churn(nodes, slot) -> None:
+    """former behavior: disconnect then connect every node"""
+    for node in nodes:
+        try:
+            node.nameChanged.disconnect(slot)
+        except TypeError:
+            pass
+        node.nameChanged.connect(slot)
+
+
+def _timed(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def run() -> dict:
+    root = _build_tree()
+    receiver = _Receiver()
+
+    # churn: first and second rebuilds cost the same
+    nodes = list(_walk(root))
+    churn_first_ms = _timed(_churn, nodes, receiver.on_name_changed)
+    churn_again_ms = _timed(_churn, nodes, receiver.on_name_changed)
+    for node in nodes:
+        node.nameChanged.disconnect(receiver.on_name_changed)
+
+    # registry: second rebuild only connects changed nodes
+    registry = LayerTreeConnectionRegistry(receiver.on_name_changed)
+
+    def connect_all():
+        for node in _walk(root):
+            registry.connect(node)
+
+    registry_first_ms = _timed(connect_all)
+
+    # a few nodes are removed and added
+    removed = root.children()[:CHANGED_NODE_COUNT]
+    for group in removed:
+        root.removeChildNode(group)
+    for i in range(CHANGED_NODE_COUNT):
+        root.addGroup(f"new_group_{i}")
+
+    registry_again_ms = _timed(connect_all)
+
+    return {
+        "node_count": len(nodes),
+        "changed_node_count": CHANGED_NODE_COUNT,
+        "churn_first_rebuild_ms": churn_first_ms,
+        "churn_next_rebuild_ms": churn_again_ms,
+        "registry_first_rebuild_ms": registry_first_ms,
+        "registry_next_rebuild_ms": registry_again_ms,
+        "registry_connected_node_count": len(registry),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,214 @@
+"""
+Mask rendering: geometry generator expressions versus precomputed geometry
+
+The expression path is the former mask layer: no feature, inverted polygon
+renderer and a geometry generator symbol evaluated on every render.
+The precomputed path is MaskGeometryEngine writing the mask geometry of
+the current extent and cursor point in a single feature rendered with a
+plain fill.
+
+Both mask layers are rendered alone for the same lens cursor moves and
+split pans. Frame time includes the geometry update of the precomputed path.
+
+Run inside QGIS python environment:
+    python -m plugin_dir.tests.benchmarks.bench_mask_geometry
+"""
+
+import json
+import statistics
+import time
+
+from qgis.core import (
+    QgsExpressionContextScope,
+    QgsFillSymbol,
+    QgsGeometry,
+    QgsGeometryGeneratorSymbolLayer,
+    QgsInvertedPolygonRenderer,
+    QgsMapRendererSequentialJob,
+    QgsPointXY,
+    QgsProject,
+    QgsRectangle,
+    QgsSingleSymbolRenderer,
+    QgsVectorLayer,
+)
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QSize
+
+from ...comparator.constants import lens_max_size_rate, lens_min_size_rate
+from ...comparator.mask import MaskGeometryEngine
+from ..utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+CANVAS_SIZE = QSize(1280, 800)
+FRAME_COUNT = 200
+LENS_SHAPE = "circle"
+LENS_SIZE_RATE = 0.15
+
+# geometry generator expressions of the former mask layer
+VERTICAL_SPLIT_EXPRESSION = """make_rectangle_3points(
+        make_point(x(@map_extent_center), y(@map_extent_center) - (@map_extent_height / 2)),
+        make_point(x(@map_extent_center), y(@map_extent_center) + (@map_extent_height / 2)),
+        make_point(x(@map_extent_center) + (@map_extent_width / 2), y(@map_extent_center) + (@map_extent_height / 2)),
+        0)"""
+
+
+def _lens_geometry_expression(shape: str, rate: float) -> str:
+    """Lens geometry expression for the given shape and size rate"""
+    rate = max(lens_min_size_rate, min(lens_max_size_rate, rate))
+    if shape == "square":
+        cx = "x(@canvas_cursor_point)"
+        cy = "y(@canvas_cursor_point)"
+        offset = f"@map_extent_width * {rate}"
+        bottom_left = f"make_point({cx} - {offset}, {cy} - {offset})"
+        top_left = f"make_point({cx} - {offset}, {cy} + {offset})"
+        top_right = f"make_point({cx} + {offset}, {cy} + {offset})"
+        return f"make_rectangle_3points({bottom_left}, {top_left}, {top_right}, 0)"
+    return f"buffer(@canvas_cursor_point, @map_extent_width * {rate})"
+
+
+def _expression_mask_layer(expression: str) -> QgsVectorLayer:
+    layer = QgsVectorLayer("Polygon?crs=EPSG:3857", "expression mask", "memory")
+    geometry_generator = QgsGeometryGeneratorSymbolLayer.create(
+        {
+            "geometryModifier": expression,
+            "geometry_type": 2,  # Polygon
+            "extent": "",
+            "color": "white",
+            "outline_style": "no",
+        }
+    )
+    symbol = QgsFillSymbol.createSimple({})
+    symbol.changeSymbolLayer(0, geometry_generator)
+    layer.setRenderer(QgsInvertedPolygonRenderer(QgsSingleSymbolRenderer(symbol)))
+    return layer
+
+
+def _precomputed_mask_layer() -> QgsVectorLayer:
+    layer = QgsVectorLayer("Polygon?crs=EPSG:3857", "precomputed mask", "memory")
+    symbol = QgsFillSymbol.createSimple({"color": "white", "outline_style": "no"})
+    layer.setRenderer(QgsSingleSymbolRenderer(symbol))
+    return layer
+
+
+def _render_frames(canvas: QgsMapCanvas, layer: QgsVectorLayer, steps) -> list:
+    """
+    Apply each step then render the mask layer, return frame times in ms
+    A step returns the cursor point, set in expression context like the canvas
+    """
+    frame_times = []
+    for step in steps:
+        start = time.perf_counter()
+        point = step()
+        settings = canvas.mapSettings()
+        settings.setLayers([layer])
+        if point is not None:
+            scope = QgsExpressionContextScope()
+            scope.setVariable("canvas_cursor_point", QgsGeometry.fromPointXY(point))
+            context = settings.expressionContext()
+            context.appendScope(scope)
+            settings.setExpressionContext(context)
+        job = QgsMapRendererSequentialJob(settings)
+        job.start()
+        job.waitForFinished()
+        frame_times.append((time.perf_counter() - start) * 1000)
+    return frame_times
+
+
+def _summary(frame_times: list) -> dict:
+    frame_times = sorted(frame_times)
+    return {
+        "frame_time_mean_ms": statistics.mean(frame_times),
+        "frame_time_median_ms": statistics.median(frame_times),
+        "frame_time_p95_ms": frame_times[int(len(frame_times) * 0.95)],
+    }
+
+
+def _lens_steps(canvas: QgsMapCanvas, engine=None) -> list:
+    extent = canvas.mapSettings().visibleExtent()
+
+    def move(i):
+        def step():
+            point = QgsPointXY(
+                extent.xMinimum() + extent.width() * i / FRAME_COUNT,
+                extent.center().y(),
+            )
+            if engine is not None:
+                engine.set_cursor_point(point)
+            return point
+
+        return step
+
+    return [move(i) for i in range(FRAME_COUNT)]
+
+
+def _pan_steps(canvas: QgsMapCanvas) -> list:
+    def pan(i):
+        def step():
+            canvas.setExtent(QgsRectangle(i * 10, 0, i * 10 + 100000, 62500))
+
+        return step
+
+    return [pan(i) for i in range(FRAME_COUNT)]
+
+
+def run() -> dict:
+    canvas = QgsMapCanvas(PARENT)
+    canvas.resize(CANVAS_SIZE)
+    canvas.show()
+    canvas.setExtent(QgsRectangle(0, 0, 100000, 62500))
+
+    lens_expression_layer = _expression_mask_layer(
+        _lens_geometry_expression(LENS_SHAPE, LENS_SIZE_RATE)
+    )
+    split_expression_layer = _expression_mask_layer(VERTICAL_SPLIT_EXPRESSION)
+    precomputed_layer = _precomputed_mask_layer()
+    QgsProject.instance().addMapLayers(
+        [lens_expression_layer, split_expression_layer, precomputed_layer], False
+    )
+    canvas.setDestinationCrs(precomputed_layer.crs())
+
+    engine = MaskGeometryEngine(canvas)
+    engine.set_mask_layers([precomputed_layer])
+
+    results = {}
+    results["lens_expression"] = _summary(
+        _render_frames(canvas, lens_expression_layer, _lens_steps(canvas))
+    )
+    engine.configure("lens", LENS_SHAPE, LENS_SIZE_RATE)
+    engine.start()
+    results["lens_precomputed"] = _summary(
+        _render_frames(canvas, precomputed_layer, _lens_steps(canvas, engine))
+    )
+    engine.stop()
+
+    results["split_expression"] = _summary(
+        _render_frames(canvas, split_expression_layer, _pan_steps(canvas))
+    )
+    engine.set_mask_layers([precomputed_layer])
+    engine.configure("vertical")
+    engine.start()
+    results["split_precomputed"] = _summary(
+        _render_frames(canvas, precomputed_layer, _pan_steps(canvas))
+    )
+    engine.stop()
+
+    QgsProject.instance().removeMapLayers(
+        [
+            lens_expression_layer.id(),
+            split_expression_layer.id(),
+            precomputed_layer.id(),
+        ]
+    )
+    canvas.hide()
+
+    return {
+        "canvas_size": [CANVAS_SIZE.width(), CANVAS_SIZE.height()],
+        "frame_count": FRAME_COUNT,
+        "lens_shape": LENS_SHAPE,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
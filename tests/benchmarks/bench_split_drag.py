@@ -0,0 +1,116 @@
+"""
+Frame time of a split divider drag across the full canvas width
+with cached compositing
+
+Each frame sends a mouse move to the canvas viewport and repaints it
+synchronously. Base and compare layers are rendered for the whole map
+once when the drag starts, no render is expected during the drag.
+
+Run inside QGIS python environment:
+    python -m plugin_dir.tests.benchmarks.bench_split_drag
+"""
+
+import json
+import random
+import statistics
+import time
+
+from qgis.core import QgsFeature, QgsGeometry, QgsPointXY, QgsProject, QgsVectorLayer
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QCoreApplication, QPoint, QSize, Qt
+from qgis.PyQt.QtTest import QTest
+
+from ...comparator.compositor import CompareCompositor
+from ...comparator.telemetry import RenderCounter
+from ..utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+CANVAS_SIZE = QSize(1600, 900)
+LAYER_COUNT = 4
+FEATURES_PER_LAYER = 50000
+RENDER_TIMEOUT = 60
+
+
+def _point_layer(name: str) -> QgsVectorLayer:
+    layer = QgsVectorLayer("Point?crs=EPSG:3857", name, "memory")
+    features = []
+    for _ in range(FEATURES_PER_LAYER):
+        feature = QgsFeature()
+        feature.setGeometry(
+            QgsGeometry.fromPointXY(
+                QgsPointXY(random.uniform(0, 100000), random.uniform(0, 100000))
+            )
+        )
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    layer.updateExtents()
+    return layer
+
+
+def _wait_images(compositor: CompareCompositor) -> None:
+    deadline = time.time() + RENDER_TIMEOUT
+    renderers = [compositor.base_renderer, compositor.compare_renderer]
+    while time.time() < deadline and any(r._job is not None for r in renderers):
+        QCoreApplication.processEvents()
+
+
+def run() -> dict:
+    random.seed(0)
+    layers = [_point_layer(f"layer_{i}") for i in range(LAYER_COUNT)]
+    QgsProject.instance().addMapLayers(layers)
+
+    canvas = QgsMapCanvas(PARENT)
+    canvas.resize(CANVAS_SIZE)
+    canvas.show()
+    canvas.setLayers(layers)
+    canvas.setExtent(layers[0].extent())
+
+    compositor = CompareCompositor(canvas)
+    compositor.start(layers[: LAYER_COUNT // 2], "vertical")
+    _wait_images(compositor)
+
+    render_counter = RenderCounter()
+    render_counter.attach(compositor.base_renderer)
+    render_counter.attach(compositor.compare_renderer)
+
+    viewport = canvas.viewport()
+    y = viewport.height() // 2
+    x = viewport.width() // 2
+    left = Qt.MouseButton.LeftButton
+    no_modifier = Qt.KeyboardModifier.NoModifier
+
+    frame_times = []
+    QTest.mousePress(viewport, left, no_modifier, QPoint(x, y))
+    # split renders only each side of the divider: whole map images are
+    # rendered once when the drag starts
+    _wait_images(compositor)
+    renders_on_drag_start = render_counter.count("inactive")
+    render_counter.reset()
+    # drag to the left edge, then across the full width
+    path = list(range(x, -1, -4)) + list(range(0, viewport.width(), 4))
+    for x in path:
+        start = time.perf_counter()
+        QTest.mouseMove(viewport, QPoint(x, y))
+        viewport.repaint()
+        frame_times.append((time.perf_counter() - start) * 1000)
+    QTest.mouseRelease(viewport, left, no_modifier, QPoint(x, y))
+
+    compositor.stop()
+    QgsProject.instance().removeMapLayers([layer.id() for layer in layers])
+
+    frame_times.sort()
+    return {
+        "canvas_size": [CANVAS_SIZE.width(), CANVAS_SIZE.height()],
+        "feature_count": LAYER_COUNT * FEATURES_PER_LAYER,
+        "frame_count": len(frame_times),
+        "frame_time_mean_ms": statistics.mean(frame_times),
+        "frame_time_p95_ms": frame_times[int(len(frame_times) * 0.95)],
+        "frame_time_max_ms": frame_times[-1],
+        "renders_on_drag_start": renders_on_drag_start,
+        "renders_during_drag": render_counter.count("inactive"),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
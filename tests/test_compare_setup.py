@@ -0,0 +1,256 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from qgis.core import (
+    QgsCategorizedSymbolRenderer,
+    QgsLayerTreeGroup,
+    QgsMarkerSymbol,
+    QgsProject,
+    QgsRendererCategory,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QCoreApplication
+
+from ..comparator import process
+from ..comparator.compare_setup import CompareSetup
+from ..comparator.constants import compare_group_name
+from ..comparator.process import compare_setup, compare_with_mask
+from ..comparator.utils import (
+    group_layer_ids,
+    map_theme_record,
+    plan_group_layers,
+    reconcile_group_layers_steps,
+)
+from .utilities import get_qgis_app, reconcile_group_layers
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+LAYER_COUNT = 200
+
+
+def _wait(setup: CompareSetup, timeout=5):
+    deadline = time.time() + timeout
+    while setup.is_running and time.time() < deadline:
+        QCoreApplication.processEvents()
+
+
+class TestCompareSetup(unittest.TestCase):
+    def setUp(self):
+        self.setup = CompareSetup()
+        self.finished = []
+        self.progress = []
+        self.setup.setupFinished.connect(self.finished.append)
+        self.setup.progressChanged.connect(self.progress.append)
+        self.committed = []
+
+    def tearDown(self):
+        self.setup.cancel()
+
+    def _commit(self, name, step_count):
+        def commit(prepared):
+            for i in range(step_count):
+                self.committed.append((name, prepared, i))
+                yield (i + 1) / step_count
+
+        return commit
+
+    def test_prepare_then_commit_by_batches(self):
+        self.setup.batch_size = 3
+        self.setup.start(sorted, ([3, 1, 2],), self._commit("a", 10))
+        # commit runs on later event loop turns
+        self.assertEqual(self.committed, [])
+
+        _wait(self.setup)
+
+        self.assertEqual(len(self.committed), 10)
+        self.assertEqual(self.committed[0], ("a", [1, 2, 3], 0))
+        self.assertEqual(self.finished, [True])
+        # one progress per batch
+        self.assertEqual(self.progress[0], 0)
+        self.assertEqual(self.progress[-1], 100)
+        self.assertGreaterEqual(len(self.progress), 5)
+
+    def test_superseded_setup_is_not_committed(self):
+        self.setup.start(sorted, ([1],), self._commit("a", 5))
+        self.setup.start(sorted, ([2],), self._commit("b", 5))
+
+        _wait(self.setup)
+
+        self.assertEqual({name for name, _, _ in self.committed}, {"b"})
+        self.assertEqual(self.finished, [False, True])
+
+    def test_cancel_stops_at_next_batch(self):
+        self.setup.batch_size = 2
+        self.setup.start(sorted, ([1],), self._commit("a", 100))
+        deadline = time.time() + 5
+        while not self.committed and time.time() < deadline:
+            QCoreApplication.processEvents()
+
+        self.setup.cancel()
+        committed_count = len(self.committed)
+        for _ in range(10):
+            QCoreApplication.processEvents()
+
+        self.assertEqual(committed_count, 2)
+        self.assertEqual(len(self.committed), committed_count)
+        self.assertFalse(self.setup.is_running)
+        self.assertEqual(self.finished, [False])
+
+
+class TestReconcileGroupLayersSteps(unittest.TestCase):
+    def setUp(self):
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", name, "memory")
+            for name in ["a", "b", "c", "d"]
+        ]
+        QgsProject.instance().addMapLayers(self.layers, False)
+        self.group = QgsLayerTreeGroup("group")
+
+    def tearDown(self):
+        QgsProject.instance().removeMapLayers(
+            [layer.id() for layer in self.layers if layer is not None]
+        )
+
+    def test_stale_plan_is_planned_again(self):
+        a, b, c, d = self.layers
+        plan = plan_group_layers([], [a.id(), b.id()])
+        # group changed since the plan was prepared
+        reconcile_group_layers(self.group, [c])
+
+        for _ in reconcile_group_layers_steps(self.group, [a.id(), b.id()], plan):
+            pass
+
+        self.assertEqual(group_layer_ids(self.group), [a.id(), b.id()])
+
+    def test_layers_removed_meanwhile_are_skipped(self):
+        a, b, c, d = self.layers
+        target_ids = [layer.id() for layer in self.layers]
+        QgsProject.instance().removeMapLayer(b.id())
+        self.layers[1] = None
+
+        progress = list(reconcile_group_layers_steps(self.group, target_ids))
+
+        self.assertEqual(group_layer_ids(self.group), [a.id(), c.id(), d.id()])
+        self.assertEqual(progress[-1], 1.0)
+
+    def test_new_layers_are_inserted_by_chunks(self):
+        target_ids = [layer.id() for layer in self.layers]
+        insertions = []
+        self.group.addedChildren.connect(
+            lambda node, index_from, index_to: insertions.append(
+                index_to - index_from + 1
+            )
+        )
+
+        progress = list(
+            reconcile_group_layers_steps(self.group, target_ids, chunk_size=3)
+        )
+
+        self.assertEqual(group_layer_ids(self.group), target_ids)
+        self.assertEqual(insertions, [3, 1])
+        # one progress step per layer
+        self.assertEqual(progress, [0.25, 0.5, 0.75, 1.0])
+
+
+class TestMapThemeRecord(unittest.TestCase):
+    def test_record_shows_only_input_layers(self):
+        layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", name, "memory")
+            for name in ["a", "b", "c"]
+        ]
+        QgsProject.instance().addMapLayers(layers)
+
+        record = map_theme_record(layers[:2])
+
+        self.assertEqual(
+            [layer_record.layer() for layer_record in record.layerRecords()],
+            layers[:2],
+        )
+        QgsProject.instance().removeMapLayers([layer.id() for layer in layers])
+
+    def test_record_keeps_unchecked_legend_items(self):
+        layer = QgsVectorLayer(
+            "Point?crs=EPSG:3857&field=kind:integer", "categories", "memory"
+        )
+        renderer = QgsCategorizedSymbolRenderer(
+            "kind",
+            [
+                QgsRendererCategory(1, QgsMarkerSymbol(), "one"),
+                QgsRendererCategory(2, QgsMarkerSymbol(), "two"),
+            ],
+        )
+        layer.setRenderer(renderer)
+        QgsProject.instance().addMapLayer(layer)
+        keys = [item.ruleKey() for item in renderer.legendSymbolItems()]
+        renderer.checkLegendSymbolItem(keys[1], False)
+
+        layer_record = map_theme_record([layer]).layerRecords()[0]
+
+        self.assertTrue(layer_record.usingLegendItems)
+        self.assertEqual(set(layer_record.checkedLegendItems), {keys[0]})
+        QgsProject.instance().removeMapLayer(layer.id())
+
+    def test_record_without_unchecked_legend_items(self):
+        layer = QgsVectorLayer("Point?crs=EPSG:3857", "single", "memory")
+        QgsProject.instance().addMapLayer(layer)
+
+        layer_record = map_theme_record([layer]).layerRecords()[0]
+
+        self.assertFalse(layer_record.usingLegendItems)
+        QgsProject.instance().removeMapLayer(layer.id())
+
+
+class TestAsynchronousMaskSetup(unittest.TestCase):
+    def setUp(self):
+        self.project = QgsProject.instance()
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", f"layer_{i}", "memory")
+            for i in range(LAYER_COUNT)
+        ]
+        self.project.addMapLayers(self.layers)
+        self.iface_patcher = patch.object(process, "iface", IFACE)
+        self.iface_patcher.start()
+
+    def tearDown(self):
+        process.stop_compare_with_mask()
+        self.iface_patcher.stop()
+        self.project.removeMapLayers([layer.id() for layer in self.layers])
+
+    def _compare_layer_ids(self):
+        group = self.project.layerTreeRoot().findGroup(compare_group_name)
+        # without mask and background layers
+        return group_layer_ids(group)[1:-1]
+
+    def test_group_is_filled_by_batches(self):
+        compare_with_mask(self.layers, "vertical", asynchronous=True)
+        self.assertTrue(compare_setup.is_running)
+
+        _wait(compare_setup)
+
+        self.assertEqual(
+            self._compare_layer_ids(), [layer.id() for layer in self.layers]
+        )
+
+    def test_new_mode_replaces_running_setup(self):
+        compare_with_mask(self.layers, "vertical", asynchronous=True)
+        compare_with_mask(self.layers[:10], "lens", asynchronous=True)
+
+        _wait(compare_setup)
+
+        self.assertEqual(
+            self._compare_layer_ids(), [layer.id() for layer in self.layers[:10]]
+        )
+
+    def test_stop_cancels_running_setup(self):
+        compare_with_mask(self.layers, "vertical", asynchronous=True)
+
+        process.stop_compare_with_mask()
+        _wait(compare_setup)
+
+        self.assertFalse(compare_setup.is_running)
+        self.assertIsNone(self.project.layerTreeRoot().findGroup(compare_group_name))
+
+
+if __name__ == "__main__":
+    unittest.main()
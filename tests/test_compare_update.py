@@ -0,0 +1,60 @@
+import unittest
+
+from qgis.core import QgsProject, QgsVectorLayer
+from qgis.PyQt.QtCore import QCoreApplication, Qt
+
+from ..qmapcompare_dockwidget import QMapCompareDockWidget
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+GROUP_CHILDREN_COUNT = 50
+
+
+class TestCompareUpdate(unittest.TestCase):
+    def setUp(self):
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", f"layer_{i}", "memory")
+            for i in range(GROUP_CHILDREN_COUNT)
+        ]
+        QgsProject.instance().addMapLayers(self.layers, False)
+
+        # group with many children
+        root = QgsProject.instance().layerTreeRoot()
+        self.group = root.insertGroup(0, "group")
+        for layer in self.layers:
+            self.group.addLayer(layer)
+
+        self.dockwidget = QMapCompareDockWidget()
+        self.dockwidget.process_node()
+        self.layer_model = self.dockwidget.layer_model
+
+        # count compare rebuilds instead of running them
+        self.rebuilds = []
+        self.dockwidget._compare_with_mask = lambda layers, compare_method: (
+            self.rebuilds.append(layers)
+        )
+        self.dockwidget.active_compare_mode = "vsplit"
+
+    def tearDown(self):
+        self.dockwidget.active_compare_mode = "inactive"
+        QgsProject.instance().layerTreeRoot().removeChildNode(self.group)
+        QgsProject.instance().removeMapLayers([layer.id() for layer in self.layers])
+
+    def test_group_toggle_rebuilds_once(self):
+        self.layer_model.setData(
+            self.layer_model.index(0, 0),
+            Qt.CheckState.Checked,
+            Qt.ItemDataRole.CheckStateRole,
+        )
+        # no rebuild before the next event loop turn
+        self.assertEqual(len(self.rebuilds), 0)
+
+        QCoreApplication.processEvents()
+
+        self.assertEqual(len(self.rebuilds), 1)
+        self.assertEqual(len(self.rebuilds[0]), GROUP_CHILDREN_COUNT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from qgis.core import QgsPointXY, QgsRectangle
+
+from .utilities import CompositorTestCase, get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestCompositorRenders(CompositorTestCase):
+    layer_count = 3
+
+    def setUp(self):
+        super().setUp()
+        self.canvas.setExtent(QgsRectangle(0, 0, 1000, 500))
+
+    def _start(self, method):
+        self.compositor.start([self.layers[0]], method)
+        self.wait_renders()
+        self.render_counter.reset()
+
+    def test_canvas_renders_base_layers_only(self):
+        self._start("vertical")
+        self.assertEqual(self.canvas.layers(), [self.layers[1]])
+        self.assertFalse(self.canvas.isFrozen())
+
+        # a layer shown during the session is rendered by the canvas
+        self.canvas.setLayers(self.layers)
+        self.assertEqual(self.canvas.layers(), self.layers[1:])
+
+        self.compositor.stop()
+        self.assertEqual(self.canvas.layers(), self.layers)
+
+    def test_cursor_moves_do_not_render(self):
+        self._start("lens")
+        self.canvas.xyCoordinates.emit(QgsPointXY(450, 300))
+        self.wait_renders()
+        self.render_counter.reset()
+
+        # the lens stays in the rendered region
+        for offset in range(-20, 21, 5):
+            self.canvas.xyCoordinates.emit(QgsPointXY(450 + offset, 300 - offset))
+        self.assertEqual(self.render_count(), 0)
+
+    def test_start_again_reuses_cached_images(self):
+        self._start("difference")
+
+        self.compositor.start([self.layers[0]], "difference")
+        self.assertEqual(self.render_count(), 0)
+
+    def test_extent_and_scale_changes_render(self):
+        self._start("difference")
+
+        self.canvas.setExtent(QgsRectangle(500, 0, 1500, 500))
+        self.assertEqual(self.render_count(), 2)
+
+        self.render_counter.reset()
+        self.canvas.zoomByFactor(0.5)
+        self.assertEqual(self.render_count(), 2)
+
+    def test_layer_set_change_renders_changed_set_only(self):
+        self._start("difference")
+
+        self.canvas.setLayers(self.layers)
+        self.assertEqual(self.render_count(), 1)
+        self.assertEqual(self.compositor.base_renderer.layers, self.layers[1:])
+
+    def test_style_change_renders_layer_set_of_the_layer(self):
+        self._start("difference")
+
+        self.layers[0].emitStyleChanged()
+        self.assertEqual(self.render_count(), 1)
+
+        self.render_counter.reset()
+        self.layers[1].triggerRepaint()
+        self.assertEqual(self.render_count(), 1)
+
+    def test_base_layers_are_not_rendered_by_the_overlay(self):
+        self._start("fade")
+
+        self.canvas.setExtent(QgsRectangle(500, 0, 1500, 500))
+        self.layers[1].triggerRepaint()
+        self.assertEqual(self.render_count(), 1)
+        self.assertIsNone(self.compositor.base_renderer.image)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import time
+import unittest
+
+import numpy as np
+from qgis.core import QgsRectangle
+from qgis.PyQt.QtCore import QCoreApplication
+from qgis.PyQt.QtGui import QColor, QImage
+
+from ..comparator.constants import difference_change_color
+from ..comparator.difference import (
+    DifferenceComputer,
+    array_to_image,
+    image_to_array,
+    pixel_difference,
+)
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+def _image(color: str, width=5, height=3) -> QImage:
+    # odd width: image rows are padded
+    image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(QColor(color))
+    return image
+
+
+class TestPixelDifference(unittest.TestCase):
+    def test_image_array_round_trip(self):
+        image = _image("#102030")
+        array = image_to_array(image)
+
+        self.assertEqual(array.shape, (3, 5, 4))
+        self.assertEqual(tuple(array[2, 4]), (0x10, 0x20, 0x30, 255))
+        self.assertEqual(array_to_image(array).pixelColor(4, 2), QColor("#102030"))
+
+    def test_absolute_difference(self):
+        base = np.zeros((2, 2, 4), np.uint8)
+        compare = np.zeros((2, 2, 4), np.uint8)
+        base[0, 0, :3] = (200, 10, 0)
+        compare[0, 0, :3] = (50, 30, 0)
+
+        difference = pixel_difference(base, compare)
+
+        self.assertEqual(tuple(difference[0, 0]), (150, 20, 0, 255))
+        self.assertEqual(tuple(difference[1, 1]), (0, 0, 0, 255))
+
+    def test_change_mask(self):
+        base = np.zeros((1, 3, 4), np.uint8)
+        compare = np.zeros((1, 3, 4), np.uint8)
+        compare[0, 1, 2] = 40
+        compare[0, 2, 0] = 10
+
+        difference = pixel_difference(base, compare, threshold=20)
+
+        self.assertEqual(tuple(difference[0, 0]), (0, 0, 0, 0))
+        self.assertEqual(tuple(difference[0, 1]), difference_change_color)
+        self.assertEqual(tuple(difference[0, 2]), (0, 0, 0, 0))
+
+
+class TestDifferenceComputer(unittest.TestCase):
+    def setUp(self):
+        self.computer = DifferenceComputer()
+        self.base_image = _image("black")
+        self.compare_image = _image("#808080")
+
+    def tearDown(self):
+        self.computer.clear()
+
+    def _wait(self):
+        deadline = time.time() + 5
+        while self.computer._task is not None and time.time() < deadline:
+            QCoreApplication.processEvents()
+
+    def test_difference_image(self):
+        extent = QgsRectangle(0, 0, 5, 3)
+        self.computer.compute(self.base_image, self.compare_image, extent)
+        self._wait()
+
+        self.assertEqual(self.computer.image.pixelColor(0, 0), QColor("#808080"))
+        self.assertEqual(self.computer.image_extent, extent)
+
+    def test_threshold_change_reuses_images(self):
+        self.computer.compute(
+            self.base_image, self.compare_image, QgsRectangle(0, 0, 5, 3)
+        )
+        self._wait()
+        arrays = self.computer._arrays
+
+        self.computer.set_threshold(200)
+        self._wait()
+        # no pixel changes by 200 or more
+        self.assertEqual(self.computer.image.pixelColor(0, 0).alpha(), 0)
+        self.assertIs(self.computer._arrays, arrays)
+
+        self.computer.set_threshold(100)
+        self._wait()
+        self.assertEqual(
+            self.computer.image.pixelColor(0, 0),
+            QColor(*difference_change_color),
+        )
+        self.assertIs(self.computer._arrays, arrays)
+
+    def test_failed_task_does_not_block_next_computations(self):
+        extent = QgsRectangle(0, 0, 5, 3)
+        # images of different sizes: the task fails
+        self.computer.compute(self.base_image, _image("white", 4, 3), extent)
+        self._wait()
+        self.assertIsNone(self.computer._task)
+        self.assertIsNone(self.computer.image)
+
+        self.computer.compute(self.base_image, self.compare_image, extent)
+        self._wait()
+
+        self.assertEqual(self.computer.image.pixelColor(0, 0), QColor("#808080"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from .utilities import CompositorTestCase, get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestFadeCompare(CompositorTestCase):
+    def test_whole_map_compare_image_is_rendered(self):
+        self.compositor.start([self.layers[0]], "fade", fade_opacity=0.3)
+        self.wait_renders()
+
+        visible_extent = self.canvas.mapSettings().visibleExtent()
+        compare_renderer = self.compositor.compare_renderer
+        self.assertEqual(self.compositor.item.fade_opacity, 0.3)
+        self.assertIsNotNone(compare_renderer.image)
+        self.assertTrue(compare_renderer.image_extent.contains(visible_extent))
+        # base layers are rendered by the canvas below the overlay
+        self.assertIsNone(self.compositor.base_renderer.image)
+
+    def test_opacity_change_does_not_render(self):
+        self.compositor.start([self.layers[0]], "fade")
+        self.wait_renders()
+        self.render_counter.reset()
+
+        for value in range(0, 101, 5):
+            self.compositor.set_fade_opacity(value / 100)
+
+        self.assertEqual(self.compositor.item.fade_opacity, 1.0)
+        self.assertEqual(self.render_count(), 0)
+
+    def test_opacity_is_clamped(self):
+        self.compositor.start([self.layers[0]], "fade")
+
+        self.compositor.set_fade_opacity(1.5)
+        self.assertEqual(self.compositor.item.fade_opacity, 1.0)
+        self.compositor.set_fade_opacity(-0.5)
+        self.assertEqual(self.compositor.item.fade_opacity, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import time
+import unittest
+
+from qgis.core import QgsProject, QgsRectangle, QgsVectorLayer
+from qgis.PyQt.QtCore import QCoreApplication
+
+from ..comparator.constants import map_sync_frame_interval_time
+from ..comparator.grid import CompareGrid
+from ..comparator.sync import MapSyncEngine
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+GRID_SIZE = 4
+
+
+def _process_frames(count):
+    for _ in range(count):
+        QCoreApplication.processEvents()
+        time.sleep(map_sync_frame_interval_time / 1000)
+
+
+class TestCompareGrid(unittest.TestCase):
+    def setUp(self):
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", f"epoch_{i}", "memory")
+            for i in range(GRID_SIZE)
+        ]
+        QgsProject.instance().addMapLayers(self.layers)
+
+        self.grid = CompareGrid(CANVAS, PARENT)
+        self.grid.resize(800, 800)
+        self.grid.show()
+        self.engine = MapSyncEngine(CANVAS)
+
+    def tearDown(self):
+        self.engine.stop()
+        self.grid.clear()
+        self.grid.hide()
+        QgsProject.instance().removeMapLayers([layer.id() for layer in self.layers])
+
+    def _wait_renders(self, render_times, timeout=5):
+        """Wait for an interaction render, then for a few more frames"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            _process_frames(1)
+            if render_times and not any(
+                canvas.isDrawing() for canvas in self.grid.canvases
+            ):
+                break
+        # a second render would start within a few frames
+        _process_frames(3)
+
+    def _cells(self, count):
+        return [(layer.name(), [layer]) for layer in self.layers[:count]]
+
+    def test_one_map_per_cell(self):
+        self.grid.set_cells(self._cells(GRID_SIZE))
+
+        self.assertEqual(len(self.grid.canvases), GRID_SIZE)
+        for canvas, layer in zip(self.grid.canvases, self.layers):
+            self.assertEqual(canvas.layers(), [layer])
+
+    def test_maps_are_reused(self):
+        self.grid.set_cells(self._cells(GRID_SIZE))
+        canvases = list(self.grid.canvases)
+
+        self.grid.set_cells(self._cells(2))
+
+        self.assertEqual(self.grid.canvases, canvases[:2])
+
+    def test_map_theme_cell(self):
+        self.grid.set_cells([("theme", "a map theme")])
+
+        self.assertEqual(self.grid.canvases[0].theme(), "a map theme")
+
+    def test_pan_renders_all_maps_once(self):
+        render_times = []
+        self.grid.render_timer.interactionRendered.connect(render_times.append)
+        self.grid.set_cells(self._cells(GRID_SIZE))
+        for canvas in self.grid.canvases:
+            self.engine.add_canvas(canvas)
+        # first render of the maps
+        self._wait_renders(render_times)
+
+        render_times.clear()
+        CANVAS.setExtent(QgsRectangle(0, 0, 1000, 1000))
+        self._wait_renders(render_times)
+
+        self.assertEqual(len(render_times), 1)
+        for canvas in self.grid.canvases:
+            self.assertEqual(canvas.center(), CANVAS.center())
+
+
+if __name__ == "__main__":
+    unittest.main()
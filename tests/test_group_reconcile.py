@@ -0,0 +1,69 @@
+import unittest
+
+from qgis.core import QgsLayerTreeGroup, QgsProject, QgsVectorLayer
+
+from ..comparator.utils import plan_layer_order_update
+from .utilities import get_qgis_app, reconcile_group_layers
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestPlanLayerOrderUpdate(unittest.TestCase):
+    def test_add_and_remove(self):
+        removed, moved, added = plan_layer_order_update(
+            ["a", "b", "c"], ["a", "c", "d"]
+        )
+        self.assertEqual(removed, ["b"])
+        self.assertEqual(moved, [])
+        self.assertEqual(added, ["d"])
+
+    def test_single_move(self):
+        removed, moved, added = plan_layer_order_update(
+            ["a", "b", "c", "d"], ["b", "c", "d", "a"]
+        )
+        self.assertEqual(removed, [])
+        self.assertEqual(moved, ["a"])
+        self.assertEqual(added, [])
+
+
+class TestReconcileGroupLayers(unittest.TestCase):
+    def setUp(self):
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", name, "memory")
+            for name in ["a", "b", "c", "d", "e"]
+        ]
+        QgsProject.instance().addMapLayers(self.layers, False)
+        self.group = QgsLayerTreeGroup("group")
+
+    def tearDown(self):
+        QgsProject.instance().removeMapLayers([layer.id() for layer in self.layers])
+
+    def _group_layer_ids(self):
+        return [child.layerId() for child in self.group.children()]
+
+    def test_kept_layers_stay_in_place(self):
+        a, b, c, d, _ = self.layers
+        reconcile_group_layers(self.group, [a, b, c])
+        node_a, _, node_c = self.group.children()
+
+        reconcile_group_layers(self.group, [a, c, d])
+
+        self.assertEqual(self._group_layer_ids(), [a.id(), c.id(), d.id()])
+        self.assertIs(self.group.children()[0], node_a)
+        self.assertIs(self.group.children()[1], node_c)
+
+    def test_reorder_moves_only_displaced_layer(self):
+        a, b, c, d, e = self.layers
+        reconcile_group_layers(self.group, [a, b, c, d, e])
+        node_b, node_c, node_d, node_e = self.group.children()[1:]
+
+        reconcile_group_layers(self.group, [b, c, d, e, a])
+
+        self.assertEqual(
+            self._group_layer_ids(), [layer.id() for layer in [b, c, d, e, a]]
+        )
+        self.assertEqual(self.group.children()[:4], [node_b, node_c, node_d, node_e])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch
+
+from qgis.core import QgsCoordinateReferenceSystem, QgsProject, QgsVectorLayer
+
+from ..comparator import process
+from ..comparator.constants import compare_group_name
+from ..comparator.process import compare_with_mask, stop_compare_with_mask
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+MODE_SWITCH_COUNT = 1000
+COMPARE_METHODS = ["vertical", "horizontal", "lens"]
+
+
+class TestHelperLayers(unittest.TestCase):
+    def setUp(self):
+        self.project = QgsProject.instance()
+        self.compare_layer = QgsVectorLayer(
+            "Point?crs=EPSG:3857", "compare_layer", "memory"
+        )
+        self.project.addMapLayer(self.compare_layer)
+        self.iface_patcher = patch.object(process, "iface", IFACE)
+        self.iface_patcher.start()
+
+    def tearDown(self):
+        stop_compare_with_mask()
+        self.iface_patcher.stop()
+        self.project.removeMapLayer(self.compare_layer.id())
+
+    def _assert_layer_count_constant_over_mode_switches(self):
+        layer_count_before_compare = len(self.project.mapLayers())
+
+        compare_with_mask([self.compare_layer], "vertical")
+        layer_count_in_compare = len(self.project.mapLayers())
+
+        for i in range(MODE_SWITCH_COUNT):
+            compare_with_mask(
+                [self.compare_layer], COMPARE_METHODS[i % len(COMPARE_METHODS)]
+            )
+            self.assertEqual(len(self.project.mapLayers()), layer_count_in_compare)
+
+        stop_compare_with_mask()
+        self.assertEqual(len(self.project.mapLayers()), layer_count_before_compare)
+
+    def test_projected_crs(self):
+        self.project.setCrs(QgsCoordinateReferenceSystem("EPSG:3857"))
+        self._assert_layer_count_constant_over_mode_switches()
+
+    def test_geographic_crs(self):
+        self.project.setCrs(QgsCoordinateReferenceSystem("EPSG:4326"))
+        self._assert_layer_count_constant_over_mode_switches()
+
+    def test_geographic_crs_single_mask(self):
+        self.project.setCrs(QgsCoordinateReferenceSystem("EPSG:4326"))
+        IFACE.mapCanvas().setDestinationCrs(self.project.crs())
+
+        compare_with_mask([self.compare_layer], "lens")
+
+        group = self.project.layerTreeRoot().findGroup(compare_group_name)
+        group_layer_ids = [node.layerId() for node in group.findLayers()]
+        # mask, compare layer and background
+        self.assertEqual(len(group_layer_ids), 3)
+        mask_layer = self.project.mapLayer(group_layer_ids[0])
+        self.assertEqual(mask_layer.crs().authid(), "EPSG:4326")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,251 @@
+import unittest
+
+from qgis.core import QgsLayerTreeGroup, QgsProject, QgsVectorLayer
+from qgis.PyQt.QtCore import QModelIndex, Qt
+
+from ..comparator.layer_model import (
+    LAYER_ID_ROLE,
+    CheckedLayerSet,
+    CompareLayerModel,
+    LayerNameIndex,
+    name_words,
+)
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestLayerNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = LayerNameIndex()
+        self.index.build(
+            {
+                "roads": "OSM roads 2020",
+                "rivers": "OSM_rivers",
+                "roads_old": "Roads 1990",
+            }
+        )
+
+    def test_name_words(self):
+        self.assertEqual(
+            name_words("OSM_roads-2020 (v2)"), ["osm", "roads", "2020", "v2"]
+        )
+
+    def test_search_by_word_prefixes(self):
+        self.assertEqual(self.index.search("roa"), ["roads", "roads_old"])
+        self.assertEqual(self.index.search("roa 20"), ["roads"])
+        self.assertEqual(self.index.search("osm"), ["roads", "rivers"])
+        self.assertEqual(self.index.search("ads"), [])
+        self.assertEqual(self.index.search("  "), [])
+
+    def test_add_and_remove(self):
+        self.index.add("rivers", "Rivers 2020")
+        self.assertEqual(self.index.search("osm"), ["roads"])
+        self.assertEqual(self.index.search("2020"), ["roads", "rivers"])
+
+        self.index.remove("roads")
+        self.assertEqual(self.index.search("2020"), ["rivers"])
+        self.assertEqual(len(self.index), 2)
+
+
+class TestCheckedLayerSet(unittest.TestCase):
+    def setUp(self):
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", f"layer_{i}", "memory")
+            for i in range(4)
+        ]
+        QgsProject.instance().addMapLayers(self.layers, False)
+        self.root = QgsLayerTreeGroup()
+        group = self.root.addGroup("group")
+        group.addLayer(self.layers[0])
+        group.addLayer(self.layers[1])
+        self.root.addLayer(self.layers[2])
+        self.root.addLayer(self.layers[3])
+        self.ids = [layer.id() for layer in self.layers]
+        self.checked = CheckedLayerSet(self.root)
+
+    def tearDown(self):
+        QgsProject.instance().removeMapLayers(self.ids)
+
+    def test_layers_are_in_layer_tree_order(self):
+        self.checked.add([self.ids[3], self.ids[0]])
+        self.assertEqual(self.checked.layer_ids(), [self.ids[0], self.ids[3]])
+
+        # positions are known: insertion in order
+        self.checked.add([self.ids[2]])
+        self.checked.discard([self.ids[0]])
+
+        self.assertEqual(self.checked.layers(), [self.layers[2], self.layers[3]])
+        self.assertIn(self.ids[2], self.checked)
+        self.assertNotIn(self.ids[0], self.checked)
+
+    def test_add_and_discard_return_changed_ids(self):
+        self.assertEqual(self.checked.add([self.ids[0], self.ids[0]]), [self.ids[0]])
+        self.assertEqual(self.checked.add([self.ids[0], self.ids[1]]), [self.ids[1]])
+        self.assertEqual(
+            self.checked.discard([self.ids[2], self.ids[1]]), [self.ids[1]]
+        )
+        self.assertEqual(len(self.checked), 1)
+
+    def test_order_is_read_again_after_layer_tree_change(self):
+        self.checked.replace(self.ids)
+        self.assertEqual(self.checked.layer_ids(), self.ids)
+
+        node = self.root.findLayer(self.ids[3])
+        self.root.insertChildNode(0, node.clone())
+        self.root.removeChildNode(node)
+        self.checked.invalidate_order()
+
+        self.assertEqual(self.checked.layer_ids(), [self.ids[3], *self.ids[:3]])
+
+    def test_layers_out_of_layer_tree_are_not_read(self):
+        self.checked.replace(self.ids)
+        self.root.removeChildNode(self.root.findLayer(self.ids[2]))
+        self.checked.invalidate_order()
+
+        self.assertEqual(self.checked.layer_ids(), [*self.ids[:2], self.ids[3]])
+        # check state is kept if the layer is added back
+        self.assertIn(self.ids[2], self.checked)
+
+
+class TestCompareLayerModel(unittest.TestCase):
+    def setUp(self):
+        self.project = QgsProject.instance()
+        self.root = QgsLayerTreeGroup()
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", name, "memory")
+            for name in ["roads", "rivers", "buildings"]
+        ]
+        self.project.addMapLayers(self.layers, False)
+        self.group = self.root.addGroup("group")
+        self.group.addLayer(self.layers[0])
+        self.group.addLayer(self.layers[1])
+        self.root.addLayer(self.layers[2])
+
+        self.model = CompareLayerModel(self.root)
+        self.model.reset()
+        self.changes = []
+        self.model.checkedLayersChanged.connect(lambda: self.changes.append(True))
+
+    def tearDown(self):
+        self.project.removeMapLayers([layer.id() for layer in self.layers])
+
+    def _check(self, index, state=Qt.CheckState.Checked):
+        self.model.setData(index, state, Qt.ItemDataRole.CheckStateRole)
+
+    def test_group_rows_are_fetched_when_expanded(self):
+        self.assertEqual(self.model.rowCount(), 2)
+        group_index = self.model.index(0, 0)
+        self.assertTrue(self.model.hasChildren(group_index))
+        self.assertEqual(self.model.rowCount(group_index), 0)
+        self.assertTrue(self.model.canFetchMore(group_index))
+
+        self.model.fetchMore(group_index)
+
+        self.assertEqual(self.model.rowCount(group_index), 2)
+        self.assertFalse(self.model.canFetchMore(group_index))
+        child_index = self.model.index(1, 0, group_index)
+        self.assertEqual(child_index.data(LAYER_ID_ROLE), self.layers[1].id())
+        self.assertEqual(self.model.parent(child_index), group_index)
+
+    def test_group_check_without_fetching(self):
+        self._check(self.model.index(0, 0))
+
+        self.assertEqual(self.model.checked_layers(), self.layers[:2])
+        self.assertEqual(self.changes, [True])
+        self.assertEqual(
+            self.model.index(0, 0).data(Qt.ItemDataRole.CheckStateRole),
+            Qt.CheckState.Checked,
+        )
+
+    def test_partially_checked_group(self):
+        group_index = self.model.index(0, 0)
+        self.model.fetchMore(group_index)
+
+        self._check(self.model.index(0, 0, group_index))
+
+        self.assertEqual(
+            group_index.data(Qt.ItemDataRole.CheckStateRole),
+            Qt.CheckState.PartiallyChecked,
+        )
+
+    def test_filter_rows_are_flat(self):
+        self.model.set_filter("ri")
+
+        self.assertEqual(self.model.rowCount(), 1)
+        index = self.model.index(0, 0)
+        self.assertEqual(index.data(), "rivers")
+        self.assertEqual(self.model.parent(index), QModelIndex())
+        self.assertFalse(self.model.hasChildren(index))
+
+        self.model.set_filter("")
+        self.assertEqual(self.model.rowCount(), 2)
+
+    def test_check_state_is_kept_by_filter(self):
+        self.model.set_filter("buil")
+        self._check(self.model.index(0, 0))
+        self.model.set_filter("")
+
+        self.assertEqual(self.model.checked_layers(), [self.layers[2]])
+        self.assertEqual(
+            self.model.index(1, 0).data(Qt.ItemDataRole.CheckStateRole),
+            Qt.CheckState.Checked,
+        )
+
+    def test_checked_layers_follow_layer_tree_moves(self):
+        self._check(self.model.index(0, 0))
+        self._check(self.model.index(1, 0))
+        self.assertEqual(self.model.checked_layers(), self.layers)
+
+        # move buildings layer to top, as QGIS layer tree does
+        node = self.root.findLayer(self.layers[2].id())
+        self.root.insertChildNode(0, node.clone())
+        self.root.removeChildNode(node)
+
+        self.assertEqual(
+            self.model.checked_layers(), [self.layers[2], *self.layers[:2]]
+        )
+
+    def test_renamed_layer_is_found_by_new_name(self):
+        self.layers[1].setName("canals")
+
+        self.assertEqual(self.model.name_index.search("riv"), [])
+        self.assertEqual(self.model.name_index.search("can"), [self.layers[1].id()])
+
+    def test_filter_rows_follow_added_and_renamed_layers(self):
+        self.model.set_filter("ro")
+        self.assertEqual(self.model.rowCount(), 1)
+
+        layer = QgsVectorLayer("Point?crs=EPSG:3857", "roofs", "memory")
+        self.project.addMapLayer(layer, False)
+        self.root.addLayer(layer)
+        self.layers.append(layer)
+        self.assertEqual(self.model.rowCount(), 2)
+
+        self.layers[0].setName("streets")
+        self.assertEqual(self.model.rowCount(), 1)
+        self.assertEqual(self.model.index(0, 0).data(LAYER_ID_ROLE), layer.id())
+
+    def test_group_check_state_follows_checks_and_layer_tree(self):
+        group_index = self.model.index(0, 0)
+        self.model.fetchMore(group_index)
+        self._check(self.model.index(0, 0, group_index))
+        self._check(self.model.index(1, 0, group_index))
+        self.assertEqual(
+            group_index.data(Qt.ItemDataRole.CheckStateRole), Qt.CheckState.Checked
+        )
+
+        self.group.addLayer(self.layers[2])
+        self.assertEqual(
+            group_index.data(Qt.ItemDataRole.CheckStateRole),
+            Qt.CheckState.PartiallyChecked,
+        )
+
+        self._check(self.model.index(1, 0))
+        self.assertEqual(
+            group_index.data(Qt.ItemDataRole.CheckStateRole), Qt.CheckState.Checked
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
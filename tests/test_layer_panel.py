@@ -0,0 +1,83 @@
+import unittest
+
+from qgis.core import QgsProject, QgsVectorLayer
+from qgis.PyQt.QtCore import QPersistentModelIndex, Qt
+
+from ..comparator.layer_model import LAYER_ID_ROLE
+from ..qmapcompare_dockwidget import QMapCompareDockWidget
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestLayerPanel(unittest.TestCase):
+    def setUp(self):
+        self.project = QgsProject.instance()
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", f"layer_{i}", "memory")
+            for i in range(3)
+        ]
+        self.project.addMapLayers(self.layers)
+
+        self.dockwidget = QMapCompareDockWidget()
+        self.dockwidget.show()
+        self.dockwidget.process_node()
+        self.layer_model = self.dockwidget.layer_model
+
+    def tearDown(self):
+        self.dockwidget.hide()
+        self.project.removeAllMapLayers()
+
+    def _top_level_rows(self):
+        # persistent indexes follow their row when other rows change
+        return [
+            QPersistentModelIndex(self.layer_model.index(row, 0))
+            for row in range(self.layer_model.rowCount())
+        ]
+
+    def _row_of(self, layer):
+        return next(
+            row
+            for row in self._top_level_rows()
+            if row.data(LAYER_ID_ROLE) == layer.id()
+        )
+
+    def test_added_layer_keeps_existing_rows(self):
+        rows = self._top_level_rows()
+        self.layer_model.setData(
+            self.layer_model.index(0, 0),
+            Qt.CheckState.Checked,
+            Qt.ItemDataRole.CheckStateRole,
+        )
+
+        new_layer = QgsVectorLayer("Point?crs=EPSG:3857", "new_layer", "memory")
+        self.project.addMapLayer(new_layer)
+
+        self.assertEqual(self.layer_model.rowCount(), len(rows) + 1)
+        for row in rows:
+            self.assertTrue(row.isValid())
+        self.assertEqual(
+            rows[0].data(Qt.ItemDataRole.CheckStateRole), Qt.CheckState.Checked
+        )
+
+    def test_removed_layer_removes_its_row_only(self):
+        rows = self._top_level_rows()
+        removed_row = self._row_of(self.layers[1])
+
+        self.project.removeMapLayer(self.layers[1].id())
+
+        self.assertEqual(self.layer_model.rowCount(), len(rows) - 1)
+        self.assertFalse(removed_row.isValid())
+        self.assertEqual(sum(1 for row in rows if row.isValid()), len(rows) - 1)
+
+    def test_renamed_layer_updates_its_row(self):
+        row = self._row_of(self.layers[0])
+
+        self.layers[0].setName("renamed")
+
+        self.assertTrue(row.isValid())
+        self.assertEqual(row.data(Qt.ItemDataRole.DisplayRole), "renamed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from qgis.core import QgsLayerTreeGroup
+
+from ..comparator.layer_tree import LayerTreeConnectionRegistry
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestLayerTreeConnectionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.renamed = []
+        self.registry = LayerTreeConnectionRegistry(
+            lambda node, name: self.renamed.append(name)
+        )
+        self.root = QgsLayerTreeGroup("root")
+
+    def test_node_is_connected_once(self):
+        group = self.root.addGroup("group")
+        self.assertTrue(self.registry.connect(group))
+        self.assertFalse(self.registry.connect(group))
+
+        group.setName("renamed")
+
+        self.assertEqual(self.renamed, ["renamed"])
+
+    def test_disconnected_node_is_not_notified(self):
+        group = self.root.addGroup("group")
+        self.registry.connect(group)
+
+        self.registry.disconnect(group)
+        group.setName("renamed")
+
+        self.assertEqual(self.renamed, [])
+        self.assertEqual(len(self.registry), 0)
+
+    def test_deleted_node_is_dropped(self):
+        group = self.root.addGroup("group")
+        self.registry.connect(group)
+        self.assertEqual(len(self.registry), 1)
+
+        self.root.removeChildNode(group)
+
+        self.assertEqual(len(self.registry), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
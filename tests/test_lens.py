@@ -0,0 +1,56 @@
+import time
+import unittest
+
+from qgis.core import QgsPointXY, QgsVectorLayer
+from qgis.PyQt.QtCore import QCoreApplication
+
+from ..comparator.constants import lens_frame_interval_time
+from ..comparator.lens import LensRepaintEngine
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+def _wait_frame():
+    deadline = time.time() + (lens_frame_interval_time * 5) / 1000
+    while time.time() < deadline:
+        QCoreApplication.processEvents()
+
+
+class TestLensRepaintEngine(unittest.TestCase):
+    def setUp(self):
+        self.mask_layer = QgsVectorLayer("Polygon?crs=EPSG:3857", "mask", "memory")
+        self.repaints = 0
+        self.mask_layer.repaintRequested.connect(self._on_repaint_requested)
+        self.engine = LensRepaintEngine(CANVAS, self.mask_layer)
+        self.engine.start()
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def _on_repaint_requested(self):
+        self.repaints += 1
+
+    def test_cursor_moves_are_coalesced(self):
+        for i in range(50):
+            CANVAS.xyCoordinates.emit(QgsPointXY(i, i))
+        _wait_frame()
+        self.assertEqual(self.repaints, 1)
+
+    def test_idle_cursor_does_not_repaint(self):
+        CANVAS.xyCoordinates.emit(QgsPointXY(1, 1))
+        _wait_frame()
+        CANVAS.xyCoordinates.emit(QgsPointXY(1, 1))
+        _wait_frame()
+        _wait_frame()
+        self.assertEqual(self.repaints, 1)
+
+    def test_stopped_engine_does_not_repaint(self):
+        self.engine.stop()
+        CANVAS.xyCoordinates.emit(QgsPointXY(2, 2))
+        _wait_frame()
+        self.assertEqual(self.repaints, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
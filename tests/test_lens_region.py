@@ -0,0 +1,54 @@
+import random
+import unittest
+
+from qgis.core import QgsPointXY, QgsRectangle
+
+from ..comparator.compositor import lens_render_region
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+VISIBLE_EXTENT = QgsRectangle(0, 0, 1000, 600)
+LENS_SIZE_RATE = 0.1
+
+
+class TestLensRenderRegion(unittest.TestCase):
+    def test_region_covers_lens(self):
+        random.seed(0)
+        radius = VISIBLE_EXTENT.width() * LENS_SIZE_RATE
+        for _ in range(1000):
+            point = QgsPointXY(random.uniform(0, 1000), random.uniform(0, 600))
+            lens_bbox = QgsRectangle(
+                point.x() - radius,
+                point.y() - radius,
+                point.x() + radius,
+                point.y() + radius,
+            ).intersect(VISIBLE_EXTENT)
+
+            region = lens_render_region(VISIBLE_EXTENT, point, LENS_SIZE_RATE)
+
+            self.assertTrue(region.contains(lens_bbox))
+
+    def test_small_moves_reuse_region(self):
+        first = lens_render_region(VISIBLE_EXTENT, QgsPointXY(500, 300), LENS_SIZE_RATE)
+        second = lens_render_region(
+            VISIBLE_EXTENT, QgsPointXY(510, 290), LENS_SIZE_RATE
+        )
+        self.assertEqual(first, second)
+
+    def test_region_grows_with_lens_not_with_map(self):
+        point = QgsPointXY(500, 300)
+        small_lens = lens_render_region(VISIBLE_EXTENT, point, 0.05)
+        large_lens = lens_render_region(VISIBLE_EXTENT, point, 0.1)
+
+        self.assertAlmostEqual(large_lens.area(), small_lens.area() * 4)
+        self.assertLess(large_lens.area(), VISIBLE_EXTENT.area() / 2)
+
+    def test_lens_outside_map(self):
+        self.assertIsNone(
+            lens_render_region(VISIBLE_EXTENT, QgsPointXY(5000, 5000), LENS_SIZE_RATE)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
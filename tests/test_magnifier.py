@@ -0,0 +1,124 @@
+import unittest
+
+from qgis.core import (
+    QgsMapSettings,
+    QgsPointXY,
+    QgsProject,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QSize
+
+from ..comparator.compositor import MagnifierRenderer, magnifier_render_region
+from ..comparator.telemetry import RenderCounter
+from .utilities import get_qgis_app, wait_renders
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+VISIBLE_EXTENT = QgsRectangle(0, 0, 1000, 600)
+LENS_SIZE_RATE = 0.1
+
+
+class TestMagnifierRenderRegion(unittest.TestCase):
+    def test_region_covers_magnified_lens(self):
+        point = QgsPointXY(437, 211)
+        for zoom in (2, 4, 8):
+            radius = VISIBLE_EXTENT.width() * LENS_SIZE_RATE / zoom
+            magnified_lens = QgsRectangle(
+                point.x() - radius,
+                point.y() - radius,
+                point.x() + radius,
+                point.y() + radius,
+            )
+
+            region = magnifier_render_region(
+                VISIBLE_EXTENT, point, LENS_SIZE_RATE, zoom
+            )
+
+            self.assertTrue(region.contains(magnified_lens))
+
+    def test_region_shrinks_with_zoom(self):
+        point = QgsPointXY(500, 300)
+        region_2x = magnifier_render_region(VISIBLE_EXTENT, point, LENS_SIZE_RATE, 2)
+        region_4x = magnifier_render_region(VISIBLE_EXTENT, point, LENS_SIZE_RATE, 4)
+
+        self.assertAlmostEqual(region_2x.area(), region_4x.area() * 4)
+
+    def test_small_moves_reuse_region(self):
+        first = magnifier_render_region(
+            VISIBLE_EXTENT, QgsPointXY(500, 300), LENS_SIZE_RATE, 4
+        )
+        second = magnifier_render_region(
+            VISIBLE_EXTENT, QgsPointXY(505, 295), LENS_SIZE_RATE, 4
+        )
+        self.assertEqual(first, second)
+
+
+class TestMagnifierRenderer(unittest.TestCase):
+    def setUp(self):
+        self.layer = QgsVectorLayer("Point?crs=EPSG:3857", "compare", "memory")
+        QgsProject.instance().addMapLayer(self.layer)
+
+        self.settings = QgsMapSettings()
+        self.settings.setDestinationCrs(self.layer.crs())
+        self.settings.setOutputSize(QSize(500, 300))
+        self.settings.setExtent(VISIBLE_EXTENT)
+
+        self.renderer = MagnifierRenderer()
+        self.renderer.set_layers([self.layer])
+        self.render_counter = RenderCounter()
+        self.render_counter.attach(self.renderer)
+
+    def tearDown(self):
+        self.renderer.clear()
+        QgsProject.instance().removeMapLayer(self.layer.id())
+
+    def _render_lens(self, point):
+        self.renderer.render_lens(self.settings, point, LENS_SIZE_RATE, 4)
+        wait_renders([self.renderer])
+
+    def test_tile_is_magnified(self):
+        self._render_lens(QgsPointXY(500, 300))
+
+        self.assertIsNotNone(self.renderer.image)
+        magnified_units_per_pixel = self.settings.mapUnitsPerPixel() / 4
+        self.assertAlmostEqual(
+            self.renderer.image_extent.width() / self.renderer.image.width(),
+            magnified_units_per_pixel,
+            delta=magnified_units_per_pixel / 100,
+        )
+
+    def test_recent_tiles_are_reused(self):
+        self._render_lens(QgsPointXY(500, 300))
+        self._render_lens(QgsPointXY(800, 100))
+        self.assertEqual(self.render_counter.count("inactive"), 2)
+
+        # back to the first tile: no render
+        self._render_lens(QgsPointXY(501, 299))
+
+        self.assertEqual(self.render_counter.count("inactive"), 2)
+        self.assertEqual(len(self.renderer.tiles), 2)
+        self.assertTrue(self.renderer.image_extent.contains(QgsPointXY(501, 299)))
+
+    def test_superseded_job_is_cancelled(self):
+        self.renderer.render_lens(
+            self.settings, QgsPointXY(500, 300), LENS_SIZE_RATE, 4
+        )
+        first_job = self.renderer._job
+
+        self._render_lens(QgsPointXY(800, 100))
+
+        self.assertIsNot(self.renderer._job, first_job)
+        self.assertEqual(len(self.renderer.tiles), 1)
+        self.assertTrue(self.renderer.image_extent.contains(QgsPointXY(800, 100)))
+
+    def test_style_change_drops_tiles(self):
+        self._render_lens(QgsPointXY(500, 300))
+
+        self.layer.triggerRepaint()
+
+        self.assertEqual(len(self.renderer.tiles), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
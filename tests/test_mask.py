@@ -0,0 +1,131 @@
+import unittest
+
+from qgis.core import QgsGeometry, QgsPointXY, QgsRectangle, QgsVectorLayer
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QSize
+
+from ..comparator.mask import (
+    MaskGeometryCache,
+    MaskGeometryEngine,
+    lens_mask_geometry,
+    split_mask_geometry,
+)
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+EXTENT = QgsRectangle(0, 0, 200, 100)
+
+
+class TestMaskGeometry(unittest.TestCase):
+    def test_vertical_split_is_right_half(self):
+        geometry = split_mask_geometry("vertical", EXTENT)
+        self.assertEqual(geometry.boundingBox(), QgsRectangle(100, 0, 200, 100))
+
+    def test_horizontal_split_is_bottom_half(self):
+        geometry = split_mask_geometry("horizontal", EXTENT)
+        self.assertEqual(geometry.boundingBox(), QgsRectangle(0, 0, 200, 50))
+
+    def test_square_lens(self):
+        geometry = lens_mask_geometry("square", 0.1, EXTENT, QgsPointXY(50, 50))
+        self.assertEqual(geometry.boundingBox(), QgsRectangle(30, 30, 70, 70))
+
+    def test_circle_lens(self):
+        geometry = lens_mask_geometry("circle", 0.1, EXTENT, QgsPointXY(50, 50))
+        self.assertTrue(geometry.contains(QgsGeometry.fromPointXY(QgsPointXY(50, 69))))
+        self.assertFalse(geometry.contains(QgsGeometry.fromPointXY(QgsPointXY(65, 65))))
+
+    def test_lens_without_cursor_is_empty(self):
+        self.assertTrue(lens_mask_geometry("circle", 0.1, EXTENT, None).isNull())
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = MaskGeometryCache(size=2)
+        computed = []
+
+        def factory(key):
+            def compute():
+                computed.append(key)
+                return QgsGeometry()
+
+            return compute
+
+        cache.get("a", factory("a"))
+        cache.get("b", factory("b"))
+        cache.get("a", factory("a"))
+        cache.get("c", factory("c"))
+        cache.get("a", factory("a"))
+        cache.get("b", factory("b"))
+
+        self.assertEqual(computed, ["a", "b", "c", "b"])
+        self.assertEqual(len(cache), 2)
+
+
+class TestMaskGeometryEngine(unittest.TestCase):
+    def setUp(self):
+        self.canvas = QgsMapCanvas(PARENT)
+        self.canvas.resize(QSize(400, 200))
+        self.canvas.show()
+        self.canvas.setExtent(EXTENT)
+        self.mask_layer = QgsVectorLayer("Polygon?crs=EPSG:3857", "mask", "memory")
+        self.canvas.setDestinationCrs(self.mask_layer.crs())
+
+        self.repaints = 0
+        self.mask_layer.repaintRequested.connect(self._on_repaint_requested)
+        self.engine = MaskGeometryEngine(self.canvas)
+        self.engine.set_mask_layers([self.mask_layer])
+
+    def tearDown(self):
+        self.engine.stop()
+        self.canvas.hide()
+
+    def _on_repaint_requested(self):
+        self.repaints += 1
+
+    def _mask_geometry(self):
+        features = list(self.mask_layer.getFeatures())
+        self.assertEqual(len(features), 1)
+        return features[0].geometry()
+
+    def test_mask_feature_follows_extent(self):
+        self.engine.configure("vertical")
+        self.engine.start()
+        visible_extent = self.canvas.mapSettings().visibleExtent()
+        self.assertEqual(
+            self._mask_geometry().boundingBox().xMinimum(),
+            visible_extent.center().x(),
+        )
+
+        self.canvas.setExtent(QgsRectangle(1000, 0, 1200, 100))
+
+        visible_extent = self.canvas.mapSettings().visibleExtent()
+        self.assertEqual(
+            self._mask_geometry().boundingBox().xMinimum(),
+            visible_extent.center().x(),
+        )
+
+    def test_unchanged_parameters_do_not_repaint(self):
+        self.engine.configure("lens", "circle", 0.1)
+        self.engine.start()
+        self.engine.set_cursor_point(QgsPointXY(10, 10))
+        repaints = self.repaints
+
+        self.engine.set_cursor_point(QgsPointXY(10, 10))
+        self.engine.update()
+
+        self.assertEqual(self.repaints, repaints)
+
+    def test_lens_moves_with_cursor(self):
+        self.engine.configure("lens", "square", 0.1)
+        self.engine.start()
+
+        self.engine.set_cursor_point(QgsPointXY(100, 50))
+
+        self.assertEqual(
+            self._mask_geometry().boundingBox().center(), QgsPointXY(100, 50)
+        )
+        # lens geometries are built for each cursor point, not kept
+        self.assertEqual(len(self.engine.cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
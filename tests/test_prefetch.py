@@ -0,0 +1,159 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsRasterLayer,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QBuffer, QByteArray, QCoreApplication, QSize
+from qgis.PyQt.QtGui import QColor, QImage
+
+from ..comparator.prefetch import ComparePrefetcher, is_tiled_layer, neighbour_extents
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+def _tile_png() -> bytes:
+    image = QImage(256, 256, QImage.Format.Format_ARGB32)
+    image.fill(QColor("green"))
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QBuffer.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(data)
+
+
+class TileHandler(BaseHTTPRequestHandler):
+    """XYZ tile server stand-in, recording requested tile paths"""
+
+    requested_paths = []
+    tile = b""
+
+    def do_GET(self):
+        TileHandler.requested_paths.append(self.path)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(TileHandler.tile)))
+        self.end_headers()
+        self.wfile.write(TileHandler.tile)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestNeighbourExtents(unittest.TestCase):
+    def test_ring_and_zoom_in(self):
+        extent = QgsRectangle(0, 0, 100, 50)
+        extents = neighbour_extents(extent)
+
+        self.assertEqual(len(extents), 9)
+        # side extents first
+        self.assertEqual(extents[0], QgsRectangle(-100, 0, 0, 50))
+        self.assertEqual(extents[1], QgsRectangle(100, 0, 200, 50))
+        for neighbour in extents[:8]:
+            self.assertAlmostEqual(neighbour.area(), extent.area())
+            self.assertAlmostEqual(neighbour.intersect(extent).area(), 0)
+        self.assertEqual(extents[8], QgsRectangle(25, 12.5, 75, 37.5))
+
+
+class TestComparePrefetcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        TileHandler.tile = _tile_png()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), TileHandler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever)
+        cls.server_thread.daemon = True
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        TileHandler.requested_paths = []
+        port = self.server.server_address[1]
+        self.layer = QgsRasterLayer(
+            f"type=xyz&url=http://127.0.0.1:{port}/{{z}}/{{x}}/{{y}}.png"
+            "&zmin=0&zmax=19",
+            "tiles",
+            "wms",
+        )
+        self.assertTrue(self.layer.isValid())
+
+        self.canvas = QgsMapCanvas(PARENT)
+        self.canvas.resize(QSize(256, 256))
+        self.canvas.setDestinationCrs(QgsCoordinateReferenceSystem("EPSG:3857"))
+        # about one zoom 10 tile
+        self.canvas.setExtent(QgsRectangle(0, 0, 39135, 39135))
+        self.prefetcher = ComparePrefetcher(self.canvas)
+
+    def tearDown(self):
+        self.prefetcher.stop()
+        self._wait_idle()
+
+    def _wait_idle(self, timeout=10):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            QCoreApplication.processEvents()
+            if self.prefetcher.is_idle():
+                return
+
+    def test_tiles_around_map_are_requested(self):
+        self.prefetcher.start([self.layer])
+        self.prefetcher.prefetch()
+        self._wait_idle()
+
+        self.assertEqual(self.prefetcher.prefetch_count, 9)
+        self.assertGreater(len(TileHandler.requested_paths), 0)
+        # tiles of the current zoom level and of the next one
+        zoom_levels = {path.split("/")[1] for path in TileHandler.requested_paths}
+        self.assertGreaterEqual(len(zoom_levels), 2)
+
+    def test_prefetched_extents_are_not_rendered_again(self):
+        self.prefetcher.start([self.layer])
+        self.prefetcher.prefetch()
+        self._wait_idle()
+
+        self.prefetcher.prefetch()
+        self._wait_idle()
+
+        self.assertEqual(self.prefetcher.prefetch_count, 9)
+
+    def test_extent_budget(self):
+        self.prefetcher.max_extents = 2
+        self.prefetcher.start([self.layer])
+        self.prefetcher.prefetch()
+        self._wait_idle()
+
+        self.assertEqual(self.prefetcher.prefetch_count, 2)
+
+    def test_map_move_cancels_prefetch(self):
+        self.prefetcher.start([self.layer])
+        self.prefetcher.prefetch()
+
+        self.canvas.setExtent(QgsRectangle(1e6, 1e6, 1e6 + 39135, 1e6 + 39135))
+
+        self.assertEqual(self.prefetcher._pending, [])
+        for task in self.prefetcher._tasks:
+            self.assertTrue(task.isCanceled())
+
+    def test_only_tiled_layers_are_prefetched(self):
+        vector_layer = QgsVectorLayer("Point?crs=EPSG:3857", "points", "memory")
+        self.assertTrue(is_tiled_layer(self.layer))
+        self.assertFalse(is_tiled_layer(vector_layer))
+
+        self.prefetcher.start([vector_layer])
+        self.prefetcher.prefetch()
+
+        self.assertEqual(self.prefetcher.prefetch_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
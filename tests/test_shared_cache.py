@@ -0,0 +1,118 @@
+import unittest
+
+from qgis.core import (
+    QgsMapThemeCollection,
+    QgsPalLayerSettings,
+    QgsProject,
+    QgsRectangle,
+    QgsVectorLayer,
+    QgsVectorLayerSimpleLabeling,
+)
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QSize
+
+from ..comparator.shared_cache import MirrorSharedRenderCache
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+THEME_NAME = "test_shared_cache_theme"
+
+
+class TestMirrorSharedRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.project = QgsProject.instance()
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", f"layer_{i}", "memory")
+            for i in range(4)
+        ]
+        self.project.addMapLayers(self.layers)
+        # layers from top to bottom
+        self.ordered_layers = self.project.layerTreeRoot().layerOrder()
+
+        self.main_canvas = QgsMapCanvas(PARENT)
+        self.main_canvas.resize(QSize(400, 400))
+        self.main_canvas.setCachingEnabled(True)
+        self.mirror_canvas = QgsMapCanvas(PARENT)
+        self.mirror_canvas.resize(QSize(200, 400))
+        # same scale and center, as synchronized by MapSyncEngine
+        self.main_canvas.setExtent(QgsRectangle(0, 0, 400, 400))
+        self.mirror_canvas.setExtent(QgsRectangle(100, 0, 300, 400))
+        self.shared_cache = MirrorSharedRenderCache(
+            self.main_canvas, self.mirror_canvas
+        )
+
+    def tearDown(self):
+        self.shared_cache.stop()
+        self.project.mapThemeCollection().removeMapTheme(THEME_NAME)
+        self.project.removeAllMapLayers()
+
+    def _set_mirror_theme(self, layers):
+        record = QgsMapThemeCollection.MapThemeRecord()
+        record.setLayerRecords(
+            [QgsMapThemeCollection.MapThemeLayerRecord(layer) for layer in layers]
+        )
+        self.project.mapThemeCollection().insert(THEME_NAME, record)
+
+    def test_mirror_renders_differing_layers_only(self):
+        top, compare, bottom, _ = self.ordered_layers
+        self.main_canvas.setLayers([top, bottom])
+        self._set_mirror_theme([top, compare, bottom])
+
+        self.shared_cache.start(THEME_NAME)
+
+        self.assertTrue(self.shared_cache.is_sharing)
+        self.assertEqual(self.shared_cache.overlay_item.layers, [top])
+        self.assertEqual(self.shared_cache.underlay_item.layers, [bottom])
+        self.assertEqual(self.mirror_canvas.layers(), [compare])
+
+    def test_labeled_layer_rendered_by_mirror(self):
+        top, compare, bottom, _ = self.ordered_layers
+        bottom.setLabeling(QgsVectorLayerSimpleLabeling(QgsPalLayerSettings()))
+        bottom.setLabelsEnabled(True)
+        self.main_canvas.setLayers([top, bottom])
+        self._set_mirror_theme([top, compare, bottom])
+
+        self.shared_cache.start(THEME_NAME)
+
+        self.assertEqual(self.shared_cache.underlay_item.layers, [])
+        self.assertEqual(self.mirror_canvas.layers(), [compare, bottom])
+
+    def test_larger_mirror_renders_whole_theme(self):
+        top, compare, bottom, _ = self.ordered_layers
+        self.main_canvas.setLayers([top, bottom])
+        self._set_mirror_theme([top, compare, bottom])
+        self.mirror_canvas.resize(QSize(800, 400))
+
+        self.shared_cache.start(THEME_NAME)
+
+        self.assertFalse(self.shared_cache.is_sharing)
+        self.assertEqual(self.mirror_canvas.theme(), THEME_NAME)
+
+    def test_other_scale_stops_sharing(self):
+        top, compare, bottom, _ = self.ordered_layers
+        self.main_canvas.setLayers([top, bottom])
+        self._set_mirror_theme([top, compare, bottom])
+        self.shared_cache.start(THEME_NAME)
+
+        self.mirror_canvas.zoomByFactor(0.5)
+        self.assertFalse(self.shared_cache.is_sharing)
+
+        # a layer change does not share images of the main scale again
+        self.main_canvas.setLayers([top, compare, bottom])
+        self.assertFalse(self.shared_cache.is_sharing)
+
+    def test_stop_restores_theme(self):
+        top, compare, bottom, _ = self.ordered_layers
+        self.main_canvas.setLayers([top, bottom])
+        self._set_mirror_theme([top, compare, bottom])
+        self.shared_cache.start(THEME_NAME)
+
+        self.shared_cache.stop()
+
+        self.assertFalse(self.shared_cache.is_sharing)
+        self.assertEqual(self.mirror_canvas.theme(), THEME_NAME)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+
+from qgis.PyQt.QtCore import QPoint, Qt
+from qgis.PyQt.QtTest import QTest
+
+from .utilities import CompositorTestCase, get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestSplitDivider(CompositorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.compositor.start([self.layers[0]], "vertical")
+
+    def _press(self, x):
+        viewport = self.canvas.viewport()
+        QTest.mousePress(
+            viewport,
+            Qt.MouseButton.LeftButton,
+            Qt.KeyboardModifier.NoModifier,
+            QPoint(x, viewport.height() // 2),
+        )
+
+    def _drag(self, from_x, to_x):
+        viewport = self.canvas.viewport()
+        y = viewport.height() // 2
+        self._press(from_x)
+        QTest.mouseMove(viewport, QPoint(to_x, y))
+        QTest.mouseRelease(
+            viewport,
+            Qt.MouseButton.LeftButton,
+            Qt.KeyboardModifier.NoModifier,
+            QPoint(to_x, y),
+        )
+
+    def test_drag_moves_divider_without_render(self):
+        viewport = self.canvas.viewport()
+        width = viewport.width()
+        # a whole map image is rendered once when the drag starts
+        self._press(width // 2)
+        self.wait_renders()
+        self.render_counter.reset()
+
+        for x in range(width // 2, width // 4, -5):
+            QTest.mouseMove(viewport, QPoint(x, viewport.height() // 2))
+        QTest.mouseRelease(
+            viewport,
+            Qt.MouseButton.LeftButton,
+            Qt.KeyboardModifier.NoModifier,
+            QPoint(width // 4, viewport.height() // 2),
+        )
+
+        self.assertAlmostEqual(self.compositor.split_position, 0.25, delta=0.02)
+        self.assertEqual(self.render_count(), 0)
+
+    def test_drag_away_from_divider_is_ignored(self):
+        width = self.canvas.viewport().width()
+
+        self._drag(width // 10, width // 4)
+
+        self.assertEqual(self.compositor.split_position, 0.5)
+
+    def test_clip_follows_divider(self):
+        self.compositor.set_split_position(0.75)
+
+        clip_rect = self.compositor.item.compare_clip_path().boundingRect()
+        item_rect = self.compositor.item.boundingRect()
+        self.assertAlmostEqual(
+            clip_rect.left(), item_rect.left() + item_rect.width() * 0.75
+        )
+
+    def test_position_is_kept_on_restart(self):
+        self.compositor.set_split_position(0.3)
+
+        self.compositor.start([self.layers[0]], "horizontal")
+
+        self.assertEqual(self.compositor.item.split_position, 0.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
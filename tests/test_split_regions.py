@@ -0,0 +1,59 @@
+import unittest
+
+from qgis.core import QgsRectangle
+
+from ..comparator.compositor import split_render_regions
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+VISIBLE_EXTENT = QgsRectangle(0, 0, 1000, 600)
+MAP_UNITS_PER_PIXEL = 2.0
+
+
+class TestSplitRenderRegions(unittest.TestCase):
+    def test_vertical_split(self):
+        base_region, compare_region = split_render_regions(
+            VISIBLE_EXTENT, "vertical", 0.5, MAP_UNITS_PER_PIXEL
+        )
+        self.assertEqual(base_region, QgsRectangle(0, 0, 502, 600))
+        self.assertEqual(compare_region, QgsRectangle(498, 0, 1000, 600))
+
+    def test_horizontal_split(self):
+        base_region, compare_region = split_render_regions(
+            VISIBLE_EXTENT, "horizontal", 0.25, MAP_UNITS_PER_PIXEL
+        )
+        # compare layers are below the divider
+        self.assertEqual(base_region, QgsRectangle(0, 448, 1000, 600))
+        self.assertEqual(compare_region, QgsRectangle(0, 0, 1000, 452))
+
+    def test_regions_cover_map(self):
+        for method in ("vertical", "horizontal"):
+            for position in (0.1, 0.3, 0.5, 0.7, 0.9):
+                base_region, compare_region = split_render_regions(
+                    VISIBLE_EXTENT, method, position, MAP_UNITS_PER_PIXEL
+                )
+                union = QgsRectangle(base_region)
+                union.combineExtentWith(compare_region)
+                self.assertEqual(union, VISIBLE_EXTENT)
+                # each side is smaller than the map
+                self.assertLess(base_region.area(), VISIBLE_EXTENT.area())
+                self.assertLess(compare_region.area(), VISIBLE_EXTENT.area())
+
+    def test_divider_at_map_edge(self):
+        base_region, compare_region = split_render_regions(
+            VISIBLE_EXTENT, "vertical", 0.0, MAP_UNITS_PER_PIXEL
+        )
+        # only the pixel overlapping the divider is left of base layers
+        self.assertAlmostEqual(base_region.width(), MAP_UNITS_PER_PIXEL)
+        self.assertEqual(compare_region, VISIBLE_EXTENT)
+
+        base_region, compare_region = split_render_regions(
+            VISIBLE_EXTENT, "vertical", 1.0, MAP_UNITS_PER_PIXEL
+        )
+        self.assertEqual(base_region, VISIBLE_EXTENT)
+        self.assertAlmostEqual(compare_region.width(), MAP_UNITS_PER_PIXEL)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+from osgeo import gdal, osr
+from qgis.core import (
+    QgsMapSettings,
+    QgsProject,
+    QgsRasterLayer,
+    QgsRectangle,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QCoreApplication, QSize
+from qgis.PyQt.QtGui import QColor, QImage
+
+from ..comparator.statistics import (
+    ChangeStatistics,
+    ChangeStatisticsTask,
+    ImageBlockSource,
+    RasterBlockSource,
+)
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+RASTER_SIZE = 100
+
+
+def _write_geotiff(path: str, values: np.ndarray) -> None:
+    driver = gdal.GetDriverByName("GTiff")
+    dataset = driver.Create(path, RASTER_SIZE, RASTER_SIZE, 1, gdal.GDT_Float32)
+    dataset.SetGeoTransform([0, 1, 0, RASTER_SIZE, 0, -1])
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(3857)
+    dataset.SetProjection(srs.ExportToWkt())
+    band = dataset.GetRasterBand(1)
+    band.SetNoDataValue(-9999)
+    band.WriteArray(values)
+    dataset = None
+
+
+def _image(left_color: str, right_color: str) -> QImage:
+    image = QImage(10, 4, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(QColor(left_color))
+    for x in range(5, 10):
+        for y in range(4):
+            image.setPixelColor(x, y, QColor(right_color))
+    return image
+
+
+class _SampledRangeSource(ImageBlockSource):
+    """Value range read from a sample missing the highest values"""
+
+    def value_range(self, band: int) -> tuple:
+        return 0, 5
+
+
+class TestChangeStatistics(unittest.TestCase):
+    def test_image_statistics(self):
+        base = ImageBlockSource(_image("black", "black"))
+        compare = ImageBlockSource(_image("black", "#0a0a0a"))
+        # 2 rows per chunk
+        task = ChangeStatisticsTask(base, compare, chunk_pixels=20)
+
+        self.assertTrue(task.run())
+
+        statistics = task.statistics
+        self.assertEqual(statistics["pixel_count"], 40)
+        self.assertAlmostEqual(statistics["changed_percentage"], 50)
+        self.assertEqual(len(statistics["bands"]), 3)
+        for band in statistics["bands"]:
+            self.assertAlmostEqual(band["mean_difference"], 5)
+            self.assertAlmostEqual(band["mean_absolute_difference"], 5)
+            self.assertAlmostEqual(band["histogram_overlap"], 0.5)
+
+    def test_values_out_of_sampled_range_are_counted(self):
+        base = _SampledRangeSource(_image("black", "black"))
+        compare = _SampledRangeSource(_image("black", "#0a0a0a"))
+        task = ChangeStatisticsTask(base, compare)
+
+        self.assertTrue(task.run())
+        for band in task.statistics["bands"]:
+            self.assertAlmostEqual(band["histogram_overlap"], 0.5)
+
+    def test_same_images(self):
+        image = _image("red", "blue")
+        task = ChangeStatisticsTask(ImageBlockSource(image), ImageBlockSource(image))
+
+        self.assertTrue(task.run())
+        self.assertEqual(task.statistics["changed_percentage"], 0)
+        for band in task.statistics["bands"]:
+            self.assertAlmostEqual(band["histogram_overlap"], 1)
+
+    def test_raster_statistics_in_chunks(self):
+        base_values = np.zeros((RASTER_SIZE, RASTER_SIZE), np.float32)
+        compare_values = base_values.copy()
+        # top quarter changed, one nodata pixel
+        compare_values[: RASTER_SIZE // 4] = -2
+        compare_values[-1, -1] = -9999
+
+        with tempfile.TemporaryDirectory() as directory:
+            base_path = os.path.join(directory, "base.tif")
+            compare_path = os.path.join(directory, "compare.tif")
+            _write_geotiff(base_path, base_values)
+            _write_geotiff(compare_path, compare_values)
+            base_layer = QgsRasterLayer(base_path, "base")
+            compare_layer = QgsRasterLayer(compare_path, "compare")
+            extent = QgsRectangle(0, 0, RASTER_SIZE, RASTER_SIZE)
+
+            results = []
+            for chunk_pixels in (RASTER_SIZE * 7, RASTER_SIZE * RASTER_SIZE):
+                task = ChangeStatisticsTask(
+                    RasterBlockSource(base_layer, extent, RASTER_SIZE, RASTER_SIZE),
+                    RasterBlockSource(compare_layer, extent, RASTER_SIZE, RASTER_SIZE),
+                    chunk_pixels=chunk_pixels,
+                )
+                self.assertTrue(task.run())
+                results.append(task.statistics)
+            del base_layer, compare_layer
+
+        statistics = results[0]
+        self.assertEqual(statistics["pixel_count"], RASTER_SIZE * RASTER_SIZE - 1)
+        changed = RASTER_SIZE * RASTER_SIZE // 4
+        self.assertAlmostEqual(
+            statistics["changed_percentage"],
+            100 * changed / statistics["pixel_count"],
+        )
+        self.assertAlmostEqual(
+            statistics["bands"][0]["mean_difference"],
+            -2 * changed / statistics["pixel_count"],
+        )
+        # block size doesn't change results
+        self.assertEqual(results[0], results[1])
+
+    def test_cancel(self):
+        image = _image("red", "blue")
+        task = ChangeStatisticsTask(ImageBlockSource(image), ImageBlockSource(image))
+        task.cancel()
+
+        self.assertFalse(task.run())
+        self.assertIsNone(task.statistics)
+
+
+class TestChangeStatisticsRenders(unittest.TestCase):
+    def setUp(self):
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", f"layer_{i}", "memory")
+            for i in range(2)
+        ]
+        QgsProject.instance().addMapLayers(self.layers)
+        self.settings = QgsMapSettings()
+        self.settings.setOutputSize(QSize(50, 50))
+        self.settings.setExtent(QgsRectangle(0, 0, 100, 100))
+        self.change_statistics = ChangeStatistics()
+        self.results = []
+        self.change_statistics.statisticsReady.connect(self.results.append)
+        self.change_statistics.statisticsFailed.connect(self.results.append)
+
+    def tearDown(self):
+        self.change_statistics.clear()
+        QgsProject.instance().removeMapLayers([layer.id() for layer in self.layers])
+
+    def test_renderers_release_layers_once_images_are_read(self):
+        self.change_statistics.start(self.settings, [self.layers[0]], [self.layers[1]])
+        deadline = time.time() + 5
+        while self.change_statistics.is_running and time.time() < deadline:
+            QCoreApplication.processEvents()
+
+        self.assertEqual(len(self.results), 1)
+        for renderer in (
+            self.change_statistics.base_renderer,
+            self.change_statistics.compare_renderer,
+        ):
+            self.assertEqual(renderer.layers, [])
+            self.assertFalse(renderer.is_rendering)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import time
+import unittest
+
+from qgis.core import QgsRectangle
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QCoreApplication, QSize
+
+from ..comparator.constants import map_sync_frame_interval_time
+from ..comparator.sync import MapSyncEngine
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+def _wait_frame():
+    deadline = time.time() + (map_sync_frame_interval_time * 5) / 1000
+    while time.time() < deadline:
+        QCoreApplication.processEvents()
+
+
+class TestMapSyncEngine(unittest.TestCase):
+    def setUp(self):
+        self.mirror_canvas = QgsMapCanvas(PARENT)
+        self.mirror_canvas.resize(QSize(200, 400))
+        self.engine = MapSyncEngine(CANVAS)
+        self.engine.add_canvas(self.mirror_canvas)
+
+        self.mirror_extent_changes = 0
+        self.mirror_canvas.extentsChanged.connect(self._on_mirror_extent_changed)
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def _on_mirror_extent_changed(self):
+        self.mirror_extent_changes += 1
+
+    def test_pan_steps_are_coalesced(self):
+        for i in range(20):
+            CANVAS.setExtent(QgsRectangle(i, i, i + 100, i + 100))
+        _wait_frame()
+
+        self.assertEqual(self.mirror_extent_changes, 1)
+        self.assertAlmostEqual(self.mirror_canvas.center().x(), CANVAS.center().x())
+        self.assertAlmostEqual(self.mirror_canvas.center().y(), CANVAS.center().y())
+        self.assertAlmostEqual(
+            self.mirror_canvas.mapUnitsPerPixel(), CANVAS.mapUnitsPerPixel()
+        )
+
+    def test_mirror_drives_main_canvas(self):
+        self.mirror_canvas.setExtent(QgsRectangle(1000, 1000, 1100, 1200))
+        _wait_frame()
+
+        self.assertAlmostEqual(CANVAS.center().x(), self.mirror_canvas.center().x())
+        self.assertAlmostEqual(CANVAS.center().y(), self.mirror_canvas.center().y())
+
+
+if __name__ == "__main__":
+    unittest.main()
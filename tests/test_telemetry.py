@@ -0,0 +1,128 @@
+import csv
+import os
+import tempfile
+import time
+import unittest
+
+from qgis.core import Qgis, QgsProject, QgsVectorLayer
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt.QtCore import QCoreApplication, QSize
+
+from ..comparator.compositor import LayerSetRenderer
+from ..comparator.telemetry import RenderTelemetry, can_profile_layers
+from .utilities import get_qgis_app
+
+QGIS_APP, CANVAS, IFACE, PARENT = get_qgis_app()
+
+
+class TestRenderTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.layer = QgsVectorLayer("Point?crs=EPSG:3857", "layer", "memory")
+        QgsProject.instance().addMapLayer(self.layer)
+        self.canvas = QgsMapCanvas(PARENT)
+        self.canvas.resize(QSize(200, 200))
+        self.canvas.setLayers([self.layer])
+        self.canvas.show()
+
+        self.telemetry = RenderTelemetry()
+        self.telemetry.attach(self.canvas, "test map")
+        self.telemetry.set_mode("vertical")
+
+    def tearDown(self):
+        self.telemetry.stop_csv_export()
+        self.telemetry.detach(self.canvas)
+        self.canvas.hide()
+        QgsProject.instance().removeMapLayer(self.layer.id())
+
+    def _render(self):
+        self.canvas.refresh()
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            QCoreApplication.processEvents()
+            if self.telemetry.samples and not self.canvas.isDrawing():
+                break
+
+    def test_render_adds_sample(self):
+        self._render()
+
+        self.assertEqual(len(self.telemetry.samples), 1)
+        sample = self.telemetry.samples[0]
+        self.assertEqual(sample["mode"], "vertical")
+        self.assertEqual(sample["source"], "test map")
+        self.assertGreaterEqual(self.telemetry.last_frame_time(), 0)
+        self.assertGreater(self.telemetry.renders_per_second(), 0)
+
+    def test_slowest_layers(self):
+        for layer_times in [{"a": 10, "b": 30}, {"a": 20, "c": 5}]:
+            self.telemetry.samples.append(
+                {
+                    "time": time.time(),
+                    "mode": "lens",
+                    "source": "test map",
+                    "frame_time_ms": 40,
+                    "layer_times_ms": layer_times,
+                }
+            )
+
+        self.assertEqual(self.telemetry.slowest_layers(2), [("b", 30.0), ("a", 15.0)])
+
+    @unittest.skipUnless(can_profile_layers(), "render profiling not available")
+    def test_layer_times_of_canvas(self):
+        self.telemetry.set_layer_profiling(True)
+        self._render()
+        self.telemetry.set_layer_profiling(False)
+
+        sample = self.telemetry.samples[-1]
+        self.assertEqual(list(sample["layer_times_ms"]), [self.layer.id()])
+        self.assertFalse(
+            self.canvas.mapSettings().testFlag(Qgis.MapSettingsFlag.RecordProfile)
+        )
+
+    @unittest.skipUnless(can_profile_layers(), "render profiling not available")
+    def test_layer_times_of_renderer(self):
+        renderer = LayerSetRenderer()
+        renderer.set_layers([self.layer])
+        self.telemetry.attach(renderer, "test renderer")
+        self.telemetry.set_layer_profiling(True)
+
+        renderer.render(self.canvas.mapSettings())
+        deadline = time.time() + 5
+        while renderer.is_rendering and time.time() < deadline:
+            QCoreApplication.processEvents()
+
+        sample = self.telemetry.samples[-1]
+        self.assertEqual(sample["source"], "test renderer")
+        self.assertEqual(list(sample["layer_times_ms"]), [self.layer.id()])
+        self.telemetry.detach(renderer)
+
+    def test_csv_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "samples.csv")
+            self.telemetry.start_csv_export(path)
+            self._render()
+            self.telemetry.stop_csv_export()
+
+            with open(path, newline="") as f:
+                rows = list(csv.DictReader(f))
+        self.assertGreaterEqual(len(rows), 1)
+        self.assertEqual(rows[0]["source"], "test map")
+        self.assertEqual(rows[0]["mode"], "vertical")
+
+    def test_csv_export_appends_samples(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "samples.csv")
+            for _ in range(2):
+                self.telemetry.start_csv_export(path)
+                self.telemetry.samples.clear()
+                self._render()
+                self.telemetry.stop_csv_export()
+
+            with open(path, newline="") as f:
+                lines = f.read().splitlines()
+        # one header, samples of both exports
+        self.assertEqual(sum(1 for line in lines if line.startswith("time,")), 1)
+        self.assertGreaterEqual(len(lines), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,16 +7,23 @@ import atexit
 import logging
 import os
 import sys
+import unittest
 
-from qgis.core import QgsApplication
+from qgis.core import QgsApplication, QgsProject, QgsVectorLayer
 from qgis.gui import QgsMapCanvas
-from qgis.PyQt.QtCore import QSize
+from qgis.PyQt.QtCore import QCoreApplication, QSize
+from qgis.PyQt.QtTest import QSignalSpy
 from qgis.PyQt.QtWidgets import QWidget
 from qgis.utils import iface
 
+from ..comparator.compositor import CompareCompositor
+from ..comparator.telemetry import RenderCounter
+from ..comparator.utils import reconcile_group_layers_steps
 from .qgis_interface import QgisInterface
 
 LOGGER = logging.getLogger("QGIS")
+# maximum time waited for a render, in ms
+RENDER_TIMEOUT = 5000
 QGIS_APP = None  # Static variable used to hold hand to running QGIS app
 CANVAS = None
 PARENT = None
@@ -110,3 +117,69 @@ def get_qgis_app(cleanup=True):
         IFACE = QgisInterface(CANVAS)
 
     return QGISAPP, CANVAS, IFACE, PARENT
+
+
+def reconcile_group_layers(layer_group, layers: list) -> None:
+    """Update layer group children to be the input layers at once"""
+    for _ in reconcile_group_layers_steps(
+        layer_group, [layer.id() for layer in layers]
+    ):
+        pass
+
+
+def wait_renders(renderers: list, timeout: int = RENDER_TIMEOUT) -> None:
+    """
+    Wait for the renders of LayerSetRenderer objects to finish, including
+    renders of layer changes that start on a zero timer
+    """
+    QCoreApplication.processEvents()
+    for renderer in renderers:
+        if renderer.is_rendering:
+            QSignalSpy(renderer.imageReady).wait(timeout)
+
+
+class CompositorTestCase(unittest.TestCase):
+    """
+    Memory layers shown by a map canvas compared with CompareCompositor,
+    renders of the compositor are counted by render_counter
+    """
+
+    layer_count = 2
+
+    def setUp(self):
+        _, _, _, parent = get_qgis_app()
+        self.layers = [
+            QgsVectorLayer("Point?crs=EPSG:3857", f"layer_{i}", "memory")
+            for i in range(self.layer_count)
+        ]
+        QgsProject.instance().addMapLayers(self.layers)
+
+        self.canvas = QgsMapCanvas(parent)
+        self.canvas.resize(QSize(400, 200))
+        self.canvas.show()
+        self.canvas.setLayers(self.layers[:2])
+        self.compositor = CompareCompositor(self.canvas)
+
+        self.render_counter = RenderCounter()
+        self.render_counter.attach(self.compositor.base_renderer)
+        self.render_counter.attach(self.compositor.compare_renderer)
+        self.render_counter.attach(self.compositor.magnifier_renderer)
+
+    def tearDown(self):
+        self.compositor.stop()
+        self.canvas.hide()
+        QgsProject.instance().removeMapLayers([layer.id() for layer in self.layers])
+
+    def wait_renders(self) -> None:
+        wait_renders(
+            [
+                self.compositor.base_renderer,
+                self.compositor.compare_renderer,
+                self.compositor.magnifier_renderer,
+            ]
+        )
+
+    def render_count(self) -> int:
+        """Renders started since the last reset of render_counter"""
+        self.wait_renders()
+        return self.render_counter.count("inactive")